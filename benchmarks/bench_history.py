@@ -0,0 +1,65 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import argparse
+import glob
+import tempfile
+import time
+import pandas as pd
+from bench_transform import synthetic_products
+from utils.history import HistoryStore
+from utils.transform import _transform_data_sync
+
+def write_runs(directory, runs, rows):
+    """Write one transformed export per daily run, prices drifting between runs."""
+    base = _transform_data_sync(synthetic_products(rows))
+    for day in range(runs):
+        frame = base.assign(Price=base["Price"] * (1 + day / 100),
+                            Scraped_At=base["Scraped_At"] + pd.Timedelta(days=day))
+        frame.to_csv(os.path.join(directory, f"fashion_products_202505{day + 1:02d}_100000.csv"), index=False)
+    return base["Title"].iloc[rows // 2]
+
+def csv_queries(directory, title):
+    frames = [pd.read_csv(path) for path in sorted(glob.glob(os.path.join(directory, "fashion_products_*.csv")))]
+    df = pd.concat(frames, ignore_index=True)
+    history = df[df["Title"] == title].sort_values("Scraped_At")
+    recent = df[(df["Gender"] == "Women") & (df["Price"] < 500_000) & (df["Scraped_At"] >= "2025-05-24")]
+    return len(history), len(recent)
+
+def store_queries(store, title):
+    history = store.price_history(title)
+    recent = store.query(gender="Women", max_price=500_000, since="2025-05-24")
+    return len(history), len(recent)
+
+def best_of(fn, repeat, *args):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark history store queries vs re-reading CSV exports")
+    parser.add_argument("--runs", type=int, default=30)
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        title = write_runs(directory, args.runs, args.rows)
+        store = HistoryStore(os.path.join(directory, "history.sqlite3"))
+        start = time.perf_counter()
+        added = store.import_exports(directory)
+        print(f"Imported {added} rows from {args.runs} exports in {time.perf_counter() - start:.1f}s")
+
+        csv_seconds, csv_result = best_of(csv_queries, args.repeat, directory, title)
+        store_seconds, store_result = best_of(store_queries, args.repeat, store, title)
+        store.close()
+        assert csv_result == store_result, (csv_result, store_result)
+        print(f"{'source':>8} {'seconds':>9} {'speedup':>8}")
+        print(f"{'csv':>8} {csv_seconds:>9.4f} {1:>7.1f}x")
+        print(f"{'history':>8} {store_seconds:>9.4f} {csv_seconds / store_seconds:>7.1f}x")
+
+if __name__ == '__main__':
+    main()
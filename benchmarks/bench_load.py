@@ -0,0 +1,72 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import argparse
+import asyncio
+import tempfile
+import time
+import pandas as pd
+from bench_transform import synthetic_products
+from utils.transform import _transform_data_sync
+from utils.load import CSV_CHUNK_SIZE, CSV_COMPRESSIONS, LOADERS, PARQUET_COMPRESSIONS
+
+def loaders(write_workers=(), block_rows=CSV_CHUNK_SIZE):
+    """
+    Yield (label, loader, reader) for every registered format; CSV and
+    Parquet are measured once per compression codec. Each write_workers
+    count adds a gzip CSV case encoding blocks of block_rows in that many
+    processes (--write-workers).
+    """
+    yield "csv", LOADERS["csv"](), pd.read_csv
+    for compression in CSV_COMPRESSIONS:
+        yield f"csv/{compression}", LOADERS["csv"](compression=compression), pd.read_csv
+    for workers in write_workers:
+        loader = LOADERS["csv"](compression="gzip", workers=workers, chunk_size=block_rows)
+        yield f"csv/gzip/{workers}w", loader, pd.read_csv
+    yield "json", LOADERS["json"](), lambda path: pd.read_json(path, lines=True)
+    for compression in PARQUET_COMPRESSIONS:
+        yield f"parquet/{compression}", LOADERS["parquet"](compression=compression), pd.read_parquet
+
+def save_file(loader, df, path):
+    """
+    Save df with loader and close it, as the pipelines do; a Parquet file
+    is only complete once its writer is closed.
+    """
+    async def save():
+        try:
+            await loader.save(df, path)
+        finally:
+            await loader.close()
+    asyncio.run(save())
+
+def best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark output formats: write time, file size, read-back time")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--write-workers", type=int, nargs="+", default=[2, 4],
+                        help="Also write gzip CSV with this many encoding processes")
+    parser.add_argument("--block-rows", type=int, default=10_000,
+                        help="Rows per CSV block in the --write-workers cases")
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'format':>16} {'write (s)':>10} {'size (KiB)':>11} {'read (s)':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            df = _transform_data_sync(synthetic_products(rows))
+            for label, loader, reader in loaders(args.write_workers, args.block_rows):
+                path = os.path.join(tmp, f"{label.replace('/', '_')}_{rows}{loader.extension}")
+                write = best_of(lambda: save_file(loader, df, path), args.repeat)
+                size = os.path.getsize(path) / 1024
+                read = best_of(lambda: reader(path), args.repeat)
+                print(f"{rows:>10} {label:>16} {write:>10.4f} {size:>11.1f} {read:>9.4f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import argparse
+import gc
+import random
+import time
+import tracemalloc
+import pandas as pd
+from bench_transform import GENDERS, SIZES
+from utils.extract import ProductColumns, product_from_row
+
+# Cards per catalog page on the live site
+CARDS_PER_PAGE = 20
+
+def synthetic_pages(rows, seed=42):
+    """
+    Generate (rows, timestamp) pages shaped like parse_page_rows output.
+    Every string is a fresh object, as BeautifulSoup returns them.
+    """
+    rng = random.Random(seed)
+    pages = []
+    for start in range(0, rows, CARDS_PER_PAGE):
+        timestamp = f"2025-05-01 10:{start // CARDS_PER_PAGE // 60 % 60:02d}:{start // CARDS_PER_PAGE % 60:02d}"
+        pages.append(([(
+            f"T-shirt {i}",
+            f"${rng.uniform(5, 500):.2f}",
+            f"Rating: ⭐ {rng.uniform(1, 5):.1f} / 5",
+            f"{rng.randint(1, 8)} Colors",
+            "Size: " + rng.choice(SIZES),
+            "Gender: " + rng.choice(GENDERS),
+        ) for i in range(start, min(start + CARDS_PER_PAGE, rows))], timestamp))
+    return pages
+
+def build_dicts(pages):
+    return [product_from_row(row, timestamp) for rows, timestamp in pages for row in rows]
+
+def build_columns(pages):
+    products = ProductColumns()
+    for rows, timestamp in pages:
+        products.add_rows(rows, timestamp)
+    return products
+
+def measure(build, to_frame, pages):
+    """Return (accumulator bytes, DataFrame build seconds) for one record path."""
+    gc.collect()
+    tracemalloc.start()
+    products = build(pages)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    start = time.perf_counter()
+    to_frame(products)
+    return size, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark list-of-dicts vs columnar product records")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 200_000])
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'dicts (MiB)':>12} {'columns (MiB)':>14} {'saved':>7} "
+          f"{'dicts frame (s)':>16} {'columns frame (s)':>18}")
+    for rows in args.rows:
+        pages = synthetic_pages(rows)
+        dict_bytes, dict_seconds = measure(build_dicts, pd.DataFrame, pages)
+        column_bytes, column_seconds = measure(build_columns, ProductColumns.to_frame, pages)
+        print(f"{rows:>10} {dict_bytes / 2**20:>12.1f} {column_bytes / 2**20:>14.1f} "
+              f"{1 - column_bytes / dict_bytes:>6.0%} {dict_seconds:>16.4f} {column_seconds:>18.4f}")
+
+if __name__ == '__main__':
+    main()
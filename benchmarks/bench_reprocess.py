@@ -0,0 +1,43 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import argparse
+import logging
+import tempfile
+import time
+import pandas as pd
+from bench_transform import synthetic_products
+from utils.reprocess import reprocess
+
+def write_exports(directory, rows, files):
+    raw = pd.DataFrame(synthetic_products(rows))
+    per_file = -(-rows // files)
+    for i in range(files):
+        raw[i * per_file:(i + 1) * per_file].to_csv(
+            os.path.join(directory, f"fashion_products_2025010{i}_000000.csv"), index=False
+        )
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark --reprocess scaling with worker processes")
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--files", type=int, default=4)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--range-mb", type=float, default=4)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    with tempfile.TemporaryDirectory() as directory:
+        write_exports(directory, args.rows, args.files)
+        print(f"{args.rows} rows in {args.files} files, {os.cpu_count()} CPUs")
+        print(f"{'workers':>8} {'seconds':>9} {'rows/s':>10} {'speedup':>8}")
+        baseline = None
+        for workers in args.workers:
+            start = time.perf_counter()
+            reprocess(directory, os.path.join(directory, "out", "all.csv"), workers=workers,
+                      range_bytes=int(args.range_mb * 2**20))
+            seconds = time.perf_counter() - start
+            baseline = baseline or seconds
+            print(f"{workers:>8} {seconds:>9.2f} {args.rows / seconds:>10,.0f} {baseline / seconds:>7.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+import pandas as pd
+from bench_transform import synthetic_products
+from bench_load import best_of, loaders, save_file
+from fixture_server import catalog_page, serve
+from utils.extract import PARSERS, check_parser, parse_page_rows, scrape_product_async
+from utils.ratelimit import FixedDelayPolicy
+from utils.transform import _transform_data_sync
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+async def bench_scrape(args):
+    """
+    Crawl the fixture site end to end with scrape_product_async.
+    """
+    options = dict(pages=args.pages, cards=args.cards, latency=args.latency, throttle_rate=args.throttle_rate)
+    async with serve(**options) as (base_url, app):
+        policy = FixedDelayPolicy(args.concurrency, min_delay=0, max_delay=0)
+        start = time.perf_counter()
+        products = await scrape_product_async(base_url, args.pages, rate_limit=policy)
+        seconds = time.perf_counter() - start
+    return {
+        **options,
+        "concurrency": args.concurrency,
+        "seconds": round(seconds, 4),
+        "products": len(products),
+        "pages_per_second": round(args.pages / seconds, 2),
+        "requests": app["stats"]["requests"],
+        "throttled": app["stats"]["throttled"],
+    }
+
+def bench_parse(args):
+    """
+    Time parse_page_rows on one fixture page per installed backend.
+    """
+    html = catalog_page(2, args.pages, args.cards)
+    results = {}
+    for parser in PARSERS:
+        try:
+            check_parser(parser)
+        except ValueError:
+            continue
+        seconds = best_of(lambda: parse_page_rows(html, parser), args.repeat)
+        results[parser] = {"seconds_per_page": round(seconds, 6), "cards": args.cards}
+    return results
+
+def bench_transform(args):
+    results = {}
+    for rows in args.rows:
+        data = synthetic_products(rows)
+        seconds = best_of(lambda: _transform_data_sync(data), args.repeat)
+        results[str(rows)] = {"seconds": round(seconds, 4), "rows_per_second": round(rows / seconds)}
+    return results
+
+def bench_load(args):
+    df = _transform_data_sync(synthetic_products(args.load_rows))
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, loader, reader in loaders():
+            path = os.path.join(tmp, f"{label.replace('/', '_')}{loader.extension}")
+            write = best_of(lambda: save_file(loader, df, path), args.repeat)
+            read = best_of(lambda: reader(path), args.repeat)
+            results[label] = {
+                "rows": len(df),
+                "write_seconds": round(write, 4),
+                "read_seconds": round(read, 4),
+                "bytes": os.path.getsize(path),
+            }
+    return results
+
+STAGES = {
+    "scrape": lambda args: asyncio.run(bench_scrape(args)),
+    "parse": bench_parse,
+    "transform": bench_transform,
+    "load": bench_load,
+}
+
+# Timing fields compared between reports (lower is better)
+TIMINGS = ("seconds", "seconds_per_page", "write_seconds", "read_seconds")
+
+def compare(old, new):
+    """
+    Print new/old ratios of every timing present in both reports.
+    """
+    print(f"{'benchmark':<40} {'old':>10} {'new':>10} {'ratio':>7}")
+    for stage, cases in new["results"].items():
+        old_cases = old["results"].get(stage, {})
+        if "seconds" in cases:  # scrape reports a single case
+            cases, old_cases = {"": cases}, {"": old_cases}
+        for case, values in cases.items():
+            for field in TIMINGS:
+                before = old_cases.get(case, {}).get(field)
+                after = values.get(field)
+                if before and after:
+                    name = "/".join(part for part in (stage, case, field) if part)
+                    print(f"{name:<40} {before:>10.4f} {after:>10.4f} {after / before:>6.2f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the ETL stages against a local fixture site")
+    parser.add_argument("--stages", nargs="+", choices=list(STAGES), default=list(STAGES))
+    parser.add_argument("--pages", type=int, default=50, help="Fixture catalog pages")
+    parser.add_argument("--cards", type=int, default=20, help="Products per fixture page")
+    parser.add_argument("--latency", type=float, default=0.05, help="Injected response latency (s)")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Share of requests answered with 429")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 100_000, 1_000_000],
+                        help="Transform sizes")
+    parser.add_argument("--load-rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", default=None, help="Write the JSON report here")
+    parser.add_argument("--compare", default=None, help="Report of an earlier commit to compare against")
+    args = parser.parse_args()
+
+    # Keep the pipeline's own log lines out of the report output
+    logging.disable(logging.INFO)
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "machine": platform.machine(),
+            "args": vars(args),
+        },
+        "results": {},
+    }
+    for stage in args.stages:
+        print(f"Running {stage} benchmark...", file=sys.stderr)
+        report["results"][stage] = STAGES[stage](args)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(json.load(f), report)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import argparse
+import random
+import time
+from functools import partial
+from utils.transform import _transform_data_sync, _transform_data_rowwise
+
+SIZES = ["XS", "S", "M", "L", "XL", "XXL"]
+GENDERS = ["Men", "Women", "Unisex"]
+
+def synthetic_products(rows, seed=42):
+    """
+    Generate raw products shaped like extract_product_data output,
+    including the invalid values seen on the live site.
+    """
+    rng = random.Random(seed)
+    products = []
+    for i in range(rows):
+        invalid = rng.random() < 0.05
+        products.append({
+            "Title": "Unknown Product" if invalid else f"T-shirt {i}",
+            "Price": "Price Unavailable" if invalid else f"${rng.uniform(5, 500):.2f}",
+            "Rating": "Rating: ⭐ Invalid Rating / 5" if invalid else f"Rating: ⭐ {rng.uniform(1, 5):.1f} / 5",
+            "Colors": f"{rng.randint(1, 8)} Colors",
+            "Size": f"Size: {rng.choice(SIZES)}",
+            "Gender": f"Gender: {rng.choice(GENDERS)}",
+            "Scraped_At": "2025-05-01 10:00:00",
+        })
+    return products
+
+def best_of(fn, data, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(data)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark row-wise vs vectorized transform")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    
+    print(f"{'rows':>10} {'row-wise (s)':>14} {'vectorized (s)':>16} {'speedup':>9}")
+    for rows in args.rows:
+        data = synthetic_products(rows)
+        rowwise = best_of(_transform_data_rowwise, data, args.repeat)
+        vectorized = best_of(partial(_transform_data_sync, compact=False), data, args.repeat)
+        print(f"{rows:>10} {rowwise:>14.4f} {vectorized:>16.4f} {rowwise / vectorized:>8.1f}x")
+
+if __name__ == '__main__':
+    main()
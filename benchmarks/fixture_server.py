@@ -0,0 +1,125 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import argparse
+import asyncio
+import random
+import time
+from contextlib import asynccontextmanager
+from aiohttp import web
+
+SIZES = ["XS", "S", "M", "L", "XL", "XXL"]
+GENDERS = ["Men", "Women", "Unisex"]
+
+DETAIL_STYLE = "font-size: 14px; color: #777;"
+
+def product_card(rng, index):
+    """
+    Render one collection card shaped like the Fashion Studio markup,
+    including the invalid cards seen on the live site.
+    """
+    if rng.random() < 0.05:
+        return (
+            '<div class="collection-card">'
+            '<h3 class="product-title">Unknown Product</h3>'
+            '<p class="price">Price Unavailable</p>'
+            f'<p style="{DETAIL_STYLE}">Rating: ⭐ Invalid Rating / 5</p>'
+            '</div>'
+        )
+    return (
+        '<div class="collection-card">'
+        '<div class="product-details">'
+        f'<h3 class="product-title">T-shirt {index}</h3>'
+        f'<div class="price-container"><span class="price">${rng.uniform(5, 500):.2f}</span></div>'
+        f'<p style="{DETAIL_STYLE}">Rating: ⭐ {rng.uniform(1, 5):.1f} / 5</p>'
+        f'<p style="{DETAIL_STYLE}">{rng.randint(1, 8)} Colors</p>'
+        f'<p style="{DETAIL_STYLE}">Size: {rng.choice(SIZES)}</p>'
+        f'<p style="{DETAIL_STYLE}">Gender: {rng.choice(GENDERS)}</p>'
+        '</div></div>'
+    )
+
+def catalog_page(page_num, pages, cards, seed=42):
+    """
+    Render catalog page page_num of pages with `cards` products; the same
+    arguments always give the same HTML.
+    """
+    rng = random.Random(seed * 100_003 + page_num)
+    grid = "".join(product_card(rng, (page_num - 1) * cards + i) for i in range(cards))
+    next_link = f'<li class="page-item next"><a class="page-link" href="/page{page_num + 1}">Next</a></li>'
+    return (
+        "<!DOCTYPE html><html><head><title>Fashion Studio</title></head><body>"
+        '<nav class="navbar"><a href="/">Fashion Studio</a></nav>'
+        f'<div class="collection-grid" id="collectionList">{grid}</div>'
+        '<ul class="pagination">'
+        f'<li class="page-item current"><span>{page_num}</span></li>'
+        f'{next_link if page_num < pages else ""}'
+        "</ul></body></html>"
+    )
+
+def make_app(pages=50, cards=20, latency=0.0, jitter=0.0, throttle_rate=0.0, seed=42, retry_after="0"):
+    """
+    Build an aiohttp app serving a synthetic catalog: page 1 at /, page N
+    at /pageN. Every response is delayed by latency plus up to jitter
+    seconds and a throttle_rate share of requests get a 429 with the given
+    Retry-After. app["log"] lists (arrival time, page, status) per request.
+    """
+    rng = random.Random(seed)
+    rendered = {}
+    app = web.Application()
+    app["stats"] = {"requests": 0, "throttled": 0}
+    app["log"] = []
+
+    async def serve_page(request):
+        app["stats"]["requests"] += 1
+        arrived = time.monotonic()
+        delay = latency + rng.uniform(0, jitter)
+        if delay:
+            await asyncio.sleep(delay)
+        page_num = int(request.match_info.get("num", 1))
+        if rng.random() < throttle_rate:
+            app["stats"]["throttled"] += 1
+            app["log"].append((arrived, page_num, 429))
+            return web.Response(status=429, headers={"Retry-After": retry_after})
+        if not 1 <= page_num <= pages:
+            app["log"].append((arrived, page_num, 404))
+            return web.Response(status=404)
+        app["log"].append((arrived, page_num, 200))
+        if page_num not in rendered:
+            rendered[page_num] = catalog_page(page_num, pages, cards, seed)
+        return web.Response(text=rendered[page_num], content_type="text/html")
+
+    app.router.add_get("/", serve_page)
+    app.router.add_get(r"/page{num:\d+}", serve_page)
+    return app
+
+@asynccontextmanager
+async def serve(host="127.0.0.1", port=0, **options):
+    """
+    Run the fixture site for the duration of the with block and yield
+    (base_url, app); base_url has the /page{} pattern main.py uses.
+    """
+    app = make_app(**options)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    bound_port = runner.addresses[0][1]
+    try:
+        yield f"http://{host}:{bound_port}/page{{}}", app
+    finally:
+        await runner.cleanup()
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a synthetic Fashion Studio catalog")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--cards", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    app = make_app(args.pages, args.cards, args.latency, throttle_rate=args.throttle_rate)
+    web.run_app(app, host="127.0.0.1", port=args.port)
+
+if __name__ == '__main__':
+    main()
@@ -1,58 +1,273 @@
+from __future__ import annotations
+
 import asyncio
-import aiohttp
+from concurrent.futures import Executor, ProcessPoolExecutor
 from datetime import datetime
 import argparse
+import logging
+import os
+import signal
 import sys
-import ssl
-import certifi
-from typing import Optional, List, Dict, Any
-
-# Configure SSL context properly
-def create_ssl_context() -> ssl.SSLContext:
-    """Create and configure SSL context with certifi certificates"""
-    ssl_context = ssl.create_default_context()
-    ssl_context.load_verify_locations(certifi.where())
-    return ssl_context
-
-# Import modules after SSL configuration
-from utils.extract import fetch_content, extract_product_data, process_page, scrape_product_async
-from utils.transform import transform_data
-from utils.load import save_to_csv
-
-async def pipeline(base_url: str, max_pages: int = 50, output_format: str = 'csv') -> Optional[str]:
+from typing import TYPE_CHECKING, Optional, List, Dict, Any
+
+# Only light modules are imported here so --help and argument errors stay
+# fast; pandas (transform, incremental) is imported by the stages using it,
+# bs4, aiohttp and SQLAlchemy on first use inside utils
+from utils.extract import PARSERS, PRODUCT_FIELDS, scrape_product_async
+from utils.load import CSV_COMPRESSIONS, HISTORY_PATH, LOADERS, PARQUET_COMPRESSIONS, Loader
+from utils.ratelimit import POLICIES, RateLimitPolicy
+from utils.cache import CACHE_MAX_BYTES, CACHE_TTL, ResponseCache
+from utils.checkpoint import CHECKPOINT_DIR, CrawlCheckpoint, new_run_id
+from utils.crawlplan import SHARD_PAGES, CrawlPlan, WorkQueue, run_workers
+from utils.retry import MAX_RETRIES, RETRY_BUDGET, RetryScheduler
+from utils.session import SESSIONS, SessionFactory
+from utils.scheduler import CronSchedule, IntervalSchedule, PipelineScheduler, start_control_server
+from utils.metrics import METRICS, configure_logging
+from utils.profiling import PROFILER, TOP_FUNCTIONS, stage
+
+if TYPE_CHECKING:
+    from utils.dedup import Deduplicator
+    from utils.incremental import FingerprintIndex
+
+logger = logging.getLogger("main")
+
+BASE_URL = 'https://fashion-studio.dicoding.dev/page{}'
+
+async def pipeline(base_url: str, max_pages: int = 50, output_format: str = 'csv',
+                   rate_limit: Optional[RateLimitPolicy] = None,
+                   parser: str = 'html.parser', parse_workers: int = 0,
+                   loader: Optional[Loader] = None,
+                   cache: Optional[ResponseCache] = None,
+                   index: Optional[FingerprintIndex] = None,
+                   checkpoint: Optional[CrawlCheckpoint] = None,
+                   retries: Optional[RetryScheduler] = None,
+                   sessions: Optional[SessionFactory] = None,
+                   executor: Optional[Executor] = None,
+                   dedup: Optional[Deduplicator] = None) -> Optional[str]:
     """
     Main data pipeline: extract, transform, load.
     Now fully asynchronous with proper error handling.
+    output_format picks the loader from LOADERS unless a loader is given.
+    With a fingerprint index only new, changed and deleted products are
+    transformed and loaded, as a delta with a Change column.
+    With a Deduplicator (utils.dedup) products whose business key was
+    already seen are dropped before the transform.
     """
-    print(f"Starting scraping pipeline at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    if loader is None:
+        if output_format.lower() not in LOADERS:
+            logger.error(f"Unsupported output format: {output_format}")
+            return None
+        loader = LOADERS[output_format.lower()]()
+    
+    logger.info(f"Starting scraping pipeline at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     
     try:
         # Extract data with timeout
-        raw_data: List[Dict[str, Any]] = await asyncio.wait_for(
-            scrape_product_async(base_url, max_pages),
-            timeout=300  # 5 minutes timeout
-        )
-        print(f"Extracted {len(raw_data)} products")
+        with stage("extract"):
+            raw_data: List[Dict[str, Any]] = await asyncio.wait_for(
+                scrape_product_async(base_url, max_pages, rate_limit=rate_limit, parser=parser,
+                                     parse_workers=parse_workers, cache=cache, checkpoint=checkpoint,
+                                     retries=retries, sessions=sessions, executor=executor),
+                timeout=300  # 5 minutes timeout
+            )
+        logger.info(f"Extracted {len(raw_data)} products", extra={"products": len(raw_data)})
+        return await transform_and_load(raw_data, loader, index, dedup)
+            
+    except asyncio.TimeoutError:
+        logger.error("Scraping timed out after 5 minutes")
+        return None
+    except Exception as e:
+        logger.error(f"Error in pipeline: {str(e)}")
+        return None
+
+async def transform_and_load(raw_data: List[Dict[str, Any]], loader: Loader,
+                             index: Optional[FingerprintIndex] = None,
+                             dedup: Optional[Deduplicator] = None) -> Optional[str]:
+    """
+    Deduplicate, transform and load extracted products, as a delta when
+    there is an index. The dedup keys are committed only if the load
+    succeeded; the loader is closed either way.
+    """
+    from utils.transform import transform_data
+    
+    result: Optional[str] = None
+    # Dedup returns a plain frame, so take the crawl's completeness first
+    complete = getattr(raw_data, "complete", False)
+    try:
+        if dedup is not None:
+            raw_data = await deduplicate(raw_data, dedup)
+            for line in dedup.report():
+                logger.info(line, extra={"rows": dedup.rows, "dropped": dedup.dropped})
+        
+        if index is not None:
+            result = await incremental_load(raw_data, index, loader, complete)
+            return result
         
         # Transform data
-        transformed_data: List[Dict[str, Any]] = await transform_data(raw_data)
-        print(f"Transformed data: {len(transformed_data)} rows")
+        with stage("transform"):
+            transformed_data: List[Dict[str, Any]] = await transform_data(raw_data)
+        logger.info(f"Transformed data: {len(transformed_data)} rows", extra={"rows": len(transformed_data)})
         
         # Load data
-        if output_format.lower() == 'csv':
-            result: str = await save_to_csv(transformed_data)
-            print(f"Pipeline completed at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-            return result
-        else:
-            print(f"Unsupported output format: {output_format}")
+        with stage("load"):
+            result = await loader.save(transformed_data)
+        logger.info(f"Pipeline completed at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        return result
+    finally:
+        # Releases the CSV encode pool or history store held since save()
+        await loader.close()
+        if dedup is not None and result:
+            dedup.commit()
+        elif dedup is not None:
+            dedup.rollback()
+
+async def deduplicate(raw_data: Any, dedup: Deduplicator) -> Any:
+    """Drop already seen products in a worker thread, timed as the dedupe stage."""
+    with stage("dedupe"):
+        return await asyncio.to_thread(dedup.filter, raw_data)
+
+async def sharded_pipeline(plan: CrawlPlan, queue_path: str, workers: int = 2,
+                           shard_pages: int = SHARD_PAGES, parser: str = 'html.parser',
+                           loader: Optional[Loader] = None,
+                           index: Optional[FingerprintIndex] = None,
+                           dedup: Optional[Deduplicator] = None) -> Optional[str]:
+    """
+    Multi-site pipeline: the plan's sites are split into page-range shards
+    in a SQLite work queue, crawled by `workers` local processes (and any
+    node that joins the same queue file), then merged in plan order and
+    transformed and loaded as one batch.
+    """
+    loader = loader or LOADERS['csv']()
+    queue = WorkQueue(queue_path)
+    try:
+        added = queue.add_plan(plan, shard_pages)
+        logger.info(f"Crawl plan: {len(plan.sites)} sites, {added} new shards in {queue_path}",
+                    extra={"sites": len(plan.sites), "shards": added, "queue": queue_path})
+        with stage("extract"):
+            progress = await asyncio.to_thread(run_workers, queue_path, workers, parser)
+        if progress["failed"]:
+            logger.error(f"{progress['failed']} shards failed; re-run with --queue {queue_path} to retry them")
             return None
-            
+        raw_data = queue.results()
+    finally:
+        queue.close()
+    logger.info(f"Merged {len(raw_data)} products from {len(plan.sites)} sites", extra={"products": len(raw_data)})
+    return await transform_and_load(raw_data, loader, index, dedup)
+
+async def incremental_load(raw_data: List[Dict[str, Any]], index: FingerprintIndex,
+                           loader: Loader, complete: bool = False) -> Optional[str]:
+    """
+    Transform and load only the products that changed since the last run,
+    then record them in the fingerprint index once the load succeeded.
+    Products missing from the crawl are deleted only when it was complete.
+    """
+    from utils.incremental import delta_frame
+    from utils.transform import transform_data
+    
+    if not complete:
+        logger.warning("Crawl did not reach the catalog end without failed pages; skipping deletes")
+    with stage("diff"):
+        delta = await asyncio.to_thread(index.diff, raw_data, complete)
+    counts = delta.counts()
+    logger.info(f"Changes since last run: {counts['insert']} inserts, {counts['update']} updates, "
+                f"{counts['delete']} deletes", extra=counts)
+    if not len(delta):
+        logger.info("No changes to load")
+        return index.path
+    
+    with stage("transform"):
+        transformed_data = await transform_data(delta.changed)
+    with stage("load"):
+        result: Optional[str] = await loader.save(delta_frame(transformed_data, delta))
+    if result:
+        await asyncio.to_thread(index.commit, delta)
+    logger.info(f"Pipeline completed at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    return result
+
+async def streaming_pipeline(base_url: str, max_pages: int = 50, output_format: str = 'csv',
+                             rate_limit: Optional[RateLimitPolicy] = None,
+                             parser: str = 'html.parser', parse_workers: int = 0,
+                             queue_size: int = 4, loader: Optional[Loader] = None,
+                             cache: Optional[ResponseCache] = None,
+                             checkpoint: Optional[CrawlCheckpoint] = None,
+                             retries: Optional[RetryScheduler] = None,
+                             sessions: Optional[SessionFactory] = None,
+                             executor: Optional[Executor] = None,
+                             dedup: Optional[Deduplicator] = None) -> Optional[str]:
+    """
+    Streaming data pipeline: each scraped page flows through a bounded queue
+    into incremental transform and append-mode load stages, so only a few
+    pages are held in memory and rows reach disk while scraping continues.
+    A Deduplicator drops products seen on earlier pages as they stream in.
+    """
+    from utils.transform import transform_data
+    
+    start_time = datetime.now()
+    logger.info(f"Starting streaming pipeline at {start_time.strftime('%Y-%m-%d %H:%M:%S')}")
+    
+    if loader is None:
+        if output_format.lower() not in LOADERS:
+            logger.error(f"Unsupported output format: {output_format}")
+            return None
+        loader = LOADERS[output_format.lower()]()
+    
+    filename = loader.default_filename()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+    rows_written = 0
+    
+    async def produce() -> None:
+        try:
+            with stage("extract"):
+                await scrape_product_async(base_url, max_pages, page_queue=queue, rate_limit=rate_limit,
+                                           parser=parser, parse_workers=parse_workers, cache=cache,
+                                           checkpoint=checkpoint, retries=retries, sessions=sessions,
+                                           executor=executor)
+        finally:
+            # Sentinel tells the consumer that no more pages are coming
+            await queue.put(None)
+    
+    async def consume() -> None:
+        nonlocal rows_written
+        while (page_products := await queue.get()) is not None:
+            if dedup is not None:
+                page_products = await deduplicate(page_products, dedup)
+            with stage("transform"):
+                transformed_data = await transform_data(page_products)
+            if transformed_data.empty:
+                continue
+            with stage("load"):
+                # The first chunk creates or truncates the file, so an earlier run's rows never stay in it
+                await loader.save(transformed_data, filename, append=rows_written > 0)
+            if rows_written == 0:
+                logger.info(f"First rows written after {(datetime.now() - start_time).total_seconds():.1f}s")
+            rows_written += len(transformed_data)
+    
+    try:
+        await asyncio.wait_for(asyncio.gather(produce(), consume()), timeout=300)
     except asyncio.TimeoutError:
-        print("Scraping timed out after 5 minutes")
-        return None
+        logger.error(f"Scraping timed out after 5 minutes ({rows_written} rows already saved)")
+        return filename if rows_written else None
     except Exception as e:
-        print(f"Error in pipeline: {str(e)}")
+        logger.error(f"Error in streaming pipeline: {str(e)}")
+        return None
+    finally:
+        # Parquet keeps its writer open across chunks
+        await loader.close()
+        if dedup is not None:
+            for line in dedup.report():
+                logger.info(line, extra={"rows": dedup.rows, "dropped": dedup.dropped})
+            # Rows already appended count as loaded
+            if rows_written:
+                dedup.commit()
+            else:
+                dedup.rollback()
+    
+    if not rows_written:
+        logger.warning("No data to save")
         return None
+    logger.info(f"Streamed {rows_written} rows to {filename}", extra={"rows": rows_written, "file": filename})
+    logger.info(f"Pipeline completed at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    return filename
 
 def parse_args():
     """Parse command line arguments with improved help text"""
@@ -65,31 +280,480 @@ def parse_args():
     )
     parser.add_argument(
         "--format",
-        choices=['csv', 'json'],
+        choices=list(LOADERS),
         default='csv',
-        help="Output format (default: csv)"
+        help="Output format; json writes newline-delimited JSON, history appends to an indexed SQLite store "
+             "(default: csv)"
+    )
+    parser.add_argument(
+        "--compression",
+        choices=sorted({*PARQUET_COMPRESSIONS, *CSV_COMPRESSIONS}),
+        default=None,
+        help="Compression codec: snappy or zstd for parquet (default: snappy), gzip or zstd for csv (default: none)"
+    )
+    parser.add_argument(
+        "--write-workers",
+        type=int,
+        default=0,
+        help="Encode and compress CSV blocks in N worker processes (default: 0, one thread)"
+    )
+    parser.add_argument(
+        "--database-url",
+        default=None,
+        help="SQLAlchemy URL for --format postgres (default: $DATABASE_URL)"
+    )
+    parser.add_argument(
+        "--table",
+        default='fashion_products',
+        help="Target table for --format postgres (default: fashion_products)"
+    )
+    parser.add_argument(
+        "--history",
+        metavar="PATH",
+        default=None,
+        help=f"SQLite history --format history appends each run to (default: {HISTORY_PATH}); "
+             f"query it with python -m utils.history"
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Transform and save each page as soon as it is scraped"
+    )
+    parser.add_argument(
+        "--rate-limit",
+        choices=sorted(POLICIES),
+        default='fixed',
+        help="Request pacing: fixed delays or adaptive AIMD concurrency (default: fixed)"
+    )
+    parser.add_argument(
+        "--http-client",
+        choices=sorted(SESSIONS),
+        default='aiohttp',
+        help="HTTP client; httpx negotiates HTTP/2 (default: aiohttp)"
+    )
+    parser.add_argument(
+        "--no-compression",
+        action="store_true",
+        help="Ask for uncompressed responses instead of gzip/brotli"
+    )
+    parser.add_argument(
+        "--max-retries",
+        type=int,
+        default=MAX_RETRIES,
+        help=f"Retries per failed page request (default: {MAX_RETRIES})"
+    )
+    parser.add_argument(
+        "--retry-budget",
+        type=int,
+        default=RETRY_BUDGET,
+        help=f"Retries allowed across the whole run before failing pages are dropped (default: {RETRY_BUDGET})"
+    )
+    parser.add_argument(
+        "--parser",
+        choices=list(PARSERS),
+        default='html.parser',
+        help="HTML parser backend; lxml parses only the product grid (default: html.parser)"
+    )
+    parser.add_argument(
+        "--parse-workers",
+        type=int,
+        default=0,
+        help="Parse pages in N worker processes (default: 0, parse in a thread)"
     )
-    return parser.parse_args()
+    parser.add_argument(
+        "--cache-dir",
+        default=None,
+        help="Cache fetched pages in this directory and revalidate them on re-crawls"
+    )
+    parser.add_argument(
+        "--cache-ttl",
+        type=float,
+        default=CACHE_TTL,
+        help=f"Seconds a cached page is used without revalidation (default: {CACHE_TTL})"
+    )
+    parser.add_argument(
+        "--cache-max-mb",
+        type=float,
+        default=CACHE_MAX_BYTES / 2**20,
+        help=f"Evict least recently used pages above this size (default: {CACHE_MAX_BYTES // 2**20})"
+    )
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="Only use pages from --cache-dir, never touch the network"
+    )
+    parser.add_argument(
+        "--incremental",
+        metavar="INDEX",
+        default=None,
+        help="Load only products changed since the last run, tracked in this fingerprint index file"
+    )
+    parser.add_argument(
+        "--dedup",
+        action="store_true",
+        help="Drop products whose business key was already seen in this run "
+             "(and in earlier runs with --dedup-store)"
+    )
+    parser.add_argument(
+        "--dedup-key",
+        metavar="FIELDS",
+        default=None,
+        help="Comma-separated raw fields forming the business key (default: Title,Price,Size,Gender)"
+    )
+    parser.add_argument(
+        "--dedup-store",
+        metavar="PATH",
+        default=None,
+        help="SQLite file of the keys of earlier runs; a run's keys are added once its load succeeded"
+    )
+    parser.add_argument(
+        "--dedup-memory",
+        type=int,
+        default=None,
+        help="Keys held in memory (8 bytes each) before a run's keys spill to disk (default: 1000000)"
+    )
+    parser.add_argument(
+        "--checkpoint-dir",
+        default=CHECKPOINT_DIR,
+        help=f"Record completed pages here so interrupted crawls can resume (default: {CHECKPOINT_DIR})"
+    )
+    parser.add_argument(
+        "--resume",
+        metavar="RUN_ID",
+        default=None,
+        help="Resume an interrupted run: completed pages are replayed, failed ones retried"
+    )
+    parser.add_argument(
+        "--every",
+        type=float,
+        metavar="SECONDS",
+        default=None,
+        help="Keep running and start the pipeline every SECONDS, keeping sessions and caches warm"
+    )
+    parser.add_argument(
+        "--cron",
+        metavar="EXPR",
+        default=None,
+        help="Keep running and start the pipeline on a cron schedule, e.g. '*/30 * * * *'"
+    )
+    parser.add_argument(
+        "--control-port",
+        type=int,
+        default=None,
+        help="With --every/--cron, serve GET /status, POST /run and GET /metrics on this local port"
+    )
+    parser.add_argument(
+        "--control-host",
+        default='127.0.0.1',
+        help="Interface for the control endpoint (default: 127.0.0.1)"
+    )
+    parser.add_argument(
+        "--log-format",
+        choices=['text', 'json'],
+        default='text',
+        help="Console output as plain messages or JSON lines with structured fields (default: text)"
+    )
+    parser.add_argument(
+        "--plan",
+        metavar="PLAN.json",
+        default=None,
+        help="Crawl the sites of a JSON crawl plan, sharded across worker processes"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=2,
+        help="Local worker processes for --plan/--join/--reprocess (default: 2)"
+    )
+    parser.add_argument(
+        "--shard-pages",
+        type=int,
+        default=SHARD_PAGES,
+        help=f"Pages per shard of a crawl plan (default: {SHARD_PAGES})"
+    )
+    parser.add_argument(
+        "--queue",
+        metavar="PATH",
+        default=None,
+        help="Work queue file for --plan; share it with other nodes, re-use it to resume "
+             "(default: a new file in --checkpoint-dir)"
+    )
+    parser.add_argument(
+        "--join",
+        metavar="QUEUE",
+        default=None,
+        help="Work the shards of another node's queue file, then exit without loading"
+    )
+    parser.add_argument(
+        "--reprocess",
+        metavar="DIR",
+        default=None,
+        help="Re-run the transform over the CSV exports in DIR in --workers processes "
+             "and write one consolidated CSV, then exit"
+    )
+    parser.add_argument(
+        "--exchange-rate",
+        type=float,
+        default=None,
+        help="IDR per USD for --reprocess (default: 16000)"
+    )
+    parser.add_argument(
+        "--source-rate",
+        type=float,
+        default=None,
+        help="Exchange rate already-transformed exports were written with, for --reprocess"
+    )
+    parser.add_argument(
+        "--output",
+        metavar="PATH",
+        default=None,
+        help="Consolidated --reprocess output (default: reprocessed_<timestamp>.csv)"
+    )
+    parser.add_argument(
+        "--metrics-out",
+        metavar="PATH",
+        default=None,
+        help="Write run metrics here: a Prometheus textfile for *.prom, else a JSON summary"
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="DIR",
+        default=None,
+        help="Profile CPU and memory per pipeline stage; writes <stage>.pstats, report.txt and profile.json here"
+    )
+    parser.add_argument(
+        "--profile-top",
+        type=int,
+        default=None,
+        help=f"Hot functions listed per stage in the --profile report (default: {TOP_FUNCTIONS})"
+    )
+    parser.add_argument(
+        "--profile-asyncio",
+        action="store_true",
+        help="With --profile, also record event-loop lag and log callbacks blocking it (runs asyncio in debug mode)"
+    )
+    args = parser.parse_args()
+    if args.offline and not args.cache_dir:
+        parser.error("--offline requires --cache-dir")
+    if args.incremental and args.stream:
+        parser.error("--incremental cannot be combined with --stream")
+    if args.history and args.format != 'history':
+        parser.error("--history applies to --format history")
+    if args.compression and args.format not in ('csv', 'parquet'):
+        parser.error("--compression applies to --format csv or parquet")
+    if args.format == 'csv' and args.compression not in (None, *CSV_COMPRESSIONS):
+        parser.error(f"CSV compression must be one of: {', '.join(CSV_COMPRESSIONS)}")
+    if args.format == 'parquet' and args.compression not in (None, *PARQUET_COMPRESSIONS):
+        parser.error(f"Parquet compression must be one of: {', '.join(PARQUET_COMPRESSIONS)}")
+    if args.every is not None and args.cron:
+        parser.error("--every and --cron are mutually exclusive")
+    if args.every is not None and args.every <= 0:
+        parser.error("--every must be a positive number of seconds")
+    if (args.every is not None or args.cron) and args.resume:
+        parser.error("--resume cannot be combined with --every/--cron")
+    if args.control_port and args.every is None and not args.cron:
+        parser.error("--control-port requires --every or --cron")
+    if args.cron:
+        try:
+            CronSchedule(args.cron)
+        except ValueError as e:
+            parser.error(str(e))
+    if (args.plan or args.join) and (args.stream or args.resume or args.every is not None or args.cron):
+        parser.error("--plan/--join cannot be combined with --stream, --resume or --every/--cron")
+    if args.plan and args.join:
+        parser.error("--plan and --join are mutually exclusive")
+    if args.queue and not args.plan:
+        parser.error("--queue requires --plan")
+    if args.workers < 1 or args.shard_pages < 1:
+        parser.error("--workers and --shard-pages must be at least 1")
+    if not args.dedup and (args.dedup_key or args.dedup_store or args.dedup_memory is not None):
+        parser.error("--dedup-key, --dedup-store and --dedup-memory require --dedup")
+    if args.dedup_key and not set(args.dedup_key.split(",")) <= set(PRODUCT_FIELDS):
+        parser.error(f"--dedup-key fields must be among: {','.join(PRODUCT_FIELDS)}")
+    if args.dedup_store and args.incremental:
+        # Products kept from earlier runs would be dropped before the diff and deleted as missing
+        parser.error("--dedup-store cannot be combined with --incremental")
+    if args.dedup_memory is not None and args.dedup_memory < 1:
+        parser.error("--dedup-memory must be at least 1")
+    if args.reprocess and (args.plan or args.join or args.stream or args.every is not None or args.cron):
+        parser.error("--reprocess cannot be combined with --plan, --join, --stream or --every/--cron")
+    if args.reprocess and args.format != 'csv':
+        parser.error("--reprocess writes CSV; use --compression to compress it")
+    if not args.reprocess and (args.exchange_rate or args.source_rate or args.output):
+        parser.error("--exchange-rate, --source-rate and --output require --reprocess")
+    if any(rate is not None and rate <= 0 for rate in (args.exchange_rate, args.source_rate)):
+        parser.error("Exchange rates must be positive")
+    if not args.profile and (args.profile_top is not None or args.profile_asyncio):
+        parser.error("--profile-top and --profile-asyncio require --profile")
+    if args.profile and (args.join or args.reprocess or args.every is not None or args.cron):
+        parser.error("--profile cannot be combined with --join, --reprocess or --every/--cron")
+    if args.profile_top is not None and args.profile_top < 1:
+        parser.error("--profile-top must be at least 1")
+    return args
 
-async def configure_aiohttp_session() -> aiohttp.ClientSession:
-    """Configure aiohttp session with SSL context"""
-    ssl_context = create_ssl_context()
-    connector = aiohttp.TCPConnector(ssl=ssl_context)
-    return aiohttp.ClientSession(connector=connector)
+async def run_once(run, sessions: SessionFactory, *args, **options) -> Optional[str]:
+    """Run one pipeline with the shared session and close it afterwards."""
+    try:
+        return await run(*args, sessions=sessions, **options)
+    finally:
+        await sessions.close()
+
+async def daemon(args: argparse.Namespace, run, schedule, rate_limit: RateLimitPolicy,
+                 sessions: SessionFactory, **options) -> int:
+    """
+    Run the pipeline on `schedule` in one long-lived event loop. The HTTP
+    session, parse process pool, rate-limit state, response cache and
+    fingerprint index stay warm between runs; each run gets its own
+    checkpoint and retry budget. SIGINT/SIGTERM stop the scheduler after
+    the current run finishes.
+    """
+    executor = ProcessPoolExecutor(max_workers=args.parse_workers) if args.parse_workers > 0 else None
+    
+    async def job() -> Optional[str]:
+        checkpoint = CrawlCheckpoint(new_run_id(), args.checkpoint_dir)
+        retries = RetryScheduler(max_retries=args.max_retries, budget=args.retry_budget)
+        result = None
+        try:
+            result = await run(BASE_URL, args.pages, args.format, rate_limit, args.parser, args.parse_workers,
+                               checkpoint=checkpoint, retries=retries, sessions=sessions,
+                               executor=executor, **options)
+        finally:
+            if result:
+                checkpoint.discard()
+            else:
+                checkpoint.close()
+            if args.metrics_out:
+                METRICS.write(args.metrics_out)
+        return result
+    
+    scheduler = PipelineScheduler(job, schedule)
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, scheduler.stop)
+    control = None
+    if args.control_port:
+        control = await start_control_server(scheduler, args.control_host, args.control_port)
+    try:
+        # Interval schedules start with a run, cron ones wait for their first match
+        await scheduler.run_forever(run_on_start=args.every is not None)
+    finally:
+        if control is not None:
+            await control.cleanup()
+        await sessions.close()
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+    return 0
+
+def reprocess_exports(args: argparse.Namespace) -> int:
+    """Run --reprocess: transform historical exports into one consolidated CSV."""
+    from utils.reprocess import reprocess
+    from utils.transform import EXCHANGE_RATE
+    
+    try:
+        reprocess(args.reprocess, args.output, args.workers, args.exchange_rate or EXCHANGE_RATE,
+                  args.source_rate, args.compression)
+        return 0
+    except ValueError as e:
+        logger.error(str(e))
+        return 1
+    finally:
+        if args.metrics_out:
+            METRICS.write(args.metrics_out)
+
+def profiled(args: argparse.Namespace, coro):
+    """Return coro, run under the stage profiler when --profile is given."""
+    if not args.profile:
+        return coro
+    return PROFILER.run(coro, args.profile, args.profile_top or TOP_FUNCTIONS, watch_loop=args.profile_asyncio)
 
 def main() -> int:
     args = parse_args()
-    BASE_URL = 'https://fashion-studio.dicoding.dev/page{}'
+    configure_logging(args.log_format)
+    if args.join:
+        progress = run_workers(args.join, args.workers, args.parser, wait=False)
+        return 1 if progress["failed"] else 0
+    if args.reprocess:
+        return reprocess_exports(args)
+    cache = None
+    index = None
+    dedup = None
+    checkpoint = None
     
     try:
-        result = asyncio.run(pipeline(BASE_URL, args.pages, args.format))
+        run = streaming_pipeline if args.stream else pipeline
+        rate_limit = POLICIES[args.rate_limit]()
+        loader_options = {}
+        if args.format == 'csv':
+            loader_options = {"compression": args.compression, "workers": args.write_workers}
+        elif args.format == 'parquet':
+            loader_options = {"compression": args.compression or 'snappy'}
+        elif args.format == 'postgres':
+            loader_options = {"url": args.database_url, "table": args.table}
+        elif args.format == 'history':
+            loader_options = {"path": args.history or HISTORY_PATH}
+        loader = LOADERS[args.format](**loader_options)
+        if args.cache_dir:
+            cache = ResponseCache(args.cache_dir, ttl=args.cache_ttl,
+                                  max_bytes=int(args.cache_max_mb * 2**20), offline=args.offline)
+        options = {"loader": loader, "cache": cache}
+        if args.incremental:
+            from utils.incremental import FingerprintIndex
+            index = options["index"] = FingerprintIndex(args.incremental)
+        if args.dedup:
+            from utils.dedup import DEDUP_KEY, MAX_MEMORY_KEYS, Deduplicator
+            dedup = options["dedup"] = Deduplicator(
+                args.dedup_key.split(",") if args.dedup_key else DEDUP_KEY, args.dedup_store,
+                args.dedup_memory or MAX_MEMORY_KEYS
+            )
+        if args.plan:
+            queue_path = args.queue
+            if queue_path is None:
+                os.makedirs(args.checkpoint_dir, exist_ok=True)
+                queue_path = os.path.join(args.checkpoint_dir, f"{new_run_id()}.queue.sqlite3")
+            result = asyncio.run(profiled(args, sharded_pipeline(CrawlPlan.from_file(args.plan), queue_path,
+                                                                 args.workers, args.shard_pages, args.parser,
+                                                                 loader, index, dedup)))
+            if result and args.queue is None:
+                os.remove(queue_path)
+            return 0 if result else 1
+        sessions = SESSIONS[args.http_client](limit=rate_limit.max_concurrent,
+                                              compression=not args.no_compression)
+        if args.every is not None or args.cron:
+            schedule = IntervalSchedule(args.every) if args.every is not None else CronSchedule(args.cron)
+            return asyncio.run(daemon(args, run, schedule, rate_limit, sessions, **options))
+        
+        if args.resume:
+            checkpoint = CrawlCheckpoint.resume(args.resume, args.checkpoint_dir)
+            logger.info(f"Resuming run {args.resume}: {len(checkpoint.pages)} pages already scraped")
+        else:
+            checkpoint = CrawlCheckpoint(new_run_id(), args.checkpoint_dir)
+        options["checkpoint"] = checkpoint
+        options["retries"] = RetryScheduler(max_retries=args.max_retries, budget=args.retry_budget)
+        result = asyncio.run(profiled(args, run_once(run, sessions, BASE_URL, args.pages, args.format, rate_limit,
+                                                     args.parser, args.parse_workers, **options)))
+        if result:
+            checkpoint.discard()
+            checkpoint = None
         return 0 if result else 1
     except KeyboardInterrupt:
-        print("\nScraping interrupted by user")
+        logger.warning("\nScraping interrupted by user")
         return 130
     except Exception as e:
-        print(f"Fatal error in main: {str(e)}", file=sys.stderr)
+        logger.error(f"Fatal error in main: {str(e)}")
         return 1
+    finally:
+        if cache is not None:
+            cache.close()
+        if index is not None:
+            index.close()
+        if dedup is not None:
+            dedup.close()
+        if checkpoint is not None:
+            checkpoint.close()
+            if checkpoint.pages:
+                logger.info(f"Resume with: --resume {checkpoint.run_id}", extra={"run_id": checkpoint.run_id})
+        if args.metrics_out and args.every is None and not args.cron:
+            logger.info(f"Metrics written to {METRICS.write(args.metrics_out)}")
 
 if __name__ == '__main__':
     sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,119 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import asyncio
+import threading
+import time
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from utils.cache import ResponseCache
+from utils.extract import HEADERS, fetch_content
+from utils.ratelimit import FixedDelayPolicy
+
+
+# --- Fixtures ---
+@pytest.fixture
+def cache(tmp_path):
+    cache = ResponseCache(str(tmp_path), ttl=60)
+    yield cache
+    cache.close()
+
+def mock_session(status, body="", headers=None):
+    """Return a session whose get() yields a single response."""
+    response = AsyncMock()
+    response.status = status
+    response.text.return_value = body
+    response.headers = headers or {}
+    context = AsyncMock()
+    context.__aenter__.return_value = response
+    session = MagicMock()
+    session.get.return_value = context
+    return session
+
+def no_delay():
+    return FixedDelayPolicy(min_delay=0, max_delay=0)
+
+# --- Tests ---
+def test_cache_round_trip(cache):
+    cache.put("http://test.com", "<html></html>", etag='"v1"', last_modified="Wed, 21 Oct 2015 07:28:00 GMT")
+    entry = cache.get("http://test.com")
+
+    assert entry.body == "<html></html>"
+    assert entry.conditional_headers() == {
+        "If-None-Match": '"v1"', "If-Modified-Since": "Wed, 21 Oct 2015 07:28:00 GMT"
+    }
+    assert cache.get("http://test.com/page2") is None
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = ResponseCache(str(tmp_path), max_bytes=25)
+    cache.put("http://test.com/page1", "a" * 10)
+    cache.put("http://test.com/page2", "b" * 10)
+    cache.hit(cache.get("http://test.com/page1"))
+    cache.put("http://test.com/page3", "c" * 10)
+
+    assert cache.get("http://test.com/page2") is None
+    assert cache.get("http://test.com/page1") is not None
+    assert cache.get("http://test.com/page3") is not None
+    cache.close()
+
+def test_cache_size_total_counts_replaced_entries(tmp_path):
+    cache = ResponseCache(str(tmp_path), max_bytes=25)
+    cache.put("http://test.com/page1", "a" * 10)
+    cache.put("http://test.com/page1", "a" * 20)
+    cache.put("http://test.com/page2", "b" * 5)
+    # Only the current body of page1 counts, so nothing is evicted
+    assert cache.get("http://test.com/page1") is not None
+    cache.close()
+    cache = ResponseCache(str(tmp_path), max_bytes=25)
+    cache.put("http://test.com/page3", "c" * 5)
+    assert cache.get("http://test.com/page1") is None
+    assert cache.get("http://test.com/page3") is not None
+    cache.close()
+
+@pytest.mark.asyncio
+async def test_fetch_content_stores_and_serves_fresh_pages(cache):
+    session = mock_session(200, "<html>v1</html>", {"ETag": '"v1"'})
+    first = await fetch_content(session, "http://test.com", AsyncMock(), policy=no_delay(), cache=cache)
+    second = await fetch_content(session, "http://test.com", AsyncMock(), policy=no_delay(), cache=cache)
+
+    assert first == second == "<html>v1</html>"
+    session.get.assert_called_once_with("http://test.com", headers=HEADERS)
+    assert cache.hits == 1
+
+@pytest.mark.asyncio
+async def test_fetch_content_revalidates_stale_pages(cache):
+    cache.put("http://test.com", "<html>v1</html>", etag='"v1"')
+    cache.ttl = 0
+    session = mock_session(304)
+
+    content = await fetch_content(session, "http://test.com", AsyncMock(), policy=no_delay(), cache=cache)
+
+    assert content == "<html>v1</html>"
+    assert session.get.call_args.kwargs["headers"]["If-None-Match"] == '"v1"'
+    assert cache.revalidated == 1
+
+@pytest.mark.asyncio
+async def test_fetch_content_offline(tmp_path):
+    seed = ResponseCache(str(tmp_path))
+    seed.put("http://test.com", "<html>v1</html>")
+    seed.close()
+    cache = ResponseCache(str(tmp_path), ttl=0, offline=True)
+    session = mock_session(200)
+
+    assert await fetch_content(session, "http://test.com", AsyncMock(), cache=cache) == "<html>v1</html>"
+    assert await fetch_content(session, "http://test.com/page2", AsyncMock(), cache=cache) is None
+    session.get.assert_not_called()
+    cache.close()
+
+@pytest.mark.asyncio
+async def test_cache_access_stays_off_the_event_loop(cache):
+    cache.put("http://test.com", "<html>v1</html>")
+    # A put committing in a worker thread holds the lock; the loop must keep running
+    cache._lock.acquire()
+    threading.Timer(0.5, cache._lock.release).start()
+    task = asyncio.create_task(fetch_content(mock_session(200), "http://test.com", AsyncMock(),
+                                             policy=no_delay(), cache=cache))
+    started = time.monotonic()
+    await asyncio.sleep(0.05)
+    assert time.monotonic() - started < 0.3
+    assert await task == "<html>v1</html>"
@@ -0,0 +1,49 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pytest
+from unittest.mock import AsyncMock, patch
+from utils.checkpoint import CrawlCheckpoint, new_run_id
+from utils.extract import scrape_pages_window
+
+
+# --- Tests ---
+def test_checkpoint_reload(tmp_path):
+    checkpoint = CrawlCheckpoint("run1", str(tmp_path))
+    checkpoint.record(1, [{"Title": "Product 1"}], True)
+    checkpoint.record(2, [], None)  # failed fetch
+    checkpoint.close()
+    with open(tmp_path / "run1.jsonl", "a") as f:
+        f.write('{"page": 3, "next_pa')  # crash mid-write
+
+    resumed = CrawlCheckpoint.resume("run1", str(tmp_path))
+    assert resumed.pages == {1: ([{"Title": "Product 1"}], True)}
+    resumed.discard()
+    assert not os.path.exists(tmp_path / "run1.jsonl")
+
+def test_run_ids_differ_within_a_second():
+    assert len({new_run_id() for _ in range(20)}) == 20
+
+def test_resume_unknown_run(tmp_path):
+    with pytest.raises(ValueError):
+        CrawlCheckpoint.resume("missing", str(tmp_path))
+
+@pytest.mark.asyncio
+@patch("utils.extract.process_page", new_callable=AsyncMock)
+async def test_scrape_pages_window_resumes_from_checkpoint(mock_process_page, tmp_path):
+    async def fake_page(session, url, semaphore, page_num, *args):
+        return [{"Title": f"Product {page_num}"}], page_num < 4
+    mock_process_page.side_effect = fake_page
+
+    checkpoint = CrawlCheckpoint("run1", str(tmp_path))
+    checkpoint.record(1, [{"Title": "Product 1"}], True)
+    checkpoint.record(3, [{"Title": "Product 3"}], True)
+
+    products, last_page = await scrape_pages_window(
+        None, "http://test.com/page{}", None, 50, window=2, checkpoint=checkpoint
+    )
+    assert last_page == 4
+    assert [p["Title"] for p in products] == ["Product 1", "Product 2", "Product 3", "Product 4"]
+    assert sorted(call.args[3] for call in mock_process_page.await_args_list) == [2, 4]
+    assert set(checkpoint.pages) == {1, 2, 3, 4}
+    checkpoint.close()
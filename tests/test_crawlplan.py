@@ -0,0 +1,166 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+import asyncio
+import json
+import pytest
+from fixture_server import serve
+from utils.crawlplan import CrawlPlan, Shard, Site, WorkQueue, run_workers, work
+from utils.dedup import Deduplicator
+from utils.incremental import FingerprintIndex
+
+
+# --- Fixtures ---
+def make_plan(first_url, second_url):
+    # The second site has fewer pages than the plan allows for
+    return CrawlPlan([
+        Site("first", first_url, max_pages=5, concurrency=2, min_delay=0, max_delay=0),
+        Site("second", second_url, max_pages=8, rate_limit="adaptive", concurrency=2),
+    ])
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = WorkQueue(str(tmp_path / "queue.sqlite3"))
+    yield queue
+    queue.close()
+
+
+# --- Tests ---
+def test_plan_from_file(tmp_path):
+    path = tmp_path / "plan.json"
+    path.write_text(json.dumps({"sites": [{"name": "a", "base_url": "http://a/page{}", "max_pages": 25}]}))
+    plan = CrawlPlan.from_file(str(path))
+    assert list(plan.shards(10)) == [("a", 1, 10), ("a", 11, 20), ("a", 21, 25)]
+    path.write_text(json.dumps({"sites": [{"name": "a", "base_url": "http://a/"}]}))
+    with pytest.raises(ValueError):
+        CrawlPlan.from_file(str(path))
+
+def test_site_policy_splits_concurrency():
+    site = Site("a", "http://a/page{}", concurrency=4)
+    assert site.share(workers=2) == 2
+    assert site.share(workers=8) == 1
+    assert site.policy(slots=2).max_concurrent == 2
+    with pytest.raises(ValueError):
+        Site("a", "http://a/page{}", concurrency=0)
+
+def test_queue_caps_lease_slots_at_site_concurrency(queue):
+    queue.add_plan(CrawlPlan([Site("a", "http://a/page{}", max_pages=10, concurrency=4)]), 1)
+    # Two nodes of two workers each: 2 slots per lease, so only two leases fit
+    leases = [queue.claim(f"node{n}/{i}", workers=2) for n in (1, 2) for i in (0, 1)]
+    assert [lease.slots if lease else None for lease in leases] == [2, 2, None, None]
+    queue.fail(leases[0])
+    # A worker asking for more than is free gets what is left
+    assert queue.claim("node3/0", workers=1).slots == 2
+    assert queue.claim("node3/1", workers=8) is None
+
+def test_queue_caps_leases_at_site_concurrency(queue):
+    queue.add_plan(CrawlPlan([Site("a", "http://a/page{}", max_pages=4, concurrency=1),
+                              Site("b", "http://b/page{}", max_pages=2, concurrency=1)]), 2)
+    first = queue.claim("w1")
+    # A second worker gets the other site instead of a second lease on "a"
+    assert queue.claim("w2").site == "b"
+    assert queue.claim("w3") is None
+    queue.fail(first)
+    assert queue.claim("w3").site == "a"
+
+def test_queue_skips_shards_past_the_end(queue):
+    plan = CrawlPlan([Site("a", "http://a/page{}", max_pages=30)])
+    assert queue.add_plan(plan, 10) == 3
+    # Re-adding a known site keeps its progress
+    assert queue.add_plan(plan, 10) == 0
+    first = queue.claim("w1", workers=2)
+    second = queue.claim("w2", workers=2)
+    assert (first.first_page, second.first_page) == (1, 11)
+    for page in range(1, 11):
+        queue.record_page("a", page, [{"Title": f"T{page}"}], True)
+    assert queue.finish(first)
+    queue.record_page("a", 11, [{"Title": "T11"}], False)
+    assert queue.finish(second)
+    assert queue.claim("w1") is None
+    assert queue.progress() == {"pending": 0, "running": 0, "done": 2, "skipped": 1, "failed": 0}
+    assert [p["Title"] for p in queue.results()] == [f"T{page}" for page in range(1, 12)]
+
+def test_queue_retries_incomplete_shards(queue):
+    queue.add_plan(CrawlPlan([Site("a", "http://a/page{}", max_pages=2)]), 2)
+    for attempt in range(3):
+        shard = queue.claim("w1")
+        assert shard is not None
+        assert not queue.finish(shard)
+    assert queue.claim("w1") is None
+    assert queue.progress()["failed"] == 1
+
+def test_queue_takes_over_expired_leases(queue):
+    queue.add_plan(CrawlPlan([Site("a", "http://a/page{}", max_pages=1)]), 1)
+    assert isinstance(queue.claim("w1"), Shard)
+    assert queue.claim("w2") is None
+    assert queue.claim("w2", lease=0).first_page == 1
+
+def test_results_keep_sites_apart(queue, tmp_path):
+    product = {"Title": "T-shirt 1", "Price": "$10.00", "Rating": "4.5", "Colors": "3 Colors",
+               "Size": "Size: M", "Gender": "Gender: Men", "Scraped_At": "2025-05-01 10:00:00"}
+    queue.add_plan(CrawlPlan([Site("a", "http://a/page{}", max_pages=1),
+                              Site("b", "http://b/page{}", max_pages=1)]), 1)
+    for site in ("a", "b"):
+        shard = queue.claim("w1")
+        queue.record_page(site, 1, [product], False)
+        assert queue.finish(shard)
+    results = queue.results()
+    assert list(results.to_frame()["Site"]) == ["a", "b"]
+    # The same product on two sites is two products, not a duplicate
+    assert len(Deduplicator().filter(results)) == 2
+    index = FingerprintIndex(str(tmp_path / "index.sqlite3"))
+    try:
+        delta = index.diff(results, complete=True)
+        assert len(delta.changed) == 2
+        index.commit(delta)
+        assert len(index.diff(results, complete=True).changed) == 0
+    finally:
+        index.close()
+
+def test_deduplicated_sites_diff_unchanged(queue, tmp_path):
+    product = {"Title": "T-shirt 1", "Price": "$10.00", "Rating": "4.5", "Colors": "3 Colors",
+               "Size": "Size: M", "Gender": "Gender: Men", "Scraped_At": "2025-05-01 10:00:00"}
+    queue.add_plan(CrawlPlan([Site("a", "http://a/page{}", max_pages=1),
+                              Site("b", "http://b/page{}", max_pages=1)]), 1)
+    for site in ("a", "b"):
+        shard = queue.claim("w1")
+        queue.record_page(site, 1, [product], False)
+        assert queue.finish(shard)
+    index = FingerprintIndex(str(tmp_path / "index.sqlite3"))
+    try:
+        # Dedup hands diff a frame whose Site column must survive
+        first = index.diff(Deduplicator().filter(queue.results()), complete=True)
+        assert list(first.changed["Site"]) == ["a", "b"]
+        index.commit(first)
+        for products in (queue.results(), Deduplicator().filter(queue.results())):
+            assert index.diff(products, complete=True).counts() == {"insert": 0, "update": 0, "delete": 0}
+    finally:
+        index.close()
+
+@pytest.mark.asyncio
+async def test_work_merges_sites_in_plan_order(queue):
+    async with serve(pages=5, cards=3) as (first_url, _), serve(pages=3, cards=2) as (second_url, app):
+        queue.add_plan(make_plan(first_url, second_url), 2)
+        completed = await asyncio.wait_for(work(queue.path, "w1"), timeout=30)
+    progress = queue.progress()
+    assert progress["failed"] == progress["pending"] == 0
+    assert completed == progress["done"] == 5
+    # The second site ends at page 3, so its shards 5-6 and 7-8 are never fetched
+    assert progress["skipped"] == 2
+    assert app["stats"]["requests"] <= 4
+    assert len(queue.results()) == 5 * 3 + 3 * 2
+
+def test_local_workers(tmp_path):
+    async def crawl():
+        async with serve(pages=5, cards=3) as (first_url, _), serve(pages=3, cards=2) as (second_url, _):
+            queue.add_plan(make_plan(first_url, second_url), 2)
+            return await asyncio.to_thread(run_workers, queue.path, 2)
+
+    queue = WorkQueue(str(tmp_path / "queue.sqlite3"))
+    try:
+        progress = asyncio.run(asyncio.wait_for(crawl(), timeout=60))
+        assert progress["done"] == 5 and progress["failed"] == 0
+        assert len(queue.results()) == 21
+    finally:
+        queue.close()
@@ -0,0 +1,79 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import numpy as np
+import pytest
+import main
+from utils.dedup import Deduplicator, HashSet
+from utils.extract import ProductColumns
+
+
+# --- Fixtures ---
+def product(title, price="$10.00", size="Size: M", scraped_at="2025-05-01 10:00:00", rating="Rating: 4.5"):
+    return {"Title": title, "Price": price, "Rating": rating, "Colors": "3 Colors",
+            "Size": size, "Gender": "Gender: Men", "Scraped_At": scraped_at}
+
+@pytest.fixture
+def pages():
+    # The same product on two pages, scraped a second apart with a new rating
+    return [
+        [product("A"), product("B"), product("A")],
+        [product("A", scraped_at="2025-05-01 10:00:01", rating="Rating: 4.0"), product("A", size="Size: L")],
+    ]
+
+
+# --- Tests ---
+def test_hash_set():
+    hashes = HashSet()
+    for batch in np.array_split(np.arange(1000, dtype=np.uint64) * 7919, 13):
+        hashes.add(batch)
+    assert len(hashes) == 1000
+    assert hashes.contains(np.array([0, 7919, 7918, 2**63], dtype=np.uint64)).tolist() == [True, True, False, False]
+
+def test_filter_across_pages(pages):
+    dedup = Deduplicator()
+    first = dedup.filter(pages[0])
+    second = dedup.filter(pages[1])
+    assert first["Title"].tolist() == ["A", "B"]
+    assert second["Size"].tolist() == ["Size: L"]
+    assert (dedup.rows, dedup.dropped) == (5, 2)
+    assert "2 of 5 rows dropped" in dedup.report()[0]
+
+def test_filter_custom_key(pages):
+    dedup = Deduplicator(key=("Title",))
+    assert len(dedup.filter(pages[0] + pages[1])) == 2
+    with pytest.raises(ValueError):
+        Deduplicator(key=("Scraped_At",))
+
+def test_spill_to_disk_matches_memory():
+    columns = ProductColumns()
+    columns.extend([product(f"T{i % 50}", size=f"Size: {i % 3}") for i in range(400)])
+    in_memory = Deduplicator().filter(columns)
+    dedup = Deduplicator(max_memory_keys=10)
+    spilled = [dedup.filter(batch) for batch in (list(columns)[i:i + 40] for i in range(0, 400, 40))]
+    assert sum(len(frame) for frame in spilled) == len(in_memory) == 150
+    assert dedup.spilled > 0 and len(dedup.memory) <= 10
+    dedup.close()
+
+def test_store_dedups_across_runs(pages, tmp_path):
+    path = str(tmp_path / "dedup.sqlite3")
+    dedup = Deduplicator(path=path)
+    assert len(dedup.filter(pages[0])) == 2
+    # A failed run's keys are forgotten
+    dedup.rollback()
+    assert len(dedup.filter(pages[0])) == 2
+    dedup.commit()
+    dedup.close()
+
+    dedup = Deduplicator(path=path)
+    assert dedup.filter(pages[1])["Size"].tolist() == ["Size: L"]
+    dedup.close()
+
+def test_store_rejected_with_incremental(monkeypatch, capsys):
+    monkeypatch.setattr(sys, "argv", ["main.py", "--dedup", "--dedup-store", "keys.sqlite3",
+                                      "--incremental", "fingerprints.sqlite3"])
+    with pytest.raises(SystemExit):
+        main.parse_args()
+    assert "--dedup-store cannot be combined with --incremental" in capsys.readouterr().err
+    monkeypatch.setattr(sys, "argv", ["main.py", "--dedup", "--incremental", "fingerprints.sqlite3"])
+    assert main.parse_args().incremental == "fingerprints.sqlite3"
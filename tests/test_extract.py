@@ -1,12 +1,20 @@
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
 import pytest
 from unittest.mock import AsyncMock, patch, MagicMock
 from datetime import datetime
 from bs4 import BeautifulSoup
 import pandas as pd
-from utils.extract import fetch_content, extract_product_data, scrape_product_async
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from utils.extract import (
+    fetch_content, extract_product_data, parse_page, process_page, scrape_pages_window,
+    scrape_product_async, page_url, ProductColumns, product_from_row
+)
+from utils.ratelimit import FixedDelayPolicy
+from fixture_server import serve
 
 
 # --- Test Constants ---
@@ -78,6 +86,32 @@ async def test_fetch_content_success():
     mock_semaphore.__aenter__.assert_awaited_once()
     mock_semaphore.__aexit__.assert_awaited_once()
 
+PAGE_HTML = """
+<html>
+  <nav>
+    <ul class="pagination">
+      <li class="page-item"><a href="/">1</a></li>
+      <li class="page-item next"><a href="/page2">Next</a></li>
+    </ul>
+  </nav>
+  <div class="collection-grid" id="collectionList">
+    <div class="collection-card">
+      <h3 class="product-title">Test Product</h3>
+      <span class="price">$10.99</span>
+      <p style="font-size: 14px; color: #777;">Rating: 4.5</p>
+      <p style="font-size: 14px; color: #777;">3 Colors</p>
+      <p style="font-size: 14px; color: #777;">Size: M</p>
+      <p style="font-size: 14px; color: #777;">Gender: Men</p>
+    </div>
+    <div class="collection-card">
+      <h3 class="product-title">Unknown Product</h3>
+      <p class="price">Price Unavailable</p>
+      <p style="font-size: 14px; color: #777;">Rating: Not Rated</p>
+    </div>
+  </div>
+</html>
+"""
+
 def test_extract_product_data(mock_product_card):
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     product = extract_product_data(mock_product_card, timestamp)
@@ -87,11 +121,111 @@ def test_extract_product_data(mock_product_card):
     assert product["Rating"] == "Rating: 4.5"
     assert product["Colors"] == "3 Colors"
 
+def test_parse_page_matches_extract_product_data(mock_product_card):
+    products, grid_found, next_page_exists = parse_page(PAGE_HTML, "2023-01-01 00:00:00")
+    assert grid_found and next_page_exists
+    assert products[0] == extract_product_data(mock_product_card, "2023-01-01 00:00:00")
+    assert products[1]["Price"] == "Price Unavailable"
+    assert products[1]["Colors"] == "N/A"
+
+def test_parse_page_lxml_backend_is_identical():
+    pytest.importorskip("lxml")
+    for html in (SAMPLE_HTML, PAGE_HTML):
+        expected = parse_page(html, "2023-01-01 00:00:00", "html.parser")
+        assert parse_page(html, "2023-01-01 00:00:00", "lxml") == expected
+
+def test_parse_page_without_grid():
+    assert parse_page("<html><p>Maintenance</p></html>", "2023-01-01 00:00:00") == ([], False, False)
+
 @pytest.mark.asyncio
-@patch("utils.extract.scrape_pages_batch", new_callable=AsyncMock)
-async def test_scrape_product_async(mock_scrape_batch):
-    mock_scrape_batch.return_value = [{"Title": "Test Product"}]
+@patch("utils.extract.scrape_pages_window", new_callable=AsyncMock)
+async def test_scrape_product_async(mock_scrape_window):
+    mock_scrape_window.return_value = ([{"Title": "Test Product"}], 1)
     
     products = await scrape_product_async("http://test.com/page{}", max_pages=1)
     assert len(products) == 1
-    assert products[0]["Title"] == "Test Product"
\ No newline at end of file
+    assert products[0]["Title"] == "Test Product"
+
+@pytest.mark.asyncio
+@patch("utils.extract.process_page", new_callable=AsyncMock)
+async def test_scrape_pages_window_stops_at_last_page(mock_process_page):
+    async def fake_page(session, url, semaphore, page_num, *args):
+        await asyncio.sleep(0.01 * page_num)
+        if page_num <= 3:
+            return [{"Title": f"Product {page_num}"}], page_num < 3
+        return [], False
+    mock_process_page.side_effect = fake_page
+    
+    products, last_page = await scrape_pages_window(None, "http://test.com/page{}", None, 50, window=2)
+    assert last_page == 3
+    assert [p["Title"] for p in products] == ["Product 1", "Product 2", "Product 3"]
+    assert mock_process_page.await_count <= 5
+
+@pytest.mark.asyncio
+@patch("utils.extract.process_page", new_callable=AsyncMock)
+async def test_scrape_pages_window_publishes_in_page_order(mock_process_page):
+    async def fake_page(session, url, semaphore, page_num, *args):
+        # Later pages finish first
+        await asyncio.sleep(0.01 * (4 - page_num))
+        return [{"Title": f"Product {page_num}"}], page_num < 3
+    mock_process_page.side_effect = fake_page
+    queue = asyncio.Queue()
+    
+    total, last_page = await scrape_pages_window(
+        None, "http://test.com/page{}", None, 3, window=3, page_queue=queue
+    )
+    assert (total, last_page) == (3, 3)
+    published = [queue.get_nowait()[0]["Title"] for _ in range(queue.qsize())]
+    assert published == ["Product 1", "Product 2", "Product 3"]
+
+@pytest.mark.asyncio
+@patch("utils.extract.fetch_content", new_callable=AsyncMock)
+async def test_process_page_in_process_pool(mock_fetch):
+    mock_fetch.return_value = PAGE_HTML
+    
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        products, next_page_exists = await process_page(
+            None, "http://test.com", None, 1, 1, executor=executor
+        )
+    assert next_page_exists is True
+    assert [p["Title"] for p in products] == ["Test Product", "Unknown Product"]
+    assert list(products[0]) == ["Title", "Price", "Rating", "Colors", "Size", "Gender", "Scraped_At"]
+
+def test_product_columns_match_product_dicts():
+    pages = [
+        ([("A", "$1", "Rating: 4", "3 Colors", "Size: M", "Gender: Men"),
+          ("B", "$2", "Rating: 5", "1 Colors", "Size: L", "Gender: Women")], "2023-01-01 00:00:00"),
+        ([("C", "$3", "Rating: 4", "3 Colors", "Size: " + "M", "Gender: Men")], "2023-01-01 00:00:05"),
+    ]
+    expected = [product_from_row(row, timestamp) for rows, timestamp in pages for row in rows]
+    products = ProductColumns()
+    for rows, timestamp in pages:
+        products.extend(ProductColumns.from_rows(rows, timestamp))
+    assert len(products) == 3
+    assert list(products) == expected
+    assert products[-1] == expected[-1]
+    assert products.timestamps == ["2023-01-01 00:00:00", "2023-01-01 00:00:05"]
+    # Repeated labels share one string object
+    assert products.columns[4][0] is products.columns[4][2]
+    pd.testing.assert_frame_equal(products.to_frame(), pd.DataFrame(expected))
+
+def test_product_columns_extend_from_dicts():
+    products = ProductColumns()
+    products.extend([{"Title": "A", "Scraped_At": "t1"}, {"Title": "B", "Scraped_At": "t1"}])
+    assert products.counts == [2]
+    assert products[1] == {"Title": "B", "Price": None, "Rating": None, "Colors": None,
+                           "Size": None, "Gender": None, "Scraped_At": "t1"}
+
+def test_page_url_first_page_is_site_root():
+    assert page_url("http://127.0.0.1:8080/page{}", 1) == "http://127.0.0.1:8080/"
+    assert page_url("http://127.0.0.1:8080/page{}", 2) == "http://127.0.0.1:8080/page2"
+
+@pytest.mark.asyncio
+async def test_scrape_fixture_site_end_to_end():
+    async with serve(pages=3, cards=5) as (base_url, app):
+        policy = FixedDelayPolicy(2, min_delay=0, max_delay=0)
+        products = await scrape_product_async(base_url, 5, rate_limit=policy)
+    assert len(products) == 15
+    # At most a window of speculative requests past the last page; 404s fail
+    # fast, so the window can refill before page 3 reports the end
+    assert app["stats"]["requests"] <= 3 + policy.max_concurrent
@@ -0,0 +1,133 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+import asyncio
+from datetime import datetime
+import pandas as pd
+import pytest
+from bench_transform import synthetic_products
+from utils.history import HistoryStore, main, parse_time
+from utils.load import HistoryLoader
+from utils.transform import _transform_data_sync, apply_schema
+
+
+# --- Fixtures ---
+def run(day, prices, genders=("Men", "Women", "Unisex")):
+    """One run's transformed frame: three products scraped on day."""
+    return apply_schema(pd.DataFrame({
+        "Title": ["T-shirt 1", "Pants 2", "Jacket 3"],
+        "Price": prices,
+        "Rating": [4.5, None, 3.9],
+        "Colors": [3, 5, None],
+        "Size": ["M", "L", "S"],
+        "Gender": list(genders),
+        "Scraped_At": [f"{day} 10:00:00"] * 3,
+    }))
+
+@pytest.fixture
+def store(tmp_path):
+    store = HistoryStore(str(tmp_path / "history.sqlite3"))
+    store.append(run("2025-05-01", [400000.0, 600000.0, 900000.0]))
+    store.append(run("2025-05-03", [450000.0, 480000.0, 900000.0]))
+    store.append(run("2025-05-08", [420000.0, 520000.0, 800000.0]))
+    yield store
+    store.close()
+
+
+# --- Tests ---
+def test_parse_time():
+    now = datetime(2025, 5, 8, 12, 0, 0)
+    assert parse_time("2025-05-01") == "2025-05-01"
+    assert parse_time("2025-05-01T08:30:00") == "2025-05-01 08:30:00"
+    assert parse_time("7d", now) == "2025-05-01 12:00:00"
+    with pytest.raises(ValueError):
+        parse_time("last week")
+
+def test_price_history(store):
+    history = store.price_history("Pants 2")
+    assert [row["Price"] for row in history] == [600000.0, 480000.0, 520000.0]
+    assert history[0] == {"Scraped_At": "2025-05-01 10:00:00", "Price": 600000.0, "Size": "L", "Gender": "Women"}
+    assert store.price_history("Pants 2", size="M") == []
+
+def test_query_filters(store):
+    rows = store.query(gender="Women", max_price=500000, since="2025-05-02", until="2025-05-08")
+    assert [(row["Title"], row["Scraped_At"][:10]) for row in rows] == [("Pants 2", "2025-05-03")]
+    assert store.query(title="T-shirt 1", since="2025-05-03 10:00:00")[0]["Price"] == 450000.0
+    assert len(store.query(title_like="a", limit=2)) == 2
+    # Missing values round-trip as NULL, float32 ratings as written
+    assert store.query(title="Pants 2")[0]["Rating"] is None
+    assert store.query(title="Jacket 3")[0]["Rating"] == 3.9
+
+def test_latest_and_days(store):
+    latest = store.query(latest=True)
+    assert [(row["Title"], row["Price"]) for row in latest] == [
+        ("Jacket 3", 800000.0), ("Pants 2", 520000.0), ("T-shirt 1", 420000.0)
+    ]
+    assert store.days() == [{"Scraped_On": day, "rows": 3} for day in ("2025-05-01", "2025-05-03", "2025-05-08")]
+    frame = store.to_frame(latest)
+    assert frame["Scraped_At"].dtype == "datetime64[ns]" and frame["Gender"].dtype == "category"
+
+def test_queries_use_indexes(store):
+    assert any("products_title" in step for step in store.explain(title="Pants 2"))
+    assert any("products_day" in step for step in store.explain(since="2025-05-03", until="2025-05-03"))
+    assert not any(step.startswith("SCAN products") for step in store.explain(gender="Women", max_price=500000))
+
+def test_loader_appends_runs(tmp_path):
+    path = str(tmp_path / "history.sqlite3")
+    loader = HistoryLoader(path)
+    frame = run("2025-05-01", [1.0, 2.0, 3.0]).assign(Change=["insert", "update", "delete"])
+    assert asyncio.run(loader.save(frame)) == path
+    opened = loader._store
+    asyncio.run(loader.save(run("2025-05-02", [1.0, 2.0, 3.0]), append=True))
+    # One store serves every save until the loader is closed
+    assert loader._store is opened
+    asyncio.run(loader.close())
+    assert loader._store is None
+    store = HistoryStore(path)
+    assert [day["rows"] for day in store.days()] == [2, 3]
+    store.close()
+
+def test_import_exports(tmp_path, capsys):
+    raw = pd.DataFrame(synthetic_products(60))
+    raw[:30].to_csv(tmp_path / "fashion_products_20250101_000000.csv", index=False)
+    _transform_data_sync(raw[30:].to_dict("records")).to_csv(
+        tmp_path / "fashion_products_20250102_000000.csv", index=False
+    )
+    path = str(tmp_path / "history.sqlite3")
+    assert main(["--db", path, "import", str(tmp_path)]) == 0
+    assert main(["--db", path, "import", str(tmp_path)]) == 0
+    expected = len(_transform_data_sync(raw.to_dict("records")))
+    store = HistoryStore(path)
+    assert sum(day["rows"] for day in store.days()) == expected
+    store.close()
+
+    capsys.readouterr()
+    assert main(["--db", path, "--output", "csv", "query", "--limit", "3"]) == 0
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0] == "Title,Price,Rating,Colors,Size,Gender,Scraped_At,Site" and len(lines) == 4
+
+def test_interrupted_import_adds_nothing(tmp_path, monkeypatch):
+    import utils.reprocess
+    pd.DataFrame(synthetic_products(60)).to_csv(tmp_path / "fashion_products_20250101_000000.csv", index=False)
+    transform_export = utils.reprocess.transform_export
+    calls = []
+
+    def failing_transform(chunk, *args, **kwargs):
+        calls.append(len(chunk))
+        if len(calls) == 2:
+            raise OSError("disk full")
+        return transform_export(chunk, *args, **kwargs)
+
+    monkeypatch.setattr(utils.reprocess, "CHUNK_ROWS", 20)
+    monkeypatch.setattr(utils.reprocess, "transform_export", failing_transform)
+    store = HistoryStore(str(tmp_path / "history.sqlite3"))
+    try:
+        with pytest.raises(OSError):
+            store.import_exports(str(tmp_path))
+        # The first chunk rolled back with the failed one, so a retry imports the file once
+        assert store.days() == []
+        monkeypatch.setattr(utils.reprocess, "transform_export", transform_export)
+        assert store.import_exports(str(tmp_path)) == sum(day["rows"] for day in store.days()) > 0
+    finally:
+        store.close()
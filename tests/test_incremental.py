@@ -0,0 +1,107 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import asyncio
+from unittest.mock import patch
+import pytest
+import pandas as pd
+from sqlalchemy import create_engine
+from utils.extract import PRODUCT_FIELDS, ProductColumns, scrape_pages_window
+from utils.incremental import FingerprintIndex, delta_frame
+from utils.load import save_to_postgres
+from utils.transform import _transform_data_sync
+
+
+def product(title, price="$10.00", scraped_at="2025-05-01 10:00:00"):
+    return {
+        "Title": title,
+        "Price": price,
+        "Rating": "Rating: ⭐ 4.5 / 5",
+        "Colors": "3 Colors",
+        "Size": "Size: M",
+        "Gender": "Gender: Men",
+        "Scraped_At": scraped_at,
+    }
+
+def crawl(pages, failing=()):
+    """Crawl a fake catalog of `pages` pages with one product each; failing pages cannot be fetched."""
+    async def fake_process_page(session, url, semaphore, page_num, *args):
+        if page_num in failing:
+            return ProductColumns(), None
+        row = tuple(product(f"Product {page_num}")[field] for field in PRODUCT_FIELDS)
+        return ProductColumns.from_rows([row], "2025-05-01 10:00:00"), page_num < pages
+
+    with patch("utils.extract.process_page", fake_process_page):
+        products, _ = asyncio.run(scrape_pages_window(None, "http://catalog/page{}", None, 10, window=2))
+    return products
+
+# --- Fixtures ---
+@pytest.fixture
+def index(tmp_path):
+    index = FingerprintIndex(str(tmp_path / "state/fingerprints.sqlite3"))
+    yield index
+    index.close()
+
+# --- Tests ---
+def test_first_run_inserts_everything(index):
+    delta = index.diff([product("Product 1"), product("Product 2")])
+
+    assert delta.counts() == {"insert": 2, "update": 0, "delete": 0}
+    assert delta.changed["Change"].tolist() == ["insert", "insert"]
+    index.commit(delta)
+    assert len(index) == 2
+
+def test_unchanged_products_are_skipped(index):
+    index.commit(index.diff([product("Product 1"), product("Product 2")]))
+
+    delta = index.diff([product("Product 1", scraped_at="2025-05-02 10:00:00"), product("Product 2")])
+    assert len(delta) == 0
+
+def test_updates_and_deletes(index):
+    index.commit(index.diff([product("Product 1"), product("Product 2"), product("Product 3")]))
+
+    delta = index.diff([product("Product 1", price="$12.00"), product("Product 2"), product("Product 4")],
+                       complete=True)
+    assert delta.counts() == {"insert": 1, "update": 1, "delete": 1}
+    assert delta.changed.set_index("Title")["Change"].to_dict() == {"Product 1": "update", "Product 4": "insert"}
+    assert delta.deleted["Title"].tolist() == ["Product 3"]
+
+    index.commit(delta)
+    assert len(index) == 3
+    assert len(index.diff([product("Product 1", price="$12.00"), product("Product 2"), product("Product 4")])) == 0
+
+def test_delta_frame(index):
+    index.commit(index.diff([product("Product 1"), product("Product 2"), product("Product 3")]))
+    delta = index.diff([product("Product 1", price="$12.00"), product("Product 2", price="Price Unavailable")],
+                       complete=True)
+
+    frame = delta_frame(_transform_data_sync(delta.changed), delta)
+    changes = frame.set_index("Title")["Change"].astype(str).to_dict()
+    # Product 2 is now invalid, so it is deleted like the vanished Product 3
+    assert changes == {"Product 1": "update", "Product 2": "delete", "Product 3": "delete"}
+    assert frame.loc[frame["Title"] == "Product 1", "Price"].item() == 12.0 * 16000
+    assert set(frame["Size"].astype(str)) == {"M"}
+
+@pytest.mark.asyncio
+async def test_delta_upserts_and_deletes_rows(index, tmp_path):
+    url = f"sqlite:///{tmp_path / 'products.db'}"
+    for run in ([product("Product 1"), product("Product 2")], [product("Product 1", price="$12.00")]):
+        delta = index.diff(run, complete=True)
+        await save_to_postgres(delta_frame(_transform_data_sync(delta.changed), delta), url)
+        index.commit(delta)
+
+    with create_engine(url).connect() as connection:
+        result = pd.read_sql('SELECT "Title", "Price" FROM "fashion_products"', connection)
+    assert result.to_dict("records") == [{"Title": "Product 1", "Price": 12.0 * 16000}]
+
+def test_partial_crawl_deletes_nothing(index):
+    full = crawl(3)
+    assert full.complete and len(full) == 3
+    index.commit(index.diff(full, full.complete))
+
+    # Page 2 fails: Product 2 may still be listed, so it is not deleted
+    partial = crawl(3, failing={2})
+    assert not partial.complete and len(partial) == 2
+    assert index.diff(partial, partial.complete).counts() == {"insert": 0, "update": 0, "delete": 0}
+    # Nor without a failure when a run stops before the catalog end
+    assert len(index.diff([product("Product 1")])) == 0
@@ -6,7 +6,8 @@ from unittest.mock import patch, AsyncMock
 import pandas as pd
 import os
 from datetime import datetime
-from utils.load import save_to_csv
+from sqlalchemy import create_engine, text
+from utils.load import LOADERS, CsvLoader, ParquetLoader, save_to_csv, save_to_jsonl, save_to_parquet, save_to_postgres
 
 # --- Fixtures ---
 @pytest.fixture
@@ -17,6 +18,39 @@ def sample_dataframe():
         "Price": [10000, 20000]
     })
 
+@pytest.fixture
+def product_dataframe():
+    """Return transformed rows with the product key columns."""
+    return pd.DataFrame({
+        "Title": ["Product 1", "Product 2"],
+        "Price": [160000.0, 320000.0],
+        "Rating": [4.5, 3.9],
+        "Colors": [3, 5],
+        "Size": ["M", "L"],
+        "Gender": ["Men", "Women"],
+        "Scraped_At": ["2025-05-01 10:00:00", "2025-05-01 10:00:00"],
+    })
+
+@pytest.fixture(params=["sqlite", "postgresql"])
+def database_url(request, tmp_path):
+    """
+    SQLite file for the portable path; PostgreSQL (COPY path) from
+    $TEST_DATABASE_URL or a disposable pgserver instance.
+    """
+    if request.param == "sqlite":
+        yield f"sqlite:///{tmp_path / 'products.db'}"
+        return
+    url = os.environ.get("TEST_DATABASE_URL")
+    if url:
+        with create_engine(url).begin() as connection:
+            connection.execute(text('DROP TABLE IF EXISTS "fashion_products"'))
+        yield url
+        return
+    pgserver = pytest.importorskip("pgserver")
+    server = pgserver.get_server(tmp_path / "pgdata", cleanup_mode="stop")
+    yield server.get_uri().replace("postgresql://", "postgresql+psycopg2://", 1)
+    server.cleanup()
+
 @pytest.fixture
 def empty_dataframe():
     """Return an empty DataFrame for testing."""
@@ -43,13 +77,12 @@ async def test_save_to_csv_custom_filename(sample_dataframe, tmp_path):
     assert pd.read_csv(saved_path).equals(sample_dataframe)
 
 @pytest.mark.asyncio
-async def test_save_to_csv_empty_data(empty_dataframe, capsys):
+async def test_save_to_csv_empty_data(empty_dataframe, caplog):
     """Test handling of empty DataFrame."""
     result = await save_to_csv(empty_dataframe)
     
     assert result is None
-    captured = capsys.readouterr()
-    assert "No data to save" in captured.out
+    assert "No data to save" in caplog.text
 
 @pytest.mark.asyncio
 async def test_directory_creation(sample_dataframe, tmp_path):
@@ -67,4 +100,199 @@ async def test_async_io_handling(mock_to_thread, sample_dataframe):
     mock_to_thread.return_value = "dummy_path.csv"
     await save_to_csv(sample_dataframe)
     
-    mock_to_thread.assert_awaited_once()
\ No newline at end of file
+    mock_to_thread.assert_awaited_once()
+
+@pytest.mark.asyncio
+async def test_save_to_csv_append(sample_dataframe, tmp_path):
+    """Appended chunks share a single header."""
+    custom_path = tmp_path / "stream.csv"
+    await save_to_csv(sample_dataframe, str(custom_path), append=True)
+    await save_to_csv(sample_dataframe, str(custom_path), append=True)
+    
+    result = pd.read_csv(custom_path)
+    assert len(result) == 4
+    assert list(result.columns) == ["Title", "Price"]
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("suffix", [".csv.gz", ".csv.zst"])
+async def test_save_to_csv_compressed_blocks(sample_dataframe, tmp_path, suffix):
+    """Compressed blocks and appended chunks read back as one CSV."""
+    if suffix == ".csv.zst":
+        pytest.importorskip("zstandard")
+    custom_path = str(tmp_path / f"stream{suffix}")
+    big = pd.concat([sample_dataframe] * 5, ignore_index=True)
+    await save_to_csv(big, custom_path, append=True, chunk_size=3)
+    await save_to_csv(sample_dataframe, custom_path, append=True, chunk_size=3)
+    
+    result = pd.read_csv(custom_path)
+    assert len(result) == 12
+    assert result.iloc[10:].reset_index(drop=True).equals(sample_dataframe)
+    assert os.listdir(tmp_path) == [os.path.basename(custom_path)]
+
+@pytest.mark.asyncio
+async def test_csv_loader_parallel_workers(sample_dataframe, tmp_path):
+    loader = CsvLoader(compression="gzip", workers=2, chunk_size=1)
+    assert loader.extension == ".csv.gz"
+    custom_path = str(tmp_path / f"out{loader.extension}")
+    await loader.save(pd.concat([sample_dataframe] * 4, ignore_index=True), custom_path)
+    await loader.close()
+    assert pd.read_csv(custom_path).equals(pd.concat([sample_dataframe] * 4, ignore_index=True))
+
+@pytest.mark.parametrize("loader_class", [CsvLoader, ParquetLoader])
+@pytest.mark.asyncio
+async def test_stream_replaces_existing_file(loader_class, tmp_path):
+    import main
+    if loader_class is ParquetLoader:
+        pytest.importorskip("pyarrow")
+    loader = loader_class()
+    path = str(tmp_path / f"out{loader.extension}")
+    loader.default_filename = lambda: path
+    product = {"Title": "T-shirt 1", "Price": "$10.00", "Rating": "Rating: 4.5 / 5", "Colors": "3 Colors",
+               "Size": "Size: M", "Gender": "Gender: Men", "Scraped_At": "2025-05-01 10:00:00"}
+
+    async def scrape(*args, page_queue, **kwargs):
+        for page in range(3):
+            await page_queue.put([dict(product, Title=f"T-shirt {page}")])
+
+    # A file of the same name left by an earlier run in the same second
+    await loader.save(pd.DataFrame({"Title": ["Old"] * 5}), path)
+    await loader.close()
+    with patch("main.scrape_product_async", scrape):
+        assert await main.streaming_pipeline("http://catalog/page{}", 3, loader=loader) == path
+    result = pd.read_parquet(path) if loader_class is ParquetLoader else pd.read_csv(path)
+    assert result["Title"].tolist() == ["T-shirt 0", "T-shirt 1", "T-shirt 2"]
+
+@pytest.mark.asyncio
+async def test_batch_load_closes_loader(tmp_path):
+    import main
+    loader = CsvLoader(workers=2)
+    loader.default_filename = lambda: str(tmp_path / "out.csv")
+    raw = [{"Title": "T-shirt 1", "Price": "$10.00", "Rating": "Rating: 4.5 / 5", "Colors": "3 Colors",
+            "Size": "Size: M", "Gender": "Gender: Men", "Scraped_At": "2025-05-01 10:00:00"}]
+    assert await main.transform_and_load(raw, loader) == str(tmp_path / "out.csv")
+    assert loader._executor is None
+
+@pytest.mark.asyncio
+async def test_save_to_csv_failure_leaves_no_partial_file(sample_dataframe, tmp_path):
+    from utils.load import _encode_csv_block
+    calls = []
+    
+    def failing_block(*args):
+        calls.append(args)
+        if len(calls) == 2:
+            raise OSError("disk full")
+        return _encode_csv_block(*args)
+    
+    new_path = tmp_path / "new.csv"
+    existing_path = tmp_path / "existing.csv"
+    await save_to_csv(sample_dataframe, str(existing_path))
+    before = existing_path.read_bytes()
+    with patch("utils.load._encode_csv_block", side_effect=failing_block):
+        with pytest.raises(OSError):
+            await save_to_csv(sample_dataframe, str(new_path), chunk_size=1)
+        calls.clear()
+        with pytest.raises(OSError):
+            await save_to_csv(sample_dataframe, str(existing_path), append=True, chunk_size=1)
+    
+    assert sorted(os.listdir(tmp_path)) == ["existing.csv"]
+    assert existing_path.read_bytes() == before
+
+@pytest.mark.asyncio
+async def test_save_to_jsonl_append(sample_dataframe, tmp_path):
+    """Appended chunks are one JSON record per line."""
+    custom_path = tmp_path / "stream.jsonl"
+    await save_to_jsonl(sample_dataframe, str(custom_path), append=True)
+    await save_to_jsonl(sample_dataframe, str(custom_path), append=True)
+    
+    result = pd.read_json(custom_path, lines=True)
+    assert len(result) == 4
+    assert result.iloc[2:].reset_index(drop=True).equals(sample_dataframe)
+
+@pytest.mark.asyncio
+async def test_save_to_parquet_round_trip(tmp_path):
+    """Parquet keeps compact dtypes."""
+    pytest.importorskip("pyarrow")
+    df = pd.DataFrame({
+        "Title": pd.array(["Product 1", "Product 2"], dtype="string"),
+        "Colors": pd.array([3, None], dtype="Int8"),
+        "Size": pd.Categorical(["M", "L"]),
+    })
+    custom_path = tmp_path / "out.parquet"
+    saved_path = await save_to_parquet(df, str(custom_path), compression="zstd")
+    
+    assert saved_path == str(custom_path)
+    pd.testing.assert_frame_equal(pd.read_parquet(saved_path), df)
+
+@pytest.mark.asyncio
+async def test_parquet_loader_streams_row_groups(sample_dataframe, tmp_path):
+    """Streamed chunks become row groups of one Parquet file."""
+    pq = pytest.importorskip("pyarrow.parquet")
+    custom_path = tmp_path / "stream.parquet"
+    loader = ParquetLoader()
+    await loader.save(sample_dataframe, str(custom_path), append=True)
+    await loader.save(sample_dataframe, str(custom_path), append=True)
+    await loader.close()
+    
+    assert pq.ParquetFile(custom_path).num_row_groups == 2
+    assert len(pd.read_parquet(custom_path)) == 4
+
+@pytest.mark.asyncio
+async def test_parquet_loader_widens_later_chunks(tmp_path):
+    """A later chunk with wider compact dtypes than the first still appends."""
+    pytest.importorskip("pyarrow")
+    from utils.transform import apply_schema
+    def chunk(colors, sizes):
+        return apply_schema(pd.DataFrame({
+            "Title": [f"Product {i}" for i in range(len(sizes))], "Colors": colors, "Size": sizes,
+        }))
+    first = chunk([3, None], ["M", "L"])
+    # Colors past Int8 and over 127 sizes (int16 category codes)
+    second = chunk([300] + [1] * 199, [f"Size {i}" for i in range(200)])
+    assert str(first["Colors"].dtype) == "Int8" and str(second["Colors"].dtype) == "Int16"
+    custom_path = str(tmp_path / "stream.parquet")
+    loader = ParquetLoader()
+    await loader.save(first, custom_path, append=True)
+    await loader.save(second, custom_path, append=True)
+    await loader.close()
+
+    result = pd.read_parquet(custom_path)
+    assert result["Colors"].tolist()[:3] == [3, pd.NA, 300]
+    assert result["Size"].astype(str).tolist() == ["M", "L", *second["Size"].astype(str)]
+
+def test_loader_registry():
+    assert set(LOADERS) == {"csv", "json", "parquet", "postgres", "history"}
+    assert [LOADERS[name].extension for name in ("csv", "json", "parquet")] == [".csv", ".jsonl", ".parquet"]
+
+def _read_table(url):
+    with create_engine(url).connect() as connection:
+        return pd.read_sql('SELECT * FROM "fashion_products" ORDER BY "Title"', connection)
+
+@pytest.mark.asyncio
+async def test_save_to_postgres_upserts(product_dataframe, database_url):
+    """Re-running a load updates products instead of duplicating them."""
+    assert await save_to_postgres(product_dataframe, database_url, chunk_size=1) == "fashion_products"
+    
+    rerun = product_dataframe.assign(Price=[170000.0, 320000.0])
+    await save_to_postgres(rerun, database_url)
+    await save_to_postgres(rerun, database_url)
+    
+    result = _read_table(database_url)
+    assert len(result) == 2
+    assert result["Price"].tolist() == [170000.0, 320000.0]
+    assert result["Colors"].tolist() == [3, 5]
+
+@pytest.mark.asyncio
+async def test_save_to_postgres_compact_schema(database_url):
+    """Transformed frames with compact dtypes and missing colours load."""
+    from utils.transform import _transform_data_sync
+    raw = [{
+        "Title": "Product 1", "Price": "$10.00", "Rating": "Rating: ⭐ 4.5 / 5",
+        "Colors": "N/A", "Size": "Size: M", "Gender": "Gender: Men",
+        "Scraped_At": "2025-05-01 10:00:00",
+    }]
+    await save_to_postgres(_transform_data_sync(raw), database_url)
+    
+    result = _read_table(database_url)
+    assert result["Price"].tolist() == [160000.0]
+    assert result["Colors"].isna().all()
+    assert pd.Timestamp(result["Scraped_At"][0]) == pd.Timestamp("2025-05-01 10:00:00")
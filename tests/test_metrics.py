@@ -0,0 +1,70 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import json
+import logging
+import pytest
+from utils.metrics import METRICS, Histogram, JsonFormatter, Metrics
+from utils.load import save_to_csv
+from utils.transform import _transform_data_sync
+import pandas as pd
+
+
+# --- Fixtures ---
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    METRICS.reset()
+    yield
+    METRICS.reset()
+
+# --- Tests ---
+def test_histogram():
+    hist = Histogram(buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 3.0):
+        hist.observe(value)
+
+    assert list(hist.cumulative()) == [(0.1, 1), (1.0, 3)]
+    assert hist.as_dict()["count"] == 4
+    assert hist.quantile(0.5) == 1.0
+    assert hist.quantile(1.0) == 3.0
+
+def test_prometheus_export():
+    metrics = Metrics()
+    metrics.inc("fetch_requests_total", status=200)
+    metrics.inc("fetch_requests_total", status=200)
+    metrics.observe("fetch_latency_seconds", 0.2)
+    text = metrics.to_prometheus()
+
+    assert "# TYPE fetch_requests_total counter" in text
+    assert 'fetch_requests_total{status="200"} 2' in text
+    assert 'fetch_latency_seconds_bucket{le="0.25"} 1' in text
+    assert 'fetch_latency_seconds_bucket{le="+Inf"} 1' in text
+    assert "fetch_latency_seconds_count 1" in text
+
+def test_transform_steps_are_timed():
+    raw = [{
+        "Title": "Product 1", "Price": "$10.00", "Rating": "Rating: ⭐ 4.5 / 5", "Colors": "3 Colors",
+        "Size": "Size: M", "Gender": "Gender: Men", "Scraped_At": "2025-05-01 10:00:00",
+    }]
+    _transform_data_sync(raw)
+
+    steps = {entry["labels"]["step"] for entry in METRICS.summary()["histograms"]["transform_step_seconds"]}
+    assert steps == {"frame", "dedupe", "clean", "filter", "schema"}
+
+@pytest.mark.asyncio
+async def test_load_throughput_summary(tmp_path):
+    await save_to_csv(pd.DataFrame({"Title": ["Product 1", "Product 2"]}), str(tmp_path / "out.csv"))
+    METRICS.write(str(tmp_path / "metrics.json"))
+
+    summary = json.loads((tmp_path / "metrics.json").read_text())
+    assert summary["counters"]["load_rows_total"] == [{"labels": {"format": "csv"}, "value": 2}]
+    assert summary["load_rows_per_second"]["csv"] > 0
+
+def test_json_log_lines():
+    record = logging.LogRecord("utils.extract", logging.INFO, __file__, 1, "Found 2 products on page 1", (), None)
+    record.page = 1
+    entry = json.loads(JsonFormatter().format(record))
+
+    assert entry["message"] == "Found 2 products on page 1"
+    assert entry["page"] == 1
+    assert entry["level"] == "INFO"
@@ -0,0 +1,55 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import asyncio
+import json
+import time
+from utils.metrics import METRICS
+from utils.profiling import StageProfiler, stage
+
+
+# --- Fixtures ---
+def busy(n):
+    return sum(i * i for i in range(n))
+
+async def stages(profiler):
+    with profiler.stage("transform"):
+        await asyncio.to_thread(busy, 200_000)
+    with profiler.stage("load"):
+        data = [bytes(1024) for _ in range(2000)]
+        await asyncio.to_thread(len, data)
+        del data
+    with profiler.stage("blocking"):
+        time.sleep(0.3)
+        await asyncio.sleep(0.1)
+
+
+# --- Tests ---
+def test_stages_profiled_and_written(tmp_path):
+    profiler = StageProfiler()
+    asyncio.run(profiler.run(stages(profiler), str(tmp_path / "profile"), top=5))
+    summary = profiler.summary()
+    functions = [f["function"] for f in summary["stages"]["transform"]["hot_functions"]]
+    assert any("busy" in function or "genexpr" in function for function in functions)
+    assert not any("busy" in f["function"] for f in summary["stages"]["load"]["hot_functions"])
+    assert profiler.stages["load"].peak_growth >= 2000 * 1024
+    assert summary["loop_lag"] is None
+
+    files = sorted(os.listdir(tmp_path / "profile"))
+    assert {"transform.pstats", "load.pstats", "report.txt", "profile.json"} <= set(files)
+    assert "=== Profile transform" in (tmp_path / "profile" / "report.txt").read_text()
+    assert json.loads((tmp_path / "profile" / "profile.json").read_text())["stages"]["load"]["calls"] == 1
+
+def test_loop_lag_attributed_to_blocking_stage(tmp_path):
+    profiler = StageProfiler()
+    asyncio.run(profiler.run(stages(profiler), str(tmp_path), watch_loop=True))
+    assert profiler.lag["stalls"] >= 1 and profiler.lag["max"] >= 0.2
+    assert profiler.stages["blocking"].stalls >= 1
+    assert profiler.stages["transform"].stalls == 0
+
+def test_stage_times_without_profiling():
+    METRICS.reset()
+    with stage("transform"):
+        pass
+    assert METRICS.histograms["stage_seconds"][(("stage", "transform"),)].count == 1
+    METRICS.reset()
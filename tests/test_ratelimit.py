@@ -0,0 +1,87 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import asyncio
+import time
+import pytest
+from utils.ratelimit import AdaptiveRateLimiter, FixedDelayPolicy, parse_retry_after
+
+
+# --- Tests ---
+def test_parse_retry_after():
+    assert parse_retry_after("5") == 5.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("not a date") is None
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+
+def test_adaptive_backs_off_and_recovers():
+    limiter = AdaptiveRateLimiter(initial=4, max_concurrent=8)
+    limiter.record("http://test.com/page2", 429, 0.1, retry_after=30)
+    assert limiter.limit == 2.0
+    assert limiter._blocked_until["test.com"] > 0
+    
+    for _ in range(10):
+        limiter.record("http://test.com/page3", 200, 0.1)
+    assert limiter.limit > 2.0
+    assert limiter.stats()["test.com"]["throttled"] == 1
+    assert limiter.stats()["test.com"]["ok"] == 10
+
+@pytest.mark.asyncio
+async def test_adaptive_decreases_once_per_burst():
+    limiter = AdaptiveRateLimiter(initial=8, max_concurrent=8)
+
+    async def request(status, seconds):
+        async with limiter:
+            started = time.monotonic()
+            await asyncio.sleep(seconds)
+            limiter.record("http://test.com", status, time.monotonic() - started)
+
+    # Five requests in flight together all fail: one halving, not 2**5
+    await asyncio.gather(*(request(503, 0.05) for _ in range(5)))
+    assert limiter.limit == 4.0
+    # A request sent after that decrease may decrease again
+    await request(503, 0.01)
+    assert limiter.limit == 2.0
+    assert limiter.stats()["test.com"]["errors"] == 6
+
+@pytest.mark.asyncio
+async def test_retry_after_pause_holds_no_slot():
+    limiter = AdaptiveRateLimiter(initial=1, max_concurrent=1)
+    limiter.record("http://a.com/page1", 429, 0.01, retry_after=0.3)
+    order = []
+
+    async def request(url):
+        # The order fetch_content uses: host pause, then slot, then per-request delay
+        await limiter.wait_for_host(url)
+        async with limiter:
+            await limiter.wait(url)
+            order.append(url)
+
+    await asyncio.gather(request("http://a.com/page2"), request("http://b.com/page1"))
+    assert order == ["http://b.com/page1", "http://a.com/page2"]
+
+def test_adaptive_ignores_slow_responses():
+    limiter = AdaptiveRateLimiter(initial=3, latency_threshold=1.0)
+    limiter.record("http://test.com", 200, 5.0)
+    assert limiter.limit == 3.0
+
+@pytest.mark.asyncio
+async def test_adaptive_limits_concurrency():
+    limiter = AdaptiveRateLimiter(initial=2)
+    active = peak = 0
+    
+    async def request():
+        nonlocal active, peak
+        async with limiter.limiter():
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+    
+    await asyncio.gather(*(request() for _ in range(6)))
+    assert peak == 2
+
+def test_fixed_policy_report():
+    policy = FixedDelayPolicy()
+    policy.record("http://test.com/page1", 200, 0.5)
+    assert "test.com: 1 requests" in "\n".join(policy.report())
@@ -0,0 +1,84 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+import pandas as pd
+import pytest
+from bench_transform import synthetic_products
+from utils.reprocess import find_exports, is_raw_export, plan_ranges, reprocess, transform_export
+from utils.transform import _transform_data_sync
+
+
+# --- Fixtures ---
+@pytest.fixture
+def exports(tmp_path):
+    """Three raw exports of 300 products, one gzip compressed."""
+    raw = pd.DataFrame(synthetic_products(900))
+    raw.loc[5, "Title"] = "N/A"
+    for i, suffix in enumerate((".csv", ".csv", ".csv.gz")):
+        raw[i * 300:(i + 1) * 300].to_csv(tmp_path / f"fashion_products_2025010{i}_000000{suffix}", index=False)
+    (tmp_path / "notes.txt").write_text("not an export")
+    return tmp_path, raw
+
+def read_output(path):
+    return pd.read_csv(path, keep_default_na=False, na_values=[""])
+
+def round_trip(df, path):
+    """Return df as it reads back from a CSV file."""
+    df.to_csv(path, index=False)
+    return read_output(path)
+
+
+# --- Tests ---
+def test_plan_ranges_cover_file_on_line_starts(exports):
+    directory, _ = exports
+    paths = find_exports(str(directory))
+    assert len(paths) == 3
+    tasks = plan_ranges(paths, range_bytes=2000)
+    compressed = [task for task in tasks if task.end is None]
+    assert [task.path for task in compressed] == [paths[2]]
+    with open(paths[0], "rb") as f:
+        content = f.read()
+    ranges = [task for task in tasks if task.path == paths[0]]
+    assert len(ranges) > 1
+    assert ranges[0].start == content.index(b"\n") + 1 and ranges[-1].end == len(content)
+    for before, after in zip(ranges, ranges[1:]):
+        assert before.end == after.start and content[after.start - 1:after.start] == b"\n"
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_reprocess_matches_transform(exports, workers):
+    directory, raw = exports
+    output = reprocess(str(directory), str(directory / "out" / "all.csv.gz"), workers=workers,
+                       exchange_rate=17000, range_bytes=4000, chunk_rows=50)
+    expected = _transform_data_sync(raw.to_dict("records"), exchange_rate=17000).reset_index(drop=True)
+    result = read_output(output)
+    assert len(result) == len(expected) and "N/A" in result["Title"].tolist()
+    pd.testing.assert_frame_equal(result, round_trip(expected, directory / "expected.csv"))
+    assert not [name for name in os.listdir(directory / "out") if name.startswith(".reprocess-")]
+
+def test_transformed_exports_need_source_rate(exports):
+    directory, raw = exports
+    transformed = round_trip(_transform_data_sync(raw.to_dict("records")), directory / "transformed.csv")
+    with pytest.raises(ValueError):
+        transform_export(transformed, exchange_rate=17000)
+    rescaled = transform_export(transformed, exchange_rate=17000, source_rate=16000)
+    assert rescaled["Price"].tolist() == pytest.approx((transformed["Price"] * 17000 / 16000).tolist())
+
+def test_raw_export_with_empty_price_chunk(tmp_path):
+    raw = pd.DataFrame(synthetic_products(100))
+    # A whole chunk without prices reads as numeric, yet the file is raw
+    raw.loc[50:, "Price"] = None
+    raw.to_csv(tmp_path / "fashion_products_20250101_000000.csv", index=False)
+    assert is_raw_export(str(tmp_path / "fashion_products_20250101_000000.csv"))
+    # Sniffing goes past leading rows without prices, a few rows at a time
+    raw[::-1].to_csv(tmp_path / "reversed.csv", index=False)
+    assert is_raw_export(str(tmp_path / "reversed.csv"), sniff_rows=10)
+    _transform_data_sync(raw.to_dict("records")).to_csv(tmp_path / "transformed.csv", index=False)
+    assert not is_raw_export(str(tmp_path / "transformed.csv"), sniff_rows=10)
+    output = reprocess(str(tmp_path), str(tmp_path / "out.csv"), workers=1, range_bytes=2000, chunk_rows=50)
+    expected = _transform_data_sync(raw.to_dict("records")).reset_index(drop=True)
+    pd.testing.assert_frame_equal(read_output(output), round_trip(expected, tmp_path / "expected.csv"))
+
+def test_reprocess_without_exports(tmp_path):
+    with pytest.raises(ValueError):
+        reprocess(str(tmp_path), str(tmp_path / "out.csv"))
@@ -0,0 +1,60 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+import asyncio
+import time
+import pytest
+from fixture_server import serve
+from utils.extract import scrape_product_async
+from utils.ratelimit import FixedDelayPolicy
+from utils.retry import RetryScheduler
+
+
+# --- Tests ---
+def test_backoff_honours_retry_after():
+    retries = RetryScheduler(base=1.0, cap=30.0)
+    assert 4.0 <= retries.backoff(2, status=429) < 5.0
+    assert 3.0 <= retries.backoff(2, status=500) < 4.0
+    assert retries.backoff(0, status=429, retry_after=10) == 10
+
+def test_retry_budget_is_shared():
+    retries = RetryScheduler(max_retries=3, budget=2, failure_threshold=100)
+    assert retries.schedule("http://test.com/page1", 0) is not None
+    assert retries.schedule("http://test.com/page2", 0) is not None
+    assert retries.schedule("http://test.com/page3", 0) is None
+    assert retries.schedule("http://test.com/page1", 3) is None
+    assert retries.exhausted == 1
+
+def test_circuit_opens_after_sustained_failures():
+    retries = RetryScheduler(base=0.01, failure_threshold=3, cooldown=60)
+    for attempt in range(2):
+        deadline = retries.schedule("http://bad.com/page1", attempt)
+        assert deadline - time.monotonic() < 1
+    deadline = retries.schedule("http://bad.com/page2", 0)
+    assert deadline - time.monotonic() > 59
+    assert retries.circuits["bad.com"].trips == 1
+    # Other hosts are not affected
+    assert retries.schedule("http://good.com/page1", 0) - time.monotonic() < 1
+    retries.success("http://bad.com/page3")
+    assert retries.circuits["bad.com"].failures == 0
+
+@pytest.mark.asyncio
+async def test_throttled_pages_release_their_slot():
+    async with serve(pages=4, cards=5, throttle_rate=0.3, seed=3, retry_after="0.2") as (base_url, app):
+        # One slot: another page is only fetched during a backoff if the slot was released
+        policy = FixedDelayPolicy(1, min_delay=0, max_delay=0)
+        retries = RetryScheduler(max_retries=10, base=0.01, failure_threshold=100)
+        products = await asyncio.wait_for(
+            scrape_product_async(base_url, 4, window=4, rate_limit=policy, retries=retries), timeout=20
+        )
+    assert len(products) == 20
+    assert app["stats"]["throttled"] > 0
+    assert retries.retries == app["stats"]["throttled"]
+    pages = [page for _, page, _ in app["log"]]
+    fetched_during_backoff = False
+    for i, (_, page, status) in enumerate(app["log"]):
+        if status == 429:
+            retried = pages.index(page, i + 1)
+            fetched_during_backoff |= any(other != page for other in pages[i + 1:retried])
+    assert fetched_during_backoff
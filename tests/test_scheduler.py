@@ -0,0 +1,87 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import asyncio
+from datetime import datetime
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
+from utils.scheduler import CronSchedule, IntervalSchedule, PipelineScheduler, control_app
+
+
+# --- Fixtures ---
+@pytest.fixture
+def slow_job():
+    release = asyncio.Event()
+    
+    async def job():
+        await release.wait()
+        return "fashion_products.csv"
+    job.release = release
+    return job
+
+# --- Tests ---
+def test_cron_next_after():
+    moment = datetime(2024, 1, 31, 10, 7, 30)  # a Wednesday
+    assert CronSchedule("*/15 * * * *").next_after(moment) == datetime(2024, 1, 31, 10, 15)
+    assert CronSchedule("0 9 * * 1").next_after(moment) == datetime(2024, 2, 5, 9, 0)
+    assert CronSchedule("30 2 1 * *").next_after(moment) == datetime(2024, 2, 1, 2, 30)
+    assert CronSchedule("0 0 29 2 *").next_after(moment) == datetime(2024, 2, 29, 0, 0)
+    # Day of month or day of week when both are restricted
+    assert CronSchedule("0 0 15 * 0").next_after(moment) == datetime(2024, 2, 4, 0, 0)
+
+def test_invalid_schedules():
+    for expression in ("* * *", "60 * * * *", "*/0 * * * *", "a * * * *"):
+        with pytest.raises(ValueError):
+            CronSchedule(expression)
+    with pytest.raises(ValueError):
+        IntervalSchedule(0)
+
+@pytest.mark.asyncio
+async def test_scheduler_skips_overlapping_runs(slow_job):
+    scheduler = PipelineScheduler(slow_job, IntervalSchedule(3600))
+    assert scheduler.trigger("schedule")
+    await asyncio.sleep(0)
+    assert not scheduler.trigger("manual")
+    assert scheduler.skipped == 1
+    
+    slow_job.release.set()
+    await scheduler._task
+    assert scheduler.runs == 1
+    assert scheduler.last_run["status"] == "ok"
+    assert scheduler.last_run["result"] == "fashion_products.csv"
+
+@pytest.mark.asyncio
+async def test_scheduler_runs_on_interval_until_stopped():
+    results = []
+    
+    async def job():
+        results.append(len(results))
+        return None
+    
+    scheduler = PipelineScheduler(job, IntervalSchedule(0.01))
+    task = asyncio.create_task(scheduler.run_forever(run_on_start=True))
+    while len(results) < 3:
+        await asyncio.sleep(0.01)
+    scheduler.stop()
+    await task
+    assert scheduler.runs >= 3
+    assert scheduler.last_run["status"] == "failed"
+
+@pytest.mark.asyncio
+async def test_control_endpoint(slow_job):
+    scheduler = PipelineScheduler(slow_job, IntervalSchedule(3600))
+    async with TestClient(TestServer(control_app(scheduler))) as client:
+        response = await client.post("/run")
+        assert response.status == 202
+        response = await client.post("/run")
+        assert response.status == 409
+        
+        slow_job.release.set()
+        await scheduler._task
+        status = await (await client.get("/status")).json()
+        assert status["runs"] == 1
+        assert status["skipped"] == 1
+        assert status["last_run"]["status"] == "ok"
+        response = await client.get("/metrics")
+        assert response.status == 200
+        assert response.content_type == "text/plain"
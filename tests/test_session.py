@@ -0,0 +1,42 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+import pytest
+from fixture_server import serve
+from utils.extract import scrape_product_async
+from utils.ratelimit import FixedDelayPolicy
+from utils.session import SESSIONS, accept_encoding, ssl_context
+
+
+# --- Tests ---
+def test_ssl_context_is_cached():
+    assert ssl_context() is ssl_context()
+
+def test_accept_encoding():
+    assert accept_encoding(compression=False) == "identity"
+    assert accept_encoding().startswith("gzip, deflate")
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("client", sorted(SESSIONS))
+async def test_session_reused_across_crawls(client):
+    try:
+        sessions = SESSIONS[client](limit=2)
+    except ValueError as e:
+        pytest.skip(str(e))
+    async with serve(pages=3, cards=5) as (base_url, app):
+        try:
+            for _ in range(2):
+                policy = FixedDelayPolicy(2, min_delay=0, max_delay=0)
+                products = await scrape_product_async(base_url, 3, rate_limit=policy, sessions=sessions)
+                assert len(products) == 15
+            session = sessions.session()
+            assert not session.closed
+        finally:
+            await sessions.close()
+    stats = sessions.stats
+    assert stats.requests == 6
+    # At most one connection per concurrency slot; the second crawl reuses them
+    assert stats.opened <= 2
+    assert stats.reused == stats.requests - stats.opened
+    assert "reused" in sessions.report()[0]
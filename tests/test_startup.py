@@ -0,0 +1,53 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Import time budget (ms) for `main.py --help`; startup was ~1300ms with every
+# dependency imported eagerly and is ~100ms without them
+STARTUP_BUDGET_MS = 400
+
+# Modules only the stages that need them may import
+HEAVY_MODULES = ("pandas", "numpy", "bs4", "aiohttp", "sqlalchemy", "pyarrow", "httpx", "aiofiles")
+
+
+def run_python(*args):
+    return subprocess.run([sys.executable, *args], cwd=ROOT, capture_output=True, text=True, check=True)
+
+def loaded_heavy_modules(code):
+    check = f"{code}\nimport sys\nprint(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    return [name for name in run_python("-c", check).stdout.strip().split(",") if name]
+
+def import_time_ms(stderr):
+    """Sum the cumulative -X importtime of the top-level imports."""
+    total = 0
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not name[1:].startswith(" "):
+            total += int(cumulative)
+    return total / 1000
+
+
+# --- Tests ---
+def test_cli_help_import_budget():
+    result = run_python("-X", "importtime", "main.py", "--help")
+    assert "--format" in result.stdout
+    elapsed = import_time_ms(result.stderr)
+    assert elapsed < STARTUP_BUDGET_MS, f"CLI startup imports took {elapsed:.0f}ms"
+
+def test_cli_imports_no_heavy_dependencies():
+    assert loaded_heavy_modules("import main") == []
+
+def test_csv_load_skips_sqlalchemy(tmp_path):
+    code = (
+        "import asyncio\n"
+        "import pandas as pd\n"
+        "from utils.load import CsvLoader\n"
+        f"asyncio.run(CsvLoader().save(pd.DataFrame({{'Title': ['T-shirt']}}), {str(tmp_path / 'out.csv')!r}))"
+    )
+    # pandas itself pulls in pyarrow when it is installed
+    assert "sqlalchemy" not in loaded_heavy_modules(code)
@@ -3,7 +3,7 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import pytest
 import pandas as pd
-from utils.transform import transform_data
+from utils.transform import transform_data, _transform_data_sync, _transform_data_rowwise
 
 
 # --- Test Data ---
@@ -56,4 +56,47 @@ async def test_transform_empty_data():
         "Scraped_At": ""
     }]
     transformed = await transform_data(empty_data)
-    assert transformed.empty
\ No newline at end of file
+    assert transformed.empty
+# Varied rows: duplicates, invalid titles, unparsable fields and non-strings
+MIXED_DATA = RAW_DATA + [
+    {"Title": "Product 1", "Price": "$10.99", "Rating": "Rating: 4.5", "Colors": "3 Colors",
+     "Size": "Size: M", "Gender": "Gender: Men", "Timestamp": "2023-01-01 00:00:00"},
+    {"Title": "Product 2", "Price": "$120.00", "Rating": "Rating: ⭐ Invalid Rating / 5",
+     "Colors": "Colors: N/A", "Size": "Size: L", "Gender": "Gender: Unisex",
+     "Timestamp": "2023-01-01 00:00:00"},
+    {"Title": "Product 3", "Price": "Price Unavailable", "Rating": "Rating: 3.9",
+     "Colors": "5 Colors", "Size": "Size: S", "Gender": "Gender: Women",
+     "Timestamp": "2023-01-01 00:00:00"},
+    {"Title": "Product 4", "Price": 25, "Rating": 4, "Colors": "8 Colors",
+     "Size": "Size: XXL", "Gender": "Gender: Men", "Timestamp": "2023-01-01 00:00:00"},
+    {"Title": "Product 5", "Price": "$1,250.5", "Rating": "Rating: 5", "Colors": "1 Colors",
+     "Size": "Size: XS", "Gender": "Gender: Women", "Timestamp": None},
+]
+
+# A rated row without a colour count that is later dropped for its price
+UNPRICED_DATA = RAW_DATA + [
+    {"Title": "Product 6", "Price": "Price Unavailable", "Rating": "Rating: 4.0",
+     "Colors": "Colors: N/A", "Size": "Size: M", "Gender": "Gender: Men",
+     "Timestamp": "2023-01-01 00:00:00"},
+]
+
+@pytest.mark.parametrize("raw_data", [RAW_DATA, MIXED_DATA, UNPRICED_DATA])
+def test_vectorized_transform_matches_rowwise(raw_data):
+    pd.testing.assert_frame_equal(
+        _transform_data_sync(raw_data, 15000, compact=False),
+        _transform_data_rowwise(raw_data, 15000),
+    )
+
+def test_transform_compact_schema():
+    raw_data = [dict(MIXED_DATA[2], Scraped_At="2023-01-01 10:00:00"),
+                dict(MIXED_DATA[3], Scraped_At="2023-01-01 10:00:00")]
+    transformed = _transform_data_sync(raw_data)
+    
+    assert str(transformed["Title"].dtype) == "string"
+    assert transformed["Rating"].dtype == "float32"
+    assert str(transformed["Colors"].dtype) == "Int8"
+    assert transformed["Colors"].isna().tolist() == [False, True]
+    assert transformed["Size"].dtype == "category"
+    assert transformed["Gender"].dtype == "category"
+    assert transformed["Scraped_At"].dtype == "datetime64[ns]"
+    assert transformed["Price"].tolist() == [10.99 * 16000, 120.0 * 16000]
@@ -0,0 +1,132 @@
+import os
+import sqlite3
+import threading
+import time
+
+# Default freshness window and size budget of the response cache
+CACHE_TTL = 3600
+CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# Cache database file inside the cache directory
+CACHE_FILENAME = "responses.sqlite3"
+
+
+class CachedResponse:
+    """
+    A cached page body with its validators and fetch time.
+    """
+    __slots__ = ("url", "body", "etag", "last_modified", "fetched_at")
+
+    def __init__(self, url, body, etag, last_modified, fetched_at):
+        self.url = url
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = fetched_at
+
+    def conditional_headers(self):
+        """Return the If-None-Match / If-Modified-Since headers to revalidate with."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    """
+    Persistent HTTP response cache for fetch_content, stored in SQLite.
+
+    Entries younger than ttl seconds are served without a request; older
+    ones are revalidated with their ETag / Last-Modified. When the stored
+    bodies exceed max_bytes the least recently used entries are evicted.
+    With offline=True only cached bodies are served and nothing is fetched.
+    fetch_content calls get(), hit() and put() in worker threads, so they
+    share the connection under a lock; the stored size is kept as a running
+    total so put() never scans the table.
+    """
+
+    def __init__(self, cache_dir, ttl=CACHE_TTL, max_bytes=CACHE_MAX_BYTES, offline=False):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, CACHE_FILENAME)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " url TEXT PRIMARY KEY, body TEXT NOT NULL, etag TEXT, last_modified TEXT,"
+            " fetched_at REAL NOT NULL, accessed_at REAL NOT NULL, size INTEGER NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_lru ON responses (accessed_at)")
+        self._db.commit()
+        self._size = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def get(self, url):
+        """Return the CachedResponse for url, or None if it is not cached."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT body, etag, last_modified, fetched_at FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+        return CachedResponse(url, *row)
+
+    def is_fresh(self, entry):
+        return self.offline or time.time() - entry.fetched_at < self.ttl
+
+    def hit(self, entry, revalidated=False):
+        """Mark an entry as used; a revalidated (304) entry is fresh again."""
+        now = time.time()
+        with self._lock:
+            if revalidated:
+                self.revalidated += 1
+                self._db.execute("UPDATE responses SET fetched_at = ?, accessed_at = ? WHERE url = ?",
+                                 (now, now, entry.url))
+            else:
+                self.hits += 1
+                self._db.execute("UPDATE responses SET accessed_at = ? WHERE url = ?", (now, entry.url))
+            self._db.commit()
+
+    def put(self, url, body, etag=None, last_modified=None):
+        """Store a fetched body with its validators and evict down to max_bytes."""
+        now = time.time()
+        size = len(body.encode("utf-8"))
+        with self._lock:
+            replaced = self._db.execute("SELECT size FROM responses WHERE url = ?", (url,)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, body, etag, last_modified, now, now, size)
+            )
+            self._size += size - (replaced[0] if replaced else 0)
+            self._evict()
+            self._db.commit()
+
+    def _evict(self):
+        if self._size <= self.max_bytes:
+            return
+        # Walk entries from least recently used and drop them until under budget
+        excess = self._size - self.max_bytes
+        doomed = []
+        for url, size in self._db.execute("SELECT url, size FROM responses ORDER BY accessed_at"):
+            if excess <= 0:
+                break
+            doomed.append((url,))
+            excess -= size
+            self._size -= size
+        self._db.executemany("DELETE FROM responses WHERE url = ?", doomed)
+
+    def close(self):
+        self._db.close()
+
+    def report(self):
+        """Return human readable cache statistics lines."""
+        mode = " (offline)" if self.offline else ""
+        return [f"Response cache{mode}: {self.hits} fresh hits, {self.revalidated} revalidated, "
+                f"{self.misses} misses"]
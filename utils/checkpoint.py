@@ -0,0 +1,77 @@
+import json
+import logging
+import os
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# Directory holding one append-only checkpoint file per crawl
+CHECKPOINT_DIR = ".checkpoints"
+
+
+def new_run_id():
+    """
+    Return a run id for a fresh crawl: the output file timestamp plus the
+    process id and a random suffix, so runs started in the same second
+    (scheduled runs, parallel invocations) never share a checkpoint.
+    """
+    return f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{os.getpid()}_{os.urandom(4).hex()}"
+
+
+class CrawlCheckpoint:
+    """
+    Append-only JSON-lines record of the pages a crawl has completed.
+
+    Every fetched page is appended as {"page", "next_page_exists",
+    "products"} as soon as it is parsed. Reopening a run id loads them back
+    so scrape_pages_window replays completed pages instead of fetching them;
+    pages that failed are never recorded and are retried.
+    """
+
+    def __init__(self, run_id, checkpoint_dir=CHECKPOINT_DIR):
+        os.makedirs(checkpoint_dir, exist_ok=True)
+        self.run_id = run_id
+        self.path = os.path.join(checkpoint_dir, f"{run_id}.jsonl")
+        self.pages = {}
+        if os.path.exists(self.path):
+            self._load()
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    @classmethod
+    def resume(cls, run_id, checkpoint_dir=CHECKPOINT_DIR):
+        """Reopen an existing run, or raise ValueError if it is unknown."""
+        if not os.path.exists(os.path.join(checkpoint_dir, f"{run_id}.jsonl")):
+            raise ValueError(f"No checkpoint for run {run_id} in {checkpoint_dir}")
+        return cls(run_id, checkpoint_dir)
+
+    def _load(self):
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # A crash can leave a half-written last line
+                    continue
+                self.pages[entry["page"]] = (entry["products"], entry["next_page_exists"])
+
+    def record(self, page_num, products, next_page_exists):
+        """Append a completed page; failed (None) and known pages are skipped."""
+        if next_page_exists is None or page_num in self.pages:
+            return
+        self.pages[page_num] = (products, next_page_exists)
+        entry = {"page": page_num, "next_page_exists": next_page_exists, "products": list(products)}
+        self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    async def replay(self, page_num):
+        """Return a completed page's (products, next_page_exists) like process_page."""
+        logger.info(f"Page {page_num} restored from checkpoint {self.run_id}", extra={"page": page_num})
+        return self.pages[page_num]
+
+    def close(self):
+        self._file.close()
+
+    def discard(self):
+        """Close and delete the checkpoint once its run has been loaded."""
+        self.close()
+        os.remove(self.path)
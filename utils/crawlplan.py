@@ -0,0 +1,379 @@
+import asyncio
+import json
+import logging
+import os
+import platform
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+from utils.ratelimit import POLICIES, AdaptiveRateLimiter, FixedDelayPolicy
+
+logger = logging.getLogger(__name__)
+
+# Pages per shard when a plan is split across workers
+SHARD_PAGES = 10
+
+# Seconds a claimed shard may run before another worker can take it over
+LEASE_SECONDS = 600
+
+# Attempts per shard before it is marked failed
+SHARD_ATTEMPTS = 3
+
+# Seconds between checks for shards still leased by other nodes
+POLL_SECONDS = 5
+
+# Seconds a worker waits for a site at its concurrency to free lease slots
+CLAIM_POLL_SECONDS = 0.5
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sites (
+    name TEXT PRIMARY KEY,
+    position INTEGER NOT NULL,
+    config TEXT NOT NULL,
+    end_page INTEGER
+);
+CREATE TABLE IF NOT EXISTS shards (
+    id INTEGER PRIMARY KEY,
+    site TEXT NOT NULL,
+    first_page INTEGER NOT NULL,
+    last_page INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    claimed_at REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    slots INTEGER NOT NULL DEFAULT 1
+);
+CREATE TABLE IF NOT EXISTS pages (
+    site TEXT NOT NULL,
+    page INTEGER NOT NULL,
+    next_page_exists INTEGER NOT NULL,
+    products TEXT NOT NULL,
+    PRIMARY KEY (site, page)
+);
+"""
+
+
+class Site:
+    """
+    One catalog to crawl: its page URL pattern, how many pages to try and
+    its rate limit. concurrency is the site's total across all workers.
+    """
+    __slots__ = ("name", "base_url", "max_pages", "rate_limit", "concurrency", "min_delay", "max_delay")
+
+    def __init__(self, name, base_url, max_pages=50, rate_limit="fixed", concurrency=3,
+                 min_delay=1.0, max_delay=3.0):
+        if "{}" not in base_url:
+            raise ValueError(f"Site {name}: base_url needs a {{}} page placeholder, got {base_url}")
+        if rate_limit not in POLICIES:
+            raise ValueError(f"Site {name}: unknown rate limit {rate_limit} (choose from {', '.join(POLICIES)})")
+        if concurrency < 1:
+            raise ValueError(f"Site {name}: concurrency must be at least 1, got {concurrency}")
+        self.name = name
+        self.base_url = base_url
+        self.max_pages = max_pages
+        self.rate_limit = rate_limit
+        self.concurrency = concurrency
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+
+    def share(self, workers=1):
+        """Return the slots one of `workers` workers asks for: its share of the concurrency."""
+        return max(1, self.concurrency // workers)
+
+    def policy(self, slots=1):
+        """Return the rate-limit policy of a shard lease holding `slots` of the concurrency."""
+        if self.rate_limit == "adaptive":
+            return AdaptiveRateLimiter(initial=slots, max_concurrent=slots)
+        return FixedDelayPolicy(slots, self.min_delay, self.max_delay)
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class Shard:
+    """
+    A claimed page range of one site, crawled with `slots` of the site's
+    concurrency.
+    """
+    __slots__ = ("id", "site", "first_page", "last_page", "slots")
+
+    def __init__(self, id, site, first_page, last_page, slots=1):
+        self.id = id
+        self.site = site
+        self.first_page = first_page
+        self.last_page = last_page
+        self.slots = slots
+
+
+class CrawlPlan:
+    """
+    The sites of a crawl, read from JSON like
+    {"sites": [{"name": "fashion", "base_url": "https://.../page{}",
+    "max_pages": 50, "rate_limit": "adaptive", "concurrency": 4}]}.
+    """
+
+    def __init__(self, sites):
+        names = [site.name for site in sites]
+        if not sites or len(set(names)) != len(names):
+            raise ValueError("A crawl plan needs at least one site and unique site names")
+        self.sites = sites
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, encoding="utf-8") as f:
+            config = json.load(f)
+        try:
+            return cls([Site(**site) for site in config["sites"]])
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"Invalid crawl plan {path}: {e}") from None
+
+    def shards(self, pages_per_shard=SHARD_PAGES):
+        """Yield (site name, first page, last page) ranges covering every site."""
+        for site in self.sites:
+            for first in range(1, site.max_pages + 1, pages_per_shard):
+                yield site.name, first, min(first + pages_per_shard - 1, site.max_pages)
+
+
+class WorkQueue:
+    """
+    SQLite-backed queue of crawl shards shared by worker processes, and by
+    other nodes when the file is on shared storage.
+
+    Workers claim pending shards (or ones whose lease ran out), store every
+    fetched page and mark a site's last page once they see it, so shards
+    past the end are skipped. Re-opening the file resumes a crawl: stored
+    pages are not fetched again. results() merges the pages in plan order.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._db = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+        # Queues written before leases recorded their slot share
+        if "slots" not in [row[1] for row in self._db.execute("PRAGMA table_info(shards)")]:
+            self._db.execute("ALTER TABLE shards ADD COLUMN slots INTEGER NOT NULL DEFAULT 1")
+
+    def add_plan(self, plan, pages_per_shard=SHARD_PAGES):
+        """Queue the plan's shards; sites already in the queue are kept as they are."""
+        added = 0
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            known = {name for name, in self._db.execute("SELECT name FROM sites")}
+            for position, site in enumerate(plan.sites):
+                if site.name in known:
+                    continue
+                self._db.execute("INSERT INTO sites (name, position, config) VALUES (?, ?, ?)",
+                                 (site.name, position, json.dumps(site.as_dict())))
+            for name, first, last in plan.shards(pages_per_shard):
+                if name not in known:
+                    self._db.execute("INSERT INTO shards (site, first_page, last_page) VALUES (?, ?, ?)",
+                                     (name, first, last))
+                    added += 1
+            self._db.execute("COMMIT")
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        return added
+
+    def sites(self):
+        rows = self._db.execute("SELECT config FROM sites ORDER BY position")
+        return {site.name: site for site in (Site(**json.loads(config)) for config, in rows)}
+
+    def _skip_past_end(self):
+        self._db.execute(
+            "UPDATE shards SET status = 'skipped' WHERE status IN ('pending', 'failed') "
+            "AND first_page > (SELECT end_page FROM sites WHERE sites.name = shards.site)"
+        )
+
+    def claim(self, worker, lease=LEASE_SECONDS, workers=1):
+        """
+        Take the next runnable shard for worker, or return None. The lease
+        holds the worker's share of its site's concurrency (Site.share), cut
+        to what live leases of every node leave free; sites with no free
+        slot are skipped, so the site's total stays within its concurrency.
+        """
+        now = time.time()
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            self._skip_past_end()
+            row = self._db.execute(
+                "SELECT id, site, first_page, last_page, config, json_extract(config, '$.concurrency') - "
+                "       (SELECT COALESCE(SUM(busy.slots), 0) FROM shards AS busy WHERE busy.site = shards.site "
+                "        AND busy.status = 'running' AND busy.claimed_at >= ?) AS free "
+                "FROM shards JOIN sites ON sites.name = shards.site "
+                "WHERE (status = 'pending' OR (status = 'running' AND claimed_at < ?)) AND free >= 1 "
+                "ORDER BY id LIMIT 1", (now - lease, now - lease)
+            ).fetchone()
+            shard = None
+            if row is not None:
+                shard_id, site, first_page, last_page, config, free = row
+                slots = min(free, Site(**json.loads(config)).share(workers))
+                self._db.execute("UPDATE shards SET status = 'running', worker = ?, claimed_at = ?, slots = ? "
+                                 "WHERE id = ?", (worker, now, slots, shard_id))
+                shard = Shard(shard_id, site, first_page, last_page, slots)
+            self._db.execute("COMMIT")
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        return shard
+
+    def pages(self, site, first_page, last_page):
+        rows = self._db.execute(
+            "SELECT page, products, next_page_exists FROM pages WHERE site = ? AND page BETWEEN ? AND ?",
+            (site, first_page, last_page)
+        )
+        return {page: (json.loads(products), bool(next_page)) for page, products, next_page in rows}
+
+    def record_page(self, site, page, products, next_page_exists):
+        self._db.execute(
+            "INSERT OR REPLACE INTO pages (site, page, next_page_exists, products) VALUES (?, ?, ?, ?)",
+            (site, page, int(next_page_exists), json.dumps(list(products), ensure_ascii=False))
+        )
+        if not next_page_exists:
+            end_page = page if products else page - 1
+            self._db.execute("UPDATE sites SET end_page = MIN(COALESCE(end_page, ?), ?) WHERE name = ?",
+                             (end_page, end_page, site))
+
+    def end_page(self, site):
+        return self._db.execute("SELECT end_page FROM sites WHERE name = ?", (site,)).fetchone()[0]
+
+    def finish(self, shard):
+        """
+        Mark a shard done if every page of its range up to the site's end is
+        stored; otherwise count a failed attempt and put it back in the queue.
+        """
+        end_page = self.end_page(shard.site)
+        last_page = shard.last_page if end_page is None else min(shard.last_page, end_page)
+        expected = max(0, last_page - shard.first_page + 1)
+        stored = len(self.pages(shard.site, shard.first_page, last_page))
+        if stored >= expected:
+            self._db.execute("UPDATE shards SET status = ? WHERE id = ?",
+                             ("done" if expected else "skipped", shard.id))
+            return True
+        self.fail(shard)
+        return False
+
+    def fail(self, shard, attempts=SHARD_ATTEMPTS):
+        self._db.execute(
+            "UPDATE shards SET attempts = attempts + 1, "
+            "status = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE 'pending' END WHERE id = ?",
+            (attempts, shard.id)
+        )
+
+    def progress(self):
+        """Return shard counts by status."""
+        self._skip_past_end()
+        counts = dict(self._db.execute("SELECT status, COUNT(*) FROM shards GROUP BY status"))
+        return {status: counts.get(status, 0) for status in ("pending", "running", "done", "skipped", "failed")}
+
+    def results(self):
+        """
+        Return the stored products of every site in plan order, page by
+        page; they are complete once every site's catalog end was seen.
+        Products of a plan with several sites carry their site's name in a
+        SITE_FIELD column, which then joins the identity keys downstream.
+        """
+        from utils.extract import ProductColumns
+        several = len(self.sites()) > 1
+        rows = self._db.execute(
+            "SELECT pages.site, pages.products FROM pages JOIN sites ON sites.name = pages.site "
+            "WHERE sites.end_page IS NULL OR pages.page <= sites.end_page "
+            "ORDER BY sites.position, pages.page"
+        )
+        merged = ProductColumns()
+        for site, products in rows:
+            merged.extend(json.loads(products), site=site if several else None)
+        merged.complete = self._db.execute("SELECT COUNT(*) FROM sites WHERE end_page IS NULL").fetchone()[0] == 0
+        return merged
+
+    def close(self):
+        self._db.close()
+
+
+class ShardCheckpoint:
+    """
+    CrawlCheckpoint-compatible view of one shard, so scrape_product_async
+    replays pages already in the queue and stores the ones it fetches.
+    """
+
+    def __init__(self, queue, shard):
+        self.queue = queue
+        self.site = shard.site
+        self.pages = queue.pages(shard.site, shard.first_page, shard.last_page)
+
+    def record(self, page_num, products, next_page_exists):
+        if next_page_exists is None or page_num in self.pages:
+            return
+        self.pages[page_num] = (products, next_page_exists)
+        self.queue.record_page(self.site, page_num, products, next_page_exists)
+
+    async def replay(self, page_num):
+        return self.pages[page_num]
+
+
+async def work(queue_path, worker, workers=1, parser="html.parser"):
+    """
+    Claim and crawl shards from the queue until none are left pending;
+    while the pending ones belong to sites at their concurrency, wait for
+    leases to free up. Returns the number of shards this worker completed.
+    """
+    from utils.extract import scrape_product_async
+    from utils.session import SessionFactory
+
+    queue = WorkQueue(queue_path)
+    sites = queue.sites()
+    sessions = SessionFactory(limit=max(site.concurrency for site in sites.values()))
+    completed = 0
+    try:
+        while True:
+            shard = queue.claim(worker, workers=workers)
+            if shard is None:
+                if not queue.progress()["pending"]:
+                    break
+                await asyncio.sleep(CLAIM_POLL_SECONDS)
+                continue
+            site = sites[shard.site]
+            logger.info(f"{worker}: {site.name} pages {shard.first_page}-{shard.last_page}",
+                        extra={"worker": worker, "site": site.name, "shard": shard.id})
+            try:
+                await scrape_product_async(site.base_url, shard.last_page, rate_limit=site.policy(shard.slots),
+                                           parser=parser, checkpoint=ShardCheckpoint(queue, shard),
+                                           sessions=sessions, first_page=shard.first_page)
+            except Exception as e:
+                logger.error(f"{worker}: shard {shard.id} failed: {e}", extra={"worker": worker, "shard": shard.id})
+                queue.fail(shard)
+                continue
+            completed += queue.finish(shard)
+    finally:
+        await sessions.close()
+        queue.close()
+    return completed
+
+
+def run_worker(queue_path, worker, workers=1, parser="html.parser"):
+    """Process entry point: work the queue in a fresh event loop."""
+    return asyncio.run(work(queue_path, worker, workers, parser))
+
+
+def run_workers(queue_path, workers=2, parser="html.parser", node=None, wait=True, poll=POLL_SECONDS):
+    """
+    Work the queue with `workers` local processes. With wait, keep polling
+    while shards are leased by other nodes and take over any whose lease
+    runs out; returns the final progress counts.
+    """
+    node = node or f"{platform.node()}-{os.getpid()}"
+    queue = WorkQueue(queue_path)
+    try:
+        while True:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(run_worker, queue_path, f"{node}/{i}", workers, parser)
+                           for i in range(workers)]
+                completed = sum(future.result() for future in futures)
+            progress = queue.progress()
+            logger.info(f"Workers finished {completed} shards; queue: {progress}", extra=progress)
+            if not wait or not progress["pending"] + progress["running"]:
+                return progress
+            time.sleep(poll)
+    finally:
+        queue.close()
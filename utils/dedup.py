@@ -0,0 +1,179 @@
+import logging
+import sqlite3
+import numpy as np
+import pandas as pd
+from utils.extract import PRODUCT_FIELDS, ProductColumns, with_site
+from utils.incremental import fingerprint
+from utils.metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
+# Raw fields forming the business key of a product by default
+DEDUP_KEY = ("Title", "Price", "Size", "Gender")
+
+# Keys a run holds in memory (8 bytes each) before they spill to disk
+MAX_MEMORY_KEYS = 1_000_000
+
+# Hashes per SQLite lookup, below its bound-parameter limit
+LOOKUP_BATCH = 500
+
+
+class HashSet:
+    """
+    Set of uint64 hashes kept as sorted numpy runs, 8 bytes per key.
+    Each add() appends a run and merges runs while the newest is at least
+    as large as the one before, so there are O(log n) runs to search.
+    """
+
+    def __init__(self):
+        self._runs = []
+
+    def __len__(self):
+        return sum(len(run) for run in self._runs)
+
+    def contains(self, hashes):
+        """Return a boolean mask of the hashes already in the set."""
+        found = np.zeros(len(hashes), dtype=bool)
+        for run in self._runs:
+            positions = np.minimum(np.searchsorted(run, hashes), len(run) - 1)
+            found |= run[positions] == hashes
+        return found
+
+    def add(self, hashes):
+        """Add hashes that are unique and not in the set yet."""
+        if not len(hashes):
+            return
+        self._runs.append(np.sort(hashes))
+        while len(self._runs) > 1 and len(self._runs[-1]) >= len(self._runs[-2]):
+            newest = self._runs.pop()
+            self._runs[-1] = np.sort(np.concatenate([self._runs[-1], newest]), kind="stable")
+
+    def to_array(self):
+        return np.concatenate(self._runs) if self._runs else np.empty(0, dtype=np.uint64)
+
+    def clear(self):
+        self._runs = []
+
+
+class Deduplicator:
+    """
+    Streaming deduplication on a business key.
+
+    filter() is fed batches of raw products (a page, or a whole crawl) and
+    drops every row whose key fields hash to a 64-bit value already seen
+    in this run. Seen keys are held in a HashSet; past max_memory_keys they
+    spill to a temporary SQLite table, so backfills of any size run in
+    bounded memory.
+
+    With a store path, keys of earlier runs count as seen too: commit()
+    adds a run's keys to the store once its load succeeded, rollback()
+    forgets them so a failed run's products are not dropped next time.
+    """
+
+    def __init__(self, key=DEDUP_KEY, path=None, max_memory_keys=MAX_MEMORY_KEYS):
+        unknown = [field for field in key if field not in PRODUCT_FIELDS]
+        if not key or unknown:
+            raise ValueError(f"Dedup key fields must be among {', '.join(PRODUCT_FIELDS)}, got {', '.join(key)}")
+        self.key = tuple(key)
+        self.path = path
+        self.max_memory_keys = max_memory_keys
+        self.memory = HashSet()
+        self._db = None
+        self.rows = 0
+        self.dropped = 0
+        self.spilled = 0
+        if path is not None:
+            self._connect()
+
+    def _connect(self):
+        if self._db is None:
+            # An empty path is a private on-disk database SQLite deletes on close
+            self._db = sqlite3.connect(self.path or "", check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS seen (hash INTEGER PRIMARY KEY) WITHOUT ROWID")
+            self._db.execute("CREATE TEMP TABLE IF NOT EXISTS run_seen (hash INTEGER PRIMARY KEY) WITHOUT ROWID")
+        return self._db
+
+    def _on_disk(self, hashes):
+        """Return a mask of the hashes in the store or spilled by this run."""
+        if self._db is None or not len(hashes):
+            return np.zeros(len(hashes), dtype=bool)
+        # SQLite integers are signed, so hashes are stored as int64
+        signed = hashes.view("int64")
+        found = []
+        for start in range(0, len(signed), LOOKUP_BATCH):
+            chunk = signed[start:start + LOOKUP_BATCH].tolist()
+            marks = ",".join("?" * len(chunk))
+            for table in ("seen", "run_seen"):
+                found.extend(h for h, in self._db.execute(f"SELECT hash FROM {table} WHERE hash IN ({marks})", chunk))
+        return np.isin(signed, np.array(found, dtype="int64"))
+
+    def _remember(self, hashes):
+        self.memory.add(hashes)
+        if self.max_memory_keys is not None and len(self.memory) > self.max_memory_keys:
+            spill = self.memory.to_array().view("int64").tolist()
+            db = self._connect()
+            db.executemany("INSERT OR IGNORE INTO run_seen VALUES (?)", ((h,) for h in spill))
+            db.commit()
+            self.memory.clear()
+            self.spilled += len(spill)
+            logger.info(f"Dedup spilled {len(spill)} keys to disk", extra={"keys": len(spill)})
+
+    def filter(self, products):
+        """
+        Return products (dicts, a ProductColumns or a DataFrame) as a frame
+        without the rows whose key was seen before; the first row wins.
+        Products with a SITE_FIELD column are keyed per site.
+        """
+        if isinstance(products, ProductColumns):
+            df = products.to_frame()
+        elif isinstance(products, pd.DataFrame):
+            df = products
+        else:
+            df = pd.DataFrame(products)
+        if df.empty:
+            return df
+        key = with_site(self.key, df.columns)
+        hashes = fingerprint(df.reindex(columns=list(key)), key)
+        # First occurrences within the batch, then those not seen in earlier batches
+        candidates = np.flatnonzero(~pd.Series(hashes).duplicated().to_numpy())
+        candidates = candidates[~self.memory.contains(hashes[candidates])]
+        candidates = candidates[~self._on_disk(hashes[candidates])]
+        keep = np.zeros(len(df), dtype=bool)
+        keep[candidates] = True
+        self._remember(hashes[candidates])
+
+        dropped = len(df) - len(candidates)
+        self.rows += len(df)
+        self.dropped += dropped
+        METRICS.inc("dedup_rows_total", len(df))
+        METRICS.inc("dedup_dropped_total", dropped)
+        return df[keep]
+
+    def commit(self):
+        """Add this run's keys to the store (if any) and start a new run."""
+        if self.path is not None:
+            self._db.execute("INSERT OR IGNORE INTO seen SELECT hash FROM run_seen")
+            self._db.executemany("INSERT OR IGNORE INTO seen VALUES (?)",
+                                 ((h,) for h in self.memory.to_array().view("int64").tolist()))
+            self._db.commit()
+        self.rollback()
+
+    def rollback(self):
+        """Forget this run's keys and counts."""
+        self.memory.clear()
+        if self._db is not None:
+            self._db.execute("DELETE FROM run_seen")
+            self._db.commit()
+        self.rows = self.dropped = self.spilled = 0
+
+    def report(self):
+        """Return human readable dedup statistics lines."""
+        line = f"Dedup on {'+'.join(self.key)}: {self.dropped} of {self.rows} rows dropped as duplicates"
+        if self.spilled:
+            line += f", {self.spilled} keys spilled to disk"
+        return [line]
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
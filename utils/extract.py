@@ -1,10 +1,15 @@
-import aiohttp
 import asyncio
-import pandas as pd
-from bs4 import BeautifulSoup
 from datetime import datetime
 import time
-import random
+from concurrent.futures import ProcessPoolExecutor
+import logging
+from urllib.parse import urljoin
+from utils.ratelimit import FixedDelayPolicy, parse_retry_after
+from utils.retry import RetryScheduler
+from utils.session import SessionFactory
+from utils.metrics import METRICS, configure_logging
+
+logger = logging.getLogger(__name__)
 
 # TODO
 # generate docstring
@@ -21,59 +26,124 @@ HEADERS = {
 # Maximum number of concurrent requests
 MAX_CONCURRENT_REQUESTS = 3
 
-# Maximum number of retries for a failed request
-MAX_RETRIES = 3
-
 # Delay between requests (in seconds)
 MIN_DELAY = 1
 MAX_DELAY = 3
 
-async def fetch_content(session, url, semaphore, retry=0):
+# Fields returned by extract_product_row, in order
+PRODUCT_FIELDS = ("Title", "Price", "Rating", "Colors", "Size", "Gender")
+
+# Column naming the source site of products merged from a multi-site crawl plan
+SITE_FIELD = "Site"
+
+# HTML parser backends: name -> (BeautifulSoup tree builder, parse only the
+# product grid and pagination)
+PARSERS = {
+    "html.parser": ("html.parser", False),
+    "lxml": ("lxml", True),
+}
+
+# Classes of the page parts the strained backends keep
+PAGE_PART_CLASSES = frozenset({"collection-grid", "next"})
+
+def _record_fetch(policy, url, status, latency, retry_after=None):
+    """
+    Report a request outcome to the rate-limit policy and the metrics;
+    status is None for network errors.
+    """
+    policy.record(url, status, latency, retry_after)
+    METRICS.observe("fetch_latency_seconds", latency)
+    METRICS.inc("fetch_requests_total", status=status or 0)
+
+async def fetch_content(session, url, semaphore, retry=0, policy=None, cache=None, retries=None):
     """
     Asynchronously sends a GET request with rate limiting and retry logic.
+    The rate-limit policy decides the pre-request delay and is told the
+    status and latency of every attempt (defaults to FixedDelayPolicy).
+    Failed attempts are rescheduled by `retries`, a RetryScheduler from
+    utils.retry: the backoff is waited out after the semaphore slot has
+    been released, so other pages keep using it. retry is the number of
+    attempts already made.
+    With a ResponseCache (utils.cache), fresh cached pages are returned
+    without a request, stale ones are revalidated with conditional headers
+    and offline caches never touch the network.
     """
-    async with semaphore:  # Limit concurrent requests
-        # Random delay to avoid detection
-        delay = random.uniform(MIN_DELAY, MAX_DELAY)
-        await asyncio.sleep(delay)
-        
-        try:
-            async with session.get(url, headers=HEADERS) as response:
-                if response.status == 200:
-                    return await response.text()
-                elif response.status == 429:  # Too Many Requests
-                    if retry < MAX_RETRIES:
-                        # Exponential backoff
-                        wait_time = (2 ** retry) + random.random()
-                        print(f"Rate limited. Waiting {wait_time:.2f}s before retry #{retry+1} for {url}")
-                        await asyncio.sleep(wait_time)
-                        return await fetch_content(session, url, semaphore, retry + 1)
+    if policy is None:
+        policy = FixedDelayPolicy(MAX_CONCURRENT_REQUESTS, MIN_DELAY, MAX_DELAY)
+    if retries is None:
+        retries = RetryScheduler()
+    
+    headers = HEADERS
+    # Cache reads and writes share one SQLite connection; keep them off the event loop
+    cached = await asyncio.to_thread(cache.get, url) if cache is not None else None
+    if cached is not None:
+        if cache.is_fresh(cached):
+            await asyncio.to_thread(cache.hit, cached)
+            return cached.body
+        headers = {**HEADERS, **cached.conditional_headers()}
+    elif cache is not None and cache.offline:
+        logger.warning(f"Not in cache (offline): {url}", extra={"url": url})
+        return None
+    
+    while True:
+        # Circuit breaker and Retry-After pauses wait without holding a slot
+        await retries.wait_for_host(url)
+        await policy.wait_for_host(url)
+        status = retry_after = None
+        async with semaphore:  # Limit concurrent requests
+            # Random delay to avoid detection
+            await policy.wait(url)
+            
+            started = time.monotonic()
+            try:
+                async with session.get(url, headers=headers) as response:
+                    status = response.status
+                    if status == 200:
+                        content = await response.text()
+                        _record_fetch(policy, url, 200, time.monotonic() - started)
+                        retries.success(url)
+                        METRICS.inc("fetch_bytes_total", response.content_length or len(content.encode("utf-8")))
+                        if cache is not None:
+                            await asyncio.to_thread(cache.put, url, content, response.headers.get("ETag"),
+                                                    response.headers.get("Last-Modified"))
+                        return content
+                    if status == 304 and cached is not None:
+                        _record_fetch(policy, url, 304, time.monotonic() - started)
+                        retries.success(url)
+                        await asyncio.to_thread(cache.hit, cached, True)
+                        return cached.body
+                    if status == 429 or status >= 500:
+                        retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                    _record_fetch(policy, url, status, time.monotonic() - started, retry_after)
+                    if status == 429:  # Too Many Requests
+                        logger.warning(f"Rate limited: {url}", extra={"url": url, "status": 429})
                     else:
-                        print(f"Failed after {MAX_RETRIES} retries: {url}")
-                        return None
-                else:
-                    print(f"Error fetching {url}: HTTP {response.status}")
-                    if retry < MAX_RETRIES:
-                        # Linear backoff for other errors
-                        wait_time = 1 + retry + random.random()
-                        print(f"Waiting {wait_time:.2f}s before retry #{retry+1}")
-                        await asyncio.sleep(wait_time)
-                        return await fetch_content(session, url, semaphore, retry + 1)
-                    return None
-        except Exception as e:
-            print(f"Exception while fetching {url}: {e}")
-            if retry < MAX_RETRIES:
-                wait_time = 1 + retry + random.random()
-                print(f"Waiting {wait_time:.2f}s before retry #{retry+1}")
-                await asyncio.sleep(wait_time)
-                return await fetch_content(session, url, semaphore, retry + 1)
+                        logger.warning(f"Error fetching {url}: HTTP {status}", extra={"url": url, "status": status})
+            except Exception as e:
+                logger.warning(f"Exception while fetching {url}: {e}", extra={"url": url})
+                _record_fetch(policy, url, None, time.monotonic() - started)
+        
+        # The slot is free again while this URL waits for its retry
+        deadline = retries.schedule(url, retry, status, retry_after)
+        if deadline is None:
             return None
+        reason = "throttled" if status == 429 else "http_error" if status else "exception"
+        METRICS.inc("fetch_retries_total", reason=reason)
+        retry += 1
+        await retries.wait_until(deadline)
 
-def extract_product_data(product_card, timestamp):
+def with_site(fields, columns):
     """
-    Extracts product information from a collection card element.
+    Return key fields extended with SITE_FIELD when the data has that
+    column, so products of different sites never share a key.
+    """
+    return (SITE_FIELD, *fields) if SITE_FIELD in columns else tuple(fields)
+
+def extract_product_row(product_card):
+    """
+    Extracts product information from a collection card element as a
+    compact tuple ordered like PRODUCT_FIELDS (without the timestamp).
     """
-    # [Keep your existing extraction logic]
     try:
         product_title = product_card.find('h3', class_='product-title').text.strip()
     except AttributeError:
@@ -106,117 +176,400 @@ def extract_product_data(product_card, timestamp):
             elif "Gender:" in text:
                 gender = text
     
-    product = {
-        "Title": product_title,
-        "Price": price,
-        "Rating": rating,
-        "Colors": colors,
-        "Size": size,
-        "Gender": gender,
-        "Scraped_At": timestamp
-    }
+    return (product_title, price, rating, colors, size, gender)
+
+def product_from_row(row, timestamp):
+    """
+    Build the product dict for a row returned by extract_product_row.
+    """
+    product = dict(zip(PRODUCT_FIELDS, row))
+    product["Scraped_At"] = timestamp
     return product
 
-async def process_page(session, url, semaphore, page_num, total_pages):
+class ProductColumns:
+    """
+    Column-wise product accumulator: one list per PRODUCT_FIELDS column and
+    one Scraped_At timestamp per run of rows (a page) instead of a 7-key
+    dict per product. The label columns repeat a handful of strings, which
+    are interned so each distinct value is stored once.
+    Iterating or indexing yields product_from_row dicts for code that wants
+    records; to_frame() builds the DataFrame straight from the columns.
+    complete is set by a crawl that fetched every page up to the catalog end.
+    sites holds each row's SITE_FIELD once products of a named site were added.
+    """
+    __slots__ = ("columns", "timestamps", "counts", "_labels", "complete", "sites")
+
+    # Columns holding repeated label text ("Size: M", "3 Colors", ...)
+    LABEL_COLUMNS = (2, 3, 4, 5)
+
+    def __init__(self):
+        self.columns = tuple([] for _ in PRODUCT_FIELDS)
+        self.timestamps = []
+        self.counts = []
+        self._labels = {}
+        self.complete = False
+        self.sites = None
+
+    @classmethod
+    def from_rows(cls, rows, timestamp):
+        products = cls()
+        products.add_rows(rows, timestamp)
+        return products
+
+    def _add_timestamp(self, timestamp, count):
+        if self.timestamps and self.timestamps[-1] == timestamp:
+            self.counts[-1] += count
+        else:
+            self.timestamps.append(timestamp)
+            self.counts.append(count)
+
+    def add_rows(self, rows, timestamp):
+        """Append extract_product_row tuples scraped at timestamp."""
+        if not rows:
+            return
+        labels = self._labels
+        for i, values in enumerate(zip(*rows)):
+            if i in self.LABEL_COLUMNS:
+                values = [labels.setdefault(value, value) for value in values]
+            self.columns[i].extend(values)
+        self._add_timestamp(timestamp, len(rows))
+        if self.sites is not None:
+            self.sites.extend([None] * len(rows))
+
+    def extend(self, products, site=None):
+        """
+        Append another ProductColumns, or product dicts (checkpointed pages),
+        as products of site when given.
+        """
+        before = len(self)
+        self._extend(products)
+        count = len(self) - before
+        sites = [site] * count if site is not None else getattr(products, "sites", None)
+        if sites is None and self.sites is None:
+            return
+        if self.sites is None:
+            self.sites = [None] * before
+        self.sites[before:] = sites if sites is not None else [None] * count
+
+    def _extend(self, products):
+        if isinstance(products, ProductColumns):
+            for i, (column, values) in enumerate(zip(self.columns, products.columns)):
+                if i in self.LABEL_COLUMNS:
+                    values = [self._labels.setdefault(value, value) for value in values]
+                column.extend(values)
+            for timestamp, count in zip(products.timestamps, products.counts):
+                self._add_timestamp(timestamp, count)
+            return
+        for product in products:
+            self.add_rows([tuple(product.get(field) for field in PRODUCT_FIELDS)], product.get("Scraped_At"))
+
+    def __len__(self):
+        return len(self.columns[0])
+
+    def _record(self, index, timestamp):
+        product = {field: column[index] for field, column in zip(PRODUCT_FIELDS, self.columns)}
+        product["Scraped_At"] = timestamp
+        if self.sites is not None:
+            product[SITE_FIELD] = self.sites[index]
+        return product
+
+    def __iter__(self):
+        start = 0
+        for timestamp, count in zip(self.timestamps, self.counts):
+            for index in range(start, start + count):
+                yield self._record(index, timestamp)
+            start += count
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("product index out of range")
+        start = 0
+        for timestamp, count in zip(self.timestamps, self.counts):
+            if index < start + count:
+                return self._record(index, timestamp)
+            start += count
+
+    def to_frame(self):
+        """Return the products as a DataFrame with PRODUCT_FIELDS, Scraped_At and any SITE_FIELD columns."""
+        import numpy as np
+        import pandas as pd
+        data = dict(zip(PRODUCT_FIELDS, self.columns))
+        data["Scraped_At"] = np.repeat(np.array(self.timestamps, dtype=object), self.counts)
+        if self.sites is not None:
+            data[SITE_FIELD] = self.sites
+        return pd.DataFrame(data)
+
+def extract_product_data(product_card, timestamp):
+    """
+    Extracts product information from a collection card element.
+    """
+    return product_from_row(extract_product_row(product_card), timestamp)
+
+def _page_part(class_value):
+    """
+    SoupStrainer rule that keeps only the product grid and the next-page link.
+    """
+    return class_value is not None and not PAGE_PART_CLASSES.isdisjoint(class_value.split())
+
+def check_parser(parser):
+    """
+    Raise ValueError if the parser backend is unknown or not installed.
+    """
+    if parser not in PARSERS:
+        raise ValueError(f"Unknown parser backend: {parser} (choose from {', '.join(PARSERS)})")
+    from bs4.builder import builder_registry
+    builder, _ = PARSERS[parser]
+    if builder_registry.lookup(builder) is None:
+        raise ValueError(f"Parser backend {parser} is not installed (pip install {builder})")
+
+def parse_page_rows(content, parser="html.parser"):
+    """
+    Parse a catalog page into (rows, grid_found, next_page_exists) where rows
+    are extract_product_row tuples. Kept as a plain module-level function with
+    picklable results so it can run in worker threads or processes; every
+    backend yields the same rows.
+    """
+    # Imported here so only the extract stage (and its workers) pay for bs4
+    from bs4 import BeautifulSoup, SoupStrainer
+    builder, strained = PARSERS[parser]
+    if strained:
+        soup = BeautifulSoup(content, builder, parse_only=SoupStrainer(class_=_page_part))
+    else:
+        soup = BeautifulSoup(content, builder)
+    
+    collection_grid = soup.find('div', class_='collection-grid', id='collectionList')
+    if not collection_grid:
+        return [], False, False
+    
+    product_cards = collection_grid.find_all('div', class_='collection-card')
+    rows = [extract_product_row(card) for card in product_cards]
+    
+    next_button = soup.find('li', class_='page-item next')
+    next_page_exists = bool(next_button and next_button.find('a'))
+    return rows, True, next_page_exists
+
+def parse_page(content, timestamp, parser="html.parser"):
+    """
+    Parse a catalog page into (products, grid_found, next_page_exists).
+    """
+    rows, grid_found, next_page_exists = parse_page_rows(content, parser)
+    return [product_from_row(row, timestamp) for row in rows], grid_found, next_page_exists
+
+async def process_page(session, url, semaphore, page_num, total_pages, policy=None,
+                       parser="html.parser", executor=None, cache=None, retries=None):
     """
     Process a single page: fetch HTML content and extract product data.
+    Parsing runs in `executor` (the loop's default thread pool when None,
+    or a ProcessPoolExecutor for multi-core parsing) so it never blocks
+    other in-flight fetches; workers only send back compact row tuples.
+    next_page_exists is None when the page could not be fetched.
     """
     page_start_time = datetime.now()
-    print(f"[{page_num}/{total_pages}] Fetching page at: {page_start_time.strftime('%Y-%m-%d %H:%M:%S')}")
-    print(f"URL: {url}")
+    logger.info(f"[{page_num}/{total_pages}] Fetching page at: {page_start_time.strftime('%Y-%m-%d %H:%M:%S')}")
+    logger.info(f"URL: {url}")
     
-    content = await fetch_content(session, url, semaphore)
+    content = await fetch_content(session, url, semaphore, policy=policy, cache=cache, retries=retries)
     page_products = []
-    next_page_exists = False
+    next_page_exists = None
     
     if content:
-        soup = BeautifulSoup(content, "html.parser")
-        collection_grid = soup.find('div', class_='collection-grid', id='collectionList')
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        loop = asyncio.get_running_loop()
+        with METRICS.timer("parse_seconds", parser=parser):
+            rows, grid_found, next_page_exists = await loop.run_in_executor(
+                executor, parse_page_rows, content, parser
+            )
+        page_products = ProductColumns.from_rows(rows, timestamp)
         
-        if collection_grid:
-            product_cards = collection_grid.find_all('div', class_='collection-card')
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            
-            print(f"Found {len(product_cards)} products on page {page_num}")
-            
-            for card in product_cards:
-                product = extract_product_data(card, timestamp)
-                page_products.append(product)
-            
-            next_button = soup.find('li', class_='page-item next')
-            if next_button and next_button.find('a'):
-                next_page_exists = True
+        if grid_found:
+            logger.info(f"Found {len(page_products)} products on page {page_num}",
+                        extra={"page": page_num, "products": len(page_products)})
         else:
-            print(f"No collection grid found on page {page_num}")
+            logger.warning(f"No collection grid found on page {page_num}", extra={"page": page_num})
     else:
-        print(f"Failed to fetch content from {url} (page {page_num})")
+        logger.error(f"Failed to fetch content from {url} (page {page_num})",
+                     extra={"url": url, "page": page_num})
     
     return page_products, next_page_exists
 
-async def scrape_pages_batch(session, base_url, semaphore, start_page, end_page):
+def page_url(base_url, page_num):
     """
-    Scrape a batch of pages and return their products.
+    Return the URL of a catalog page; the first page lives at the root of
+    the site base_url points to.
     """
-    tasks = []
-    total_pages = end_page - start_page + 1
-    
-    for page_num in range(start_page, end_page + 1):
-        if page_num == 1:
-            url = 'https://fashion-studio.dicoding.dev/'  # First page
-        else:
-            url = base_url.format(page_num)  # Subsequent pages
-        
-        task = process_page(session, url, semaphore, page_num, total_pages)
-        tasks.append(task)
-    
-    # Process pages in parallel, respecting the semaphore limit
-    results = await asyncio.gather(*tasks)
+    if page_num == 1:
+        return urljoin(base_url, "/")
+    return base_url.format(page_num)
+
+async def scrape_pages_window(session, base_url, semaphore, max_pages, window, page_queue=None,
+                              policy=None, parser="html.parser", executor=None, cache=None,
+                              checkpoint=None, retries=None, first_page=1):
+    """
+    Keep up to `window` pages in flight without batch barriers, crawling
+    pages first_page..max_pages.
+    As soon as a page reports no next link (or has no collection grid) no
+    further pages are requested and speculative fetches past the end are
+    cancelled. Returns the products in page order, merged into one
+    ProductColumns, and the last page number. The products are complete
+    when the catalog end was seen and no page up to it failed.
+    When page_queue is given, each page's products are put on it in page
+    order as soon as all earlier pages are done.
+    With a CrawlCheckpoint (utils.checkpoint), pages it already holds are
+    replayed instead of fetched and every newly fetched page is recorded.
+    """
+    results = {}
+    in_flight = {}
+    cancelled = []
+    next_page = first_page
+    next_to_publish = first_page
+    last_page = max_pages
+    end_found = False
+    failed = set()
     
-    # Flatten the list of products
-    all_products = []
-    for products, _ in results:
-        all_products.extend(products)
+    try:
+        while in_flight or next_page <= last_page:
+            while next_page <= last_page and len(in_flight) < window:
+                if checkpoint is not None and next_page in checkpoint.pages:
+                    task = asyncio.create_task(checkpoint.replay(next_page))
+                else:
+                    task = asyncio.create_task(process_page(
+                        session, page_url(base_url, next_page), semaphore, next_page, max_pages,
+                        policy, parser, executor, cache, retries
+                    ))
+                in_flight[task] = next_page
+                next_page += 1
+            
+            done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                # Pages past a newly found end were already dropped from in_flight
+                page_num = in_flight.pop(task, None)
+                if page_num is None or page_num > last_page:
+                    continue
+                products, next_page_exists = task.result()
+                results[page_num] = products
+                if checkpoint is not None:
+                    checkpoint.record(page_num, products, next_page_exists)
+                
+                # None means the fetch failed, which says nothing about the catalog end
+                if next_page_exists is None:
+                    failed.add(page_num)
+                elif next_page_exists is False:
+                    end_found = True
+                    end_page = page_num if products else page_num - 1
+                    if end_page < last_page:
+                        last_page = end_page
+                        logger.info(f"Catalog ends at page {last_page}, stopping pagination")
+                        for other, other_num in list(in_flight.items()):
+                            if other_num > last_page:
+                                other.cancel()
+                                del in_flight[other]
+                                cancelled.append(other)
+            
+            # Publish finished pages in order; streamed pages only keep their count
+            if page_queue is not None:
+                while next_to_publish <= last_page and next_to_publish in results:
+                    products = results[next_to_publish]
+                    if products:
+                        await page_queue.put(products)
+                    results[next_to_publish] = len(products)
+                    next_to_publish += 1
+    finally:
+        for task in in_flight:
+            task.cancel()
+        await asyncio.gather(*in_flight, *cancelled, return_exceptions=True)
     
-    return all_products
+    pages = [results[page_num] for page_num in sorted(results) if page_num <= last_page]
+    if page_queue is not None:
+        return sum(pages), last_page
+    products = ProductColumns()
+    for page in pages:
+        products.extend(page)
+    products.complete = end_found and not any(page_num <= last_page for page_num in failed)
+    return products, last_page
 
-async def scrape_product_async(base_url, max_pages=50, batch_size=10):
+async def scrape_product_async(base_url, max_pages=50, window=None, page_queue=None, rate_limit=None,
+                               parser="html.parser", parse_workers=0, executor=None, cache=None,
+                               checkpoint=None, retries=None, sessions=None, first_page=1):
     """
-    Asynchronously scrapes product data from paginated pages with batching.
+    Asynchronously scrapes product data from paginated pages.
+    Up to `window` pages (default: the policy's max concurrency) are kept in
+    flight and pagination stops at the last catalog page.
+    Products are collected column-wise in a ProductColumns. When page_queue
+    is given, they are streamed through it page by page instead of being
+    collected, and an empty list is returned.
+    rate_limit is a RateLimitPolicy from utils.ratelimit; by default the
+    fixed MAX_CONCURRENT_REQUESTS / MIN_DELAY..MAX_DELAY behaviour is used.
+    parser selects the HTML parser backend (see PARSERS). Pages are parsed
+    in `executor` if given, else in a pool of `parse_workers` processes kept
+    for the whole crawl, else in the default thread pool.
+    cache is an optional utils.cache.ResponseCache shared by all fetches;
+    checkpoint an optional utils.checkpoint.CrawlCheckpoint to resume from
+    and record completed pages in. retries is the utils.retry.RetryScheduler
+    shared by all fetches of the crawl (a default one when None).
+    sessions is a utils.session.SessionFactory whose shared session is
+    reused, keeping its connections alive for later crawls; without one a
+    factory is made for this crawl and closed at the end.
+    first_page starts the crawl further into the catalog, for crawls split
+    into page ranges (utils.crawlplan).
     """
-    all_products = []
+    check_parser(parser)
+    if rate_limit is None:
+        rate_limit = FixedDelayPolicy(MAX_CONCURRENT_REQUESTS, MIN_DELAY, MAX_DELAY)
+    if window is None:
+        window = rate_limit.max_concurrent
+    if retries is None:
+        retries = RetryScheduler()
+    
     scraping_start_time = datetime.now()
-    print(f"Scraping started at: {scraping_start_time.strftime('%Y-%m-%d %H:%M:%S')}")
-    print(f"Will scrape up to {max_pages} pages in batches of {batch_size}")
+    logger.info(f"Scraping started at: {scraping_start_time.strftime('%Y-%m-%d %H:%M:%S')}")
+    logger.info(f"Will scrape up to {max_pages - first_page + 1} pages with {window} in flight")
     
-    # Create a semaphore to limit concurrent requests
-    semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+    # The policy's limiter bounds concurrent requests
+    semaphore = rate_limit.limiter()
     
-    # Use a longer timeout and more aggressive connection pooling for many requests
-    conn = aiohttp.TCPConnector(limit=MAX_CONCURRENT_REQUESTS, ttl_dns_cache=300)
-    timeout = aiohttp.ClientTimeout(total=30*60, connect=30, sock_read=30)
+    # Keep-alive connections sized for the policy's concurrency
+    own_sessions = sessions is None
+    if own_sessions:
+        sessions = SessionFactory(limit=rate_limit.max_concurrent)
     
-    async with aiohttp.ClientSession(connector=conn, timeout=timeout) as session:
-        # Process pages in batches to avoid creating too many tasks at once
-        for batch_start in range(1, max_pages + 1, batch_size):
-            batch_end = min(batch_start + batch_size - 1, max_pages)
-            print(f"\n--- Processing batch of pages {batch_start}-{batch_end} ---")
-            
-            batch_products = await scrape_pages_batch(
-                session, base_url, semaphore, batch_start, batch_end
-            )
-            
-            all_products.extend(batch_products)
-            print(f"Total products scraped so far: {len(all_products)}")
-            
-            # Short pause between batches
-            if batch_end < max_pages:
-                print(f"Pausing between batches...")
-                await asyncio.sleep(random.uniform(2, 5))
+    own_executor = executor is None and parse_workers > 0
+    if own_executor:
+        executor = ProcessPoolExecutor(max_workers=parse_workers)
+        logger.info(f"Parsing pages in {parse_workers} worker processes")
+    
+    try:
+        scraped, last_page = await scrape_pages_window(
+            sessions.session(), base_url, semaphore, max_pages, window, page_queue=page_queue,
+            policy=rate_limit, parser=parser, executor=executor, cache=cache,
+            checkpoint=checkpoint, retries=retries, first_page=first_page
+        )
+    finally:
+        if own_sessions:
+            await sessions.close()
+        if own_executor:
+            executor.shutdown(cancel_futures=True)
+    
+    all_products = [] if page_queue is not None else scraped
+    total_products = scraped if page_queue is not None else len(scraped)
     
     scraping_end_time = datetime.now()
-    print(f"\nScraping finished at: {scraping_end_time.strftime('%Y-%m-%d %H:%M:%S')}")
-    print(f"Total scraping time: {scraping_end_time - scraping_start_time}")
-    print(f"Total products scraped: {len(all_products)}")
+    logger.info(f"\nScraping finished at: {scraping_end_time.strftime('%Y-%m-%d %H:%M:%S')}")
+    logger.info(f"Total scraping time: {scraping_end_time - scraping_start_time}",
+                extra={"seconds": (scraping_end_time - scraping_start_time).total_seconds()})
+    pages_scraped = max(0, last_page - first_page + 1)
+    logger.info(f"Pages scraped: {pages_scraped}", extra={"pages": pages_scraped})
+    logger.info(f"Total products scraped: {total_products}", extra={"products": total_products})
+    for line in rate_limit.report():
+        logger.info(line)
+    for line in retries.report():
+        logger.info(line)
+    for line in sessions.report():
+        logger.info(line)
+    if cache is not None:
+        for line in cache.report():
+            logger.info(line)
     
     return all_products
 
@@ -227,26 +580,27 @@ async def main_async():
     Asynchronous main function to execute the scraping process.
     """
     BASE_URL = 'https://fashion-studio.dicoding.dev/page{}'
-    all_products = await scrape_product_async(BASE_URL, max_pages=50, batch_size=5)
+    all_products = await scrape_product_async(BASE_URL, max_pages=50)
     
     if all_products:
-        df = pd.DataFrame(all_products)
-        print("\nScraping Results:")
-        print(f"Total products scraped: {len(df)}")
-        print(f"Products from {df['Scraped_At'].min()} to {df['Scraped_At'].max()}")
+        df = all_products.to_frame()
+        logger.info("\nScraping Results:")
+        logger.info(f"Total products scraped: {len(df)}")
+        logger.info(f"Products from {df['Scraped_At'].min()} to {df['Scraped_At'].max()}")
         
         # Save to CSV with timestamp
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         csv_filename = f"fashion_products_{timestamp}.csv"
         df.to_csv(csv_filename, index=False)
-        print(f"\nResults saved to {csv_filename}")
+        logger.info(f"\nResults saved to {csv_filename}")
     else:
-        print("No products were scraped.")
+        logger.warning("No products were scraped.")
 
 def main():
     """
     Entry point that runs the async main function.
     """
+    configure_logging()
     asyncio.run(main_async())
 
 if __name__ == '__main__':
@@ -0,0 +1,310 @@
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta
+
+# Database --format history appends to and the query CLI reads by default
+HISTORY_PATH = "fashion_history.sqlite3"
+
+# Transformed columns kept per observation, in table order
+HISTORY_COLUMNS = ("Title", "Price", "Rating", "Colors", "Size", "Gender", "Scraped_At", "Site")
+
+# Rows per executemany call when appending a frame
+APPEND_CHUNK_SIZE = 10_000
+
+# Scraped_On is the date partition key: each day's rows sit together in its index
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    Scraped_On TEXT NOT NULL,
+    Title TEXT, Price REAL, Rating REAL, Colors INTEGER, Size TEXT, Gender TEXT,
+    Scraped_At TEXT NOT NULL, Site TEXT
+);
+CREATE INDEX IF NOT EXISTS products_day ON products (Scraped_On);
+CREATE INDEX IF NOT EXISTS products_title ON products (Title, Scraped_At);
+CREATE INDEX IF NOT EXISTS products_gender_price ON products (Gender, Price, Scraped_On);
+CREATE INDEX IF NOT EXISTS products_price ON products (Price, Scraped_On);
+CREATE TABLE IF NOT EXISTS imports (path TEXT PRIMARY KEY, rows INTEGER NOT NULL, imported_at TEXT NOT NULL);
+"""
+
+
+def parse_time(value, now=None):
+    """
+    Parse a query bound: "YYYY-MM-DD", "YYYY-MM-DD HH:MM:SS" or a relative
+    "<N>d"/"<N>h" before now. Returns the stored text form; date-only
+    values stay dates so they select whole day partitions.
+    """
+    value = value.strip()
+    if value[:-1].isdigit() and value[-1:] in ("d", "h"):
+        delta = timedelta(days=int(value[:-1])) if value[-1] == "d" else timedelta(hours=int(value[:-1]))
+        return ((now or datetime.now()) - delta).strftime("%Y-%m-%d %H:%M:%S")
+    for fmt in ("%Y-%m-%d", "%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S"):
+        try:
+            parsed = datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+        return parsed.strftime("%Y-%m-%d" if fmt == "%Y-%m-%d" else "%Y-%m-%d %H:%M:%S")
+    raise ValueError(f"Invalid time {value!r}: use YYYY-MM-DD, 'YYYY-MM-DD HH:MM:SS', Nd or Nh")
+
+
+class HistoryStore:
+    """
+    Local analytics store of every loaded product observation, kept in
+    SQLite next to the exports.
+
+    append() adds one run's transformed frame; rows are never updated, so
+    the table is the full scrape history. Reads go through indexes on the
+    scrape date (the partition key), Title and Gender/Price instead of
+    re-parsing historical CSV exports. Module imports are stdlib only, so
+    queries answer without loading pandas.
+    """
+
+    def __init__(self, path=HISTORY_PATH):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        # append runs in a worker thread via asyncio.to_thread
+        self._db = sqlite3.connect(path, timeout=60, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+        # Stores created before products carried the site of a multi-site plan
+        if "Site" not in [row["name"] for row in self._db.execute("PRAGMA table_info(products)")]:
+            self._db.execute("ALTER TABLE products ADD COLUMN Site TEXT")
+        self._appended = False
+
+    def append(self, df, chunk_size=APPEND_CHUNK_SIZE):
+        """
+        Append a transformed frame (SCHEMA columns) in one transaction and
+        return the rows added. Delete rows of an incremental delta carry no
+        observation and are skipped.
+        """
+        with self._db:
+            rows = self._insert(df, chunk_size)
+        self._appended = self._appended or rows > 0
+        return rows
+
+    def _insert(self, df, chunk_size=APPEND_CHUNK_SIZE):
+        """Insert a frame's rows in the open transaction without committing."""
+        if "Change" in df.columns:
+            df = df[df["Change"] != "delete"]
+        if df.empty:
+            return 0
+        scraped_at = df["Scraped_At"].dt.strftime("%Y-%m-%d %H:%M:%S")
+        frame = df.reindex(columns=list(HISTORY_COLUMNS)).assign(Scraped_At=scraped_at)
+        # Widen float32 ratings through their shortest repr so 1.4 is not stored as 1.39999997
+        frame["Rating"] = frame["Rating"].astype(str).astype("float64")
+        frame.insert(0, "Scraped_On", scraped_at.str[:10])
+        # None for every missing value (NaN, NA, NaT) so SQLite stores NULL
+        frame = frame.astype(object).where(frame.notna(), None)
+        placeholders = ", ".join("?" * len(frame.columns))
+        for start in range(0, len(frame), chunk_size):
+            rows = frame.iloc[start:start + chunk_size].itertuples(index=False, name=None)
+            self._db.executemany(f"INSERT INTO products VALUES ({placeholders})", rows)
+        return len(frame)
+
+    def import_exports(self, directory, exchange_rate=None):
+        """
+        Backfill the CSV exports in directory (raw or transformed, as
+        --reprocess reads them), skipping files imported before. Transformed
+        exports are taken to be in IDR at exchange_rate already. Each file's
+        rows and its imports entry commit together, so an interrupted import
+        leaves the file to be imported again in full. Returns the rows added.
+        """
+        from utils.reprocess import CHUNK_ROWS, find_exports, is_raw_export, read_export, transform_export
+        from utils.transform import EXCHANGE_RATE
+
+        exchange_rate = exchange_rate or EXCHANGE_RATE
+        added = 0
+        for path in find_exports(directory):
+            name = os.path.abspath(path)
+            if self._db.execute("SELECT 1 FROM imports WHERE path = ?", (name,)).fetchone():
+                continue
+            raw = is_raw_export(path)
+            with self._db:
+                rows = sum(self._insert(transform_export(chunk, exchange_rate, exchange_rate, raw))
+                           for chunk in read_export(path, CHUNK_ROWS))
+                self._db.execute("INSERT INTO imports VALUES (?, ?, ?)",
+                                 (name, rows, datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+            self._appended = self._appended or rows > 0
+            added += rows
+        return added
+
+    def _select(self, title=None, title_like=None, gender=None, size=None, site=None, min_price=None,
+                max_price=None, since=None, until=None, latest=False, limit=None):
+        """Build the SQL and parameters of a query()."""
+        where, params = [], []
+        for column, value in (("Title", title), ("Gender", gender), ("Size", size), ("Site", site)):
+            if value is not None:
+                where.append(f"{column} = ?")
+                params.append(value)
+        if title_like is not None:
+            where.append("Title LIKE ?")
+            params.append(f"%{title_like}%")
+        if min_price is not None:
+            where.append("Price >= ?")
+            params.append(min_price)
+        if max_price is not None:
+            where.append("Price <= ?")
+            params.append(max_price)
+        # Date bounds prune day partitions; times then narrow within the edge days
+        for bound, op in ((since, ">="), (until, "<=")):
+            if bound is not None:
+                where.append(f"Scraped_On {op} ?")
+                params.append(bound[:10])
+                if len(bound) > 10:
+                    where.append(f"Scraped_At {op} ?")
+                    params.append(bound)
+        condition = f" WHERE {' AND '.join(where)}" if where else ""
+        columns = ", ".join(HISTORY_COLUMNS)
+        if latest:
+            sql = (f"SELECT {columns} FROM (SELECT {columns}, ROW_NUMBER() OVER ("
+                   f"PARTITION BY Title, Size, Gender, Site ORDER BY Scraped_At DESC) AS n FROM products{condition})"
+                   f" WHERE n = 1 ORDER BY Title, Size, Gender, Site")
+        else:
+            sql = f"SELECT {columns} FROM products{condition} ORDER BY Scraped_At, Title"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return sql, params
+
+    def query(self, title=None, title_like=None, gender=None, size=None, site=None, min_price=None,
+              max_price=None, since=None, until=None, latest=False, limit=None):
+        """
+        Return matching observations as dicts, oldest first. since/until
+        take parse_time() values; with latest only the newest observation of
+        each product (Title, Size, Gender, Site) is returned.
+        """
+        sql, params = self._select(title, title_like, gender, size, site, min_price, max_price,
+                                   since, until, latest, limit)
+        return [dict(row) for row in self._db.execute(sql, params)]
+
+    def price_history(self, title, size=None, gender=None):
+        """Return (Scraped_At, Price, Size, Gender) observations of a product, oldest first."""
+        sql = "SELECT Scraped_At, Price, Size, Gender FROM products WHERE Title = ?"
+        params = [title]
+        for column, value in (("Size", size), ("Gender", gender)):
+            if value is not None:
+                sql += f" AND {column} = ?"
+                params.append(value)
+        return [dict(row) for row in self._db.execute(sql + " ORDER BY Scraped_At", params)]
+
+    def explain(self, **filters):
+        """Return SQLite's query plan for query(**filters), one line per step."""
+        sql, params = self._select(**filters)
+        return [row["detail"] for row in self._db.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+    def days(self):
+        """Return the rows stored per scrape date, oldest first."""
+        return [dict(row) for row in self._db.execute(
+            "SELECT Scraped_On, COUNT(*) AS rows FROM products GROUP BY Scraped_On ORDER BY Scraped_On"
+        )]
+
+    def to_frame(self, rows):
+        """Return query rows as a DataFrame with the transformed SCHEMA dtypes."""
+        import pandas as pd
+        from utils.transform import apply_schema
+
+        return apply_schema(pd.DataFrame(rows))
+
+    def close(self):
+        if self._appended:
+            # Refresh planner statistics for the new rows
+            self._db.execute("PRAGMA optimize")
+        self._db.close()
+
+
+def _print_rows(rows, output_format, out):
+    if output_format == "json":
+        for row in rows:
+            out.write(json.dumps(row, ensure_ascii=False) + "\n")
+        return
+    if not rows:
+        return
+    if output_format == "csv":
+        writer = csv.DictWriter(out, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+        return
+    table = [list(rows[0])] + [["" if value is None else str(value) for value in row.values()] for row in rows]
+    widths = [max(len(line[i]) for line in table) for i in range(len(table[0]))]
+    for line in table:
+        out.write("  ".join(value.ljust(width) for value, width in zip(line, widths)).rstrip() + "\n")
+
+
+def main(argv=None):
+    """Query CLI: python -m utils.history [--db PATH] {query,price-history,days,import} ..."""
+    parser = argparse.ArgumentParser(prog="python -m utils.history",
+                                     description="Query the scrape history written by main.py --format history")
+    parser.add_argument("--db", default=HISTORY_PATH, help=f"History database (default: {HISTORY_PATH})")
+    parser.add_argument("--output", choices=["table", "csv", "json"], default="table",
+                        help="Result format; json writes one object per line (default: table)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    query = commands.add_parser("query", help="Observations matching filters")
+    query.add_argument("--title", help="Exact product title")
+    query.add_argument("--title-like", metavar="TEXT", help="Titles containing TEXT")
+    query.add_argument("--gender")
+    query.add_argument("--size")
+    query.add_argument("--site", help="Source site of a multi-site crawl plan")
+    query.add_argument("--min-price", type=float, help="Minimum price (IDR)")
+    query.add_argument("--max-price", type=float, help="Maximum price (IDR)")
+    query.add_argument("--since", help="YYYY-MM-DD, 'YYYY-MM-DD HH:MM:SS' or relative like 7d or 12h")
+    query.add_argument("--until", help="Same forms as --since; a date includes the whole day")
+    query.add_argument("--latest", action="store_true", help="Only the newest observation of each product")
+    query.add_argument("--limit", type=int)
+    query.add_argument("--explain", action="store_true", help="Print the query plan instead of rows")
+
+    history = commands.add_parser("price-history", help="Price observations of one product")
+    history.add_argument("title")
+    history.add_argument("--size")
+    history.add_argument("--gender")
+
+    commands.add_parser("days", help="Rows stored per scrape date")
+
+    backfill = commands.add_parser("import", help="Backfill historical CSV exports from a directory")
+    backfill.add_argument("directory", nargs="?", default=".")
+    backfill.add_argument("--exchange-rate", type=float, help="IDR per USD for raw exports (default: 16000)")
+    args = parser.parse_args(argv)
+
+    if args.command != "import" and not os.path.exists(args.db):
+        parser.error(f"No history database at {args.db}; load one with main.py --format history")
+    store = HistoryStore(args.db)
+    started = time.perf_counter()
+    try:
+        if args.command == "query":
+            try:
+                filters = {
+                    "title": args.title, "title_like": args.title_like, "gender": args.gender, "size": args.size,
+                    "site": args.site,
+                    "min_price": args.min_price, "max_price": args.max_price,
+                    "since": parse_time(args.since) if args.since else None,
+                    "until": parse_time(args.until) if args.until else None,
+                    "latest": args.latest, "limit": args.limit,
+                }
+            except ValueError as e:
+                parser.error(str(e))
+            if args.explain:
+                print("\n".join(store.explain(**filters)))
+                return 0
+            rows = store.query(**filters)
+        elif args.command == "import":
+            added = store.import_exports(args.directory, args.exchange_rate)
+            print(f"Imported {added} rows into {args.db}", file=sys.stderr)
+            return 0
+        elif args.command == "price-history":
+            rows = store.price_history(args.title, args.size, args.gender)
+        else:
+            rows = store.days()
+    finally:
+        store.close()
+    _print_rows(rows, args.output, sys.stdout)
+    print(f"{len(rows)} rows in {(time.perf_counter() - started) * 1000:.1f}ms", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
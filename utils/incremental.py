@@ -0,0 +1,165 @@
+import os
+import sqlite3
+import pandas as pd
+from utils.extract import PRODUCT_FIELDS, SITE_FIELD, ProductColumns, with_site
+from utils.transform import _by_value, _strip_label, apply_schema
+
+# Raw fields identifying a product; the other fields only change its content
+IDENTITY_FIELDS = ("Title", "Size", "Gender")
+
+# Fixed key for pd.util.hash_pandas_object so fingerprints are stable across runs
+HASH_KEY = "etl-dicoding-fp1"
+
+# Values of the Change column in a delta
+INSERT, UPDATE, DELETE = "insert", "update", "delete"
+
+
+def fingerprint(df, fields):
+    """
+    Return a stable uint64 hash per row of the given columns.
+    """
+    return pd.util.hash_pandas_object(df[list(fields)], index=False, hash_key=HASH_KEY,
+                                      categorize=True).to_numpy()
+
+
+class Delta:
+    """
+    The outcome of FingerprintIndex.diff: raw rows of new and changed
+    products (with a Change column) and the raw identity of deleted ones.
+    """
+
+    def __init__(self, changed, deleted, keys, digests, deleted_keys):
+        self.changed = changed
+        self.deleted = deleted
+        self._keys = keys
+        self._digests = digests
+        self._deleted_keys = deleted_keys
+
+    def __len__(self):
+        return len(self.changed) + len(self.deleted)
+
+    def counts(self):
+        changes = self.changed["Change"].value_counts()
+        return {INSERT: int(changes.get(INSERT, 0)), UPDATE: int(changes.get(UPDATE, 0)),
+                DELETE: len(self.deleted)}
+
+    def deleted_rows(self, transformed=None):
+        """
+        Return the deleted products as rows of a transformed frame: cleaned
+        identity columns, Change set to "delete" and no other values.
+        Given the transformed changed rows, updated products the transform
+        dropped as invalid are deleted as well.
+        """
+        deleted = self.deleted
+        if transformed is not None:
+            dropped = ~self.changed.index.isin(transformed.index) & (self.changed["Change"] == UPDATE)
+            identity = list(with_site(IDENTITY_FIELDS, self.changed.columns))
+            deleted = pd.concat([deleted, self.changed.loc[dropped, identity]], ignore_index=True)
+        return deleted.assign(
+            Size=lambda frame: _by_value(frame["Size"], _strip_label("Size:")),
+            Gender=lambda frame: _by_value(frame["Gender"], _strip_label("Gender:")),
+            Change=DELETE,
+        )
+
+
+def delta_frame(transformed, delta):
+    """
+    Combine the transformed new and changed products (transform_data of
+    delta.changed) with the delete rows of a delta into one frame following
+    the compact SCHEMA.
+    """
+    frames = [frame for frame in (transformed, delta.deleted_rows(transformed)) if not frame.empty]
+    if not frames:
+        return transformed
+    combined = pd.concat(frames, ignore_index=True)
+    return apply_schema(combined).astype({"Change": "category"})
+
+
+class FingerprintIndex:
+    """
+    On-disk index of the last loaded state of every product, stored in
+    SQLite as (identity hash, content hash, raw identity fields). Products
+    of a multi-site crawl plan are identified per site (SITE_FIELD).
+
+    diff() compares a fresh crawl against it; commit() records a delta once
+    it has been loaded, writing only the rows that changed.
+    """
+
+    def __init__(self, path):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        # diff and commit run in worker threads via asyncio.to_thread
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS fingerprints ("
+            " key INTEGER PRIMARY KEY, digest INTEGER NOT NULL,"
+            " title TEXT, size TEXT, gender TEXT, site TEXT)"
+        )
+        # Indexes written before products carried a site
+        if "site" not in [row[1] for row in self._db.execute("PRAGMA table_info(fingerprints)")]:
+            self._db.execute("ALTER TABLE fingerprints ADD COLUMN site TEXT")
+        self._db.commit()
+
+    def _load(self):
+        index = pd.read_sql("SELECT key, digest, title, size, gender, site FROM fingerprints", self._db)
+        index.columns = ["key", "digest", *IDENTITY_FIELDS, SITE_FIELD]
+        return index.set_index("key")
+
+    def diff(self, raw_data, complete=False):
+        """
+        Fingerprint raw products (extract_product_data dicts, a frame such
+        as Deduplicator.filter returns, or a ProductColumns) and return the
+        Delta against the index. Products are identified by IDENTITY_FIELDS
+        (per SITE_FIELD when present) and compared on PRODUCT_FIELDS, so
+        Scraped_At alone never counts as a change; when a product appears
+        twice the last row wins. Indexed products missing from raw_data are
+        deleted only when complete says the crawl covered the whole catalog.
+        """
+        if isinstance(raw_data, ProductColumns):
+            df = raw_data.to_frame()
+        else:
+            df = pd.DataFrame(raw_data)
+            df = df.reindex(columns=[*PRODUCT_FIELDS, "Scraped_At", *([SITE_FIELD] if SITE_FIELD in df else [])])
+        identity = with_site(IDENTITY_FIELDS, df.columns)
+        # SQLite integers are signed, so hashes are stored as int64
+        keys = pd.Series(fingerprint(df, identity).view("int64"), index=df.index)
+        digests = pd.Series(fingerprint(df, PRODUCT_FIELDS).view("int64"), index=df.index)
+        latest = ~keys.duplicated(keep="last")
+        df, keys, digests = df[latest], keys[latest], digests[latest]
+
+        previous = self._load()
+        known = keys.isin(previous.index)
+        old_digests = previous["digest"].reindex(keys.to_numpy()).to_numpy()
+        changed = ~known | (digests.to_numpy() != old_digests)
+        change = pd.Series(INSERT, index=df.index).where(~known, UPDATE)
+
+        # Products missing from a partial crawl may still be listed, so only a complete one deletes
+        gone = ~previous.index.isin(keys) if complete else previous.index.isin(())
+        deleted = previous.loc[gone, list(identity)].reset_index(drop=True)
+        return Delta(
+            df[changed].assign(Change=change[changed]).reset_index(drop=True),
+            deleted,
+            keys[changed].tolist(),
+            digests[changed].tolist(),
+            previous.index[gone].tolist(),
+        )
+
+    def commit(self, delta):
+        """Record a loaded delta; only its changed and deleted keys are written."""
+        identities = delta.changed.reindex(columns=[*IDENTITY_FIELDS, SITE_FIELD]).astype(object)
+        identities = identities.where(identities.notna(), None).itertuples(index=False)
+        self._db.executemany(
+            "INSERT OR REPLACE INTO fingerprints VALUES (?, ?, ?, ?, ?, ?)",
+            [(key, digest, *identity) for key, digest, identity
+             in zip(delta._keys, delta._digests, identities)]
+        )
+        self._db.executemany("DELETE FROM fingerprints WHERE key = ?",
+                             [(key,) for key in delta._deleted_keys])
+        self._db.commit()
+
+    def __len__(self):
+        return self._db.execute("SELECT COUNT(*) FROM fingerprints").fetchone()[0]
+
+    def close(self):
+        self._db.close()
@@ -1,25 +1,568 @@
-import pandas as pd
+from collections import deque
 from datetime import datetime
 import os
 import asyncio
-import aiofiles
+import gzip
+import io
+import logging
+import tempfile
+from utils.extract import with_site
+from utils.history import HISTORY_PATH, HistoryStore
+from utils.metrics import METRICS
 
-async def save_to_csv(df, filename=None):
+logger = logging.getLogger(__name__)
+
+# Parquet compression codecs offered on the command line
+PARQUET_COMPRESSIONS = ("snappy", "zstd")
+
+# CSV compression codecs and the file suffix each one adds
+CSV_COMPRESSIONS = {"gzip": ".gz", "zstd": ".zst"}
+
+# Rows per CSV block; blocks are encoded and compressed independently
+CSV_CHUNK_SIZE = 100_000
+
+# Rows per Parquet row group for one-shot writes
+PARQUET_ROW_GROUP_SIZE = 64_000
+
+# Default target table and rows per COPY (or executemany) chunk for SQL loads
+SQL_TABLE = "fashion_products"
+SQL_CHUNK_SIZE = 10_000
+
+# Columns identifying a product (per SITE_FIELD when present); re-loading a
+# product updates its row
+PRODUCT_KEY = ("Title", "Size", "Gender")
+
+# SQLAlchemy column type names for the transformed columns
+SQL_TYPES = {
+    "Title": "Text",
+    "Price": "Float",
+    "Rating": "Float",
+    "Colors": "Integer",
+    "Size": "Text",
+    "Gender": "Text",
+    "Scraped_At": "DateTime",
+}
+
+# Pooled engines shared by every SQL load in the process, by URL
+_ENGINES = {}
+
+def default_filename(extension=".csv"):
+    """
+    Return a timestamped output filename with the given extension.
+    """
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return f"fashion_products_{timestamp}{extension}"
+
+def _saved(fmt, filename, rows):
+    """
+    Log a finished write and count its rows in load_rows_total.
+    """
+    METRICS.inc("load_rows_total", rows, format=fmt)
+    logger.info(f"Data saved to {filename}", extra={"format": fmt, "file": filename, "rows": rows})
+
+def _make_parent_dir(filename):
+    # Create directory if it doesn't exist
+    os.makedirs(os.path.dirname(filename) if os.path.dirname(filename) else '.', exist_ok=True)
+
+def _require_zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        raise ValueError("zstd compression requires zstandard: pip install zstandard")
+    return zstandard
+
+def csv_compression(filename, compression=None):
+    """
+    Return the CSV codec to use: compression if given, else the one implied
+    by the filename suffix (.gz, .zst), else None.
+    """
+    if compression is not None:
+        if compression not in CSV_COMPRESSIONS:
+            raise ValueError(f"Unsupported CSV compression: {compression} "
+                             f"(choose from {', '.join(CSV_COMPRESSIONS)})")
+        return compression
+    for codec, suffix in CSV_COMPRESSIONS.items():
+        if filename.endswith(suffix):
+            return codec
+    return None
+
+def _encode_csv_block(df, header, compression):
+    """
+    Encode one block of rows as CSV bytes, compressed as a self-contained
+    gzip member or zstd frame; concatenated blocks form one valid file.
+    Module-level so blocks can be encoded in worker processes.
+    """
+    data = df.to_csv(index=False, header=header).encode("utf-8")
+    if compression == "gzip":
+        return gzip.compress(data, compresslevel=6, mtime=0)
+    if compression == "zstd":
+        return _require_zstandard().ZstdCompressor(level=3).compress(data)
+    return data
+
+def _write_csv_blocks(df, filename, append, compression, chunk_size, executor):
+    """
+    Encode df in blocks of chunk_size rows (in executor when given, a few
+    blocks ahead of the writer) and write them in order.
+    A new file is written to a temporary file and renamed into place; an
+    append that fails is truncated back to the previous end of the file,
+    so readers never see a half-written export.
+    """
+    appending = append and os.path.exists(filename)
+    if appending:
+        f = open(filename, "ab")
+        rollback_size = f.tell()
+    else:
+        fd, temp_path = tempfile.mkstemp(prefix=".tmp-", dir=os.path.dirname(filename) or ".")
+        f = os.fdopen(fd, "wb")
+    
+    starts = range(0, len(df), chunk_size)
+    pending = deque()
+    # Blocks encoded ahead of the writer, enough to keep every core busy
+    ahead = 2 * (os.cpu_count() or 1)
+    try:
+        with f:
+            for start in starts:
+                args = (df.iloc[start:start + chunk_size], start == 0 and not appending, compression)
+                if executor is None:
+                    f.write(_encode_csv_block(*args))
+                    continue
+                pending.append(executor.submit(_encode_csv_block, *args))
+                if len(pending) >= ahead:
+                    f.write(pending.popleft().result())
+            while pending:
+                f.write(pending.popleft().result())
+    except BaseException:
+        for future in pending:
+            future.cancel()
+        if appending:
+            with open(filename, "r+b") as rollback:
+                rollback.truncate(rollback_size)
+        else:
+            os.remove(temp_path)
+        raise
+    if not appending:
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, filename)
+
+async def save_to_csv(df, filename=None, append=False, compression=None, chunk_size=CSV_CHUNK_SIZE,
+                      executor=None):
     """
     Save DataFrame to CSV file asynchronously.
+    With append=True rows are added to an existing file and the header is
+    only written when the file is new, so streamed chunks form a single CSV.
+    Rows are encoded in blocks of chunk_size, in parallel when executor (a
+    ProcessPoolExecutor) is given, and compressed with gzip or zstd when
+    compression is set or implied by a .gz/.zst filename. New files appear
+    atomically; failed appends are rolled back.
     """
     if df.empty:
-        print("No data to save")
+        logger.warning("No data to save")
         return None
-    
+
+    if filename is None:
+        filename = default_filename(".csv" + CSV_COMPRESSIONS.get(compression, ""))
+    compression = csv_compression(filename, compression)
+
+    _make_parent_dir(filename)
+
+    # Encoding isn't async, so the block writer runs in a thread
+    with METRICS.timer("load_seconds", format="csv"):
+        await asyncio.to_thread(_write_csv_blocks, df, filename, append, compression, chunk_size, executor)
+    _saved("csv", filename, len(df))
+    return filename
+
+async def save_to_jsonl(df, filename=None, append=False):
+    """
+    Save DataFrame as newline-delimited JSON, one record per line.
+    Timestamps are written in ISO format; with append=True records are
+    added to an existing file.
+    """
+    if df.empty:
+        logger.warning("No data to save")
+        return None
+
+    if filename is None:
+        filename = default_filename(".jsonl")
+
+    _make_parent_dir(filename)
+
+    mode = 'a' if append and os.path.exists(filename) else 'w'
+    with METRICS.timer("load_seconds", format="json"):
+        await asyncio.to_thread(df.to_json, filename, orient='records', lines=True,
+                                date_format='iso', mode=mode, force_ascii=False)
+    _saved("json", filename, len(df))
+    return filename
+
+def _require_pyarrow():
+    """
+    Import pyarrow for the Parquet loader, or raise ValueError if it is
+    not installed.
+    """
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ValueError("Parquet output needs pyarrow (pip install pyarrow)") from None
+    return pyarrow, pyarrow.parquet
+
+def _widen_compact(df):
+    """
+    Widen the SCHEMA columns whose compact dtype depends on the values
+    (Colors is Int8 unless a count needs Int16) to their widest form, so
+    every chunk of a streamed file shares one type.
+    """
+    from utils.transform import SCHEMA
+    narrow = [column for column, dtype in SCHEMA.items() if dtype == "Int8" and column in df
+              and str(df[column].dtype) == "Int8"]
+    return df.astype({column: "Int16" for column in narrow}) if narrow else df
+
+def _stream_schema(schema, pa):
+    """
+    Return the writer schema of a streamed Parquet file: the first chunk's,
+    with category columns given int32 dictionary indices, as pandas sizes
+    category codes by each chunk's number of labels.
+    """
+    fields = [field.with_type(pa.dictionary(pa.int32(), field.type.value_type))
+              if pa.types.is_dictionary(field.type) else field for field in schema]
+    return pa.schema(fields, metadata=schema.metadata)
+
+async def save_to_parquet(df, filename=None, compression="snappy", row_group_size=PARQUET_ROW_GROUP_SIZE):
+    """
+    Save DataFrame to a Parquet file in row groups of row_group_size rows.
+    The frame's dtypes (categories, nullable integers, timestamps) are kept.
+    """
+    if df.empty:
+        logger.warning("No data to save")
+        return None
+
+    _, pq = _require_pyarrow()
     if filename is None:
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"fashion_products_{timestamp}.csv"
+        filename = default_filename(".parquet")
+
+    _make_parent_dir(filename)
+
+    with METRICS.timer("load_seconds", format="parquet"):
+        await asyncio.to_thread(df.to_parquet, filename, engine='pyarrow', index=False,
+                                compression=compression, row_group_size=row_group_size)
+    _saved("parquet", filename, len(df))
+    return filename
+
+def _sqlalchemy():
+    """
+    Import SQLAlchemy on the first SQL load; file formats never need it.
+    """
+    import sqlalchemy
+    return sqlalchemy
+
+def get_engine(url):
+    """
+    Return the pooled SQLAlchemy engine for a database URL, creating it on
+    first use so repeated loads reuse open connections.
+    """
+    if url not in _ENGINES:
+        _ENGINES[url] = _sqlalchemy().create_engine(url, pool_size=4, max_overflow=4, pool_pre_ping=True)
+    return _ENGINES[url]
+
+def _product_table(table, columns, staging=False):
+    """
+    Build the SQLAlchemy table for the given frame columns, keyed by
+    PRODUCT_KEY; the staging variant is a keyless temporary table.
+    """
+    key = with_site(PRODUCT_KEY, columns)
+    missing = [column for column in key if column not in columns]
+    if missing:
+        raise ValueError(f"Cannot load into {table}: missing key columns {', '.join(missing)}")
+    sa = _sqlalchemy()
+    sql_columns = [sa.Column(column, getattr(sa, SQL_TYPES.get(column, "Text")), nullable=column not in key)
+                   for column in columns]
+    if staging:
+        return sa.Table(f"{table}_staging", sa.MetaData(), *sql_columns, prefixes=["TEMPORARY"])
+    return sa.Table(table, sa.MetaData(), *sql_columns, sa.PrimaryKeyConstraint(*key))
+
+def _sql_frame(df):
+    """
+    Prepare a frame for SQL: timestamps parsed, one row per product (the
+    last one wins, as ON CONFLICT may touch a row only once per statement).
+    """
+    import pandas as pd
+    from utils.transform import TIMESTAMP_FORMAT
+    if "Scraped_At" in df and not pd.api.types.is_datetime64_any_dtype(df["Scraped_At"]):
+        df = df.assign(Scraped_At=pd.to_datetime(df["Scraped_At"], format=TIMESTAMP_FORMAT))
+    return df.drop_duplicates(subset=list(with_site(PRODUCT_KEY, df.columns)), keep="last")
+
+def _copy_chunks(connection, staging, df, chunk_size):
+    """
+    Stream the frame into the staging table with COPY FROM STDIN, one CSV
+    buffer of chunk_size rows at a time (PostgreSQL/psycopg2 only).
+    """
+    preparer = connection.dialect.identifier_preparer
+    columns = ", ".join(preparer.quote(column) for column in df.columns)
+    sql = f"COPY {preparer.format_table(staging)} ({columns}) FROM STDIN WITH (FORMAT csv)"
+    cursor = connection.connection.cursor()
+    try:
+        for start in range(0, len(df), chunk_size):
+            buffer = io.StringIO()
+            df.iloc[start:start + chunk_size].to_csv(buffer, index=False, header=False)
+            buffer.seek(0)
+            cursor.copy_expert(sql, buffer)
+    finally:
+        cursor.close()
+
+def _insert_chunks(connection, staging, df, chunk_size):
+    """
+    Portable fallback for _copy_chunks: executemany inserts per chunk.
+    """
+    for start in range(0, len(df), chunk_size):
+        chunk = df.iloc[start:start + chunk_size].astype(object)
+        chunk = chunk.where(chunk.notna(), None)
+        connection.execute(staging.insert(), chunk.to_dict('records'))
+
+def _save_to_sql_sync(df, url, table, chunk_size, deletes=None):
+    sa = _sqlalchemy()
+    engine = get_engine(url)
+    target = _product_table(table, df.columns)
+    staging = _product_table(table, df.columns, staging=True)
+    target.create(engine, checkfirst=True)
+    key_columns = with_site(PRODUCT_KEY, df.columns)
+    delete = target.delete().where(sa.and_(*(target.c[column] == sa.bindparam(f"key_{column}")
+                                             for column in key_columns)))
     
-    # Create directory if it doesn't exist
-    os.makedirs(os.path.dirname(filename) if os.path.dirname(filename) else '.', exist_ok=True)
+    preparer = engine.dialect.identifier_preparer
+    columns = ", ".join(preparer.quote(column) for column in df.columns)
+    key = ", ".join(preparer.quote(column) for column in key_columns)
+    updates = ", ".join(f"{preparer.quote(column)} = excluded.{preparer.quote(column)}"
+                        for column in df.columns if column not in key_columns)
+    on_conflict = f"DO UPDATE SET {updates}" if updates else "DO NOTHING"
+    
+    # One transaction: a failed load leaves the target table untouched
+    with engine.begin() as connection:
+        if deletes is not None and not deletes.empty:
+            connection.execute(delete, [{f"key_{column}": value for column, value in row.items()}
+                                        for row in deletes.to_dict('records')])
+        if df.empty:
+            return
+        staging.drop(connection, checkfirst=True)
+        staging.create(connection)
+        if engine.dialect.name == "postgresql":
+            _copy_chunks(connection, staging, df, chunk_size)
+        else:
+            _insert_chunks(connection, staging, df, chunk_size)
+        # WHERE true keeps SQLite from parsing ON CONFLICT as a join clause
+        connection.execute(sa.text(
+            f"INSERT INTO {preparer.format_table(target)} ({columns}) "
+            f"SELECT {columns} FROM {preparer.format_table(staging)} WHERE true "
+            f"ON CONFLICT ({key}) {on_conflict}"
+        ))
+        staging.drop(connection)
+
+async def save_to_postgres(df, url, table=SQL_TABLE, chunk_size=SQL_CHUNK_SIZE):
+    """
+    Upsert DataFrame rows into a database table keyed by PRODUCT_KEY.
+    Rows are streamed into a temporary staging table with COPY FROM STDIN
+    in chunks of chunk_size (executemany inserts on non-PostgreSQL URLs,
+    e.g. SQLite) and merged with INSERT ... ON CONFLICT DO UPDATE, so
+    re-running a load updates rows instead of duplicating them.
+    A Change column (as in incremental deltas) is not stored; rows whose
+    Change is "delete" remove the matching product instead.
+    Connections come from the pooled engine returned by get_engine.
+    """
+    if df.empty:
+        logger.warning("No data to save")
+        return None
+    
+    deletes = None
+    if "Change" in df:
+        removed = (df["Change"] == "delete").to_numpy()
+        deletes = df.loc[removed, list(with_site(PRODUCT_KEY, df.columns))].astype(object)
+        df = df[~removed].drop(columns="Change")
     
-    # Save to CSV (pandas to_csv isn't async, but we can run it in a thread)
-    await asyncio.to_thread(df.to_csv, filename, index=False)
-    print(f"Data saved to {filename}")
-    return filename
\ No newline at end of file
+    df = _sql_frame(df)
+    with METRICS.timer("load_seconds", format="postgres"):
+        await asyncio.to_thread(_save_to_sql_sync, df, url, table, chunk_size, deletes)
+    METRICS.inc("load_rows_total", len(df), format="postgres")
+    logger.info(f"Upserted {len(df)} rows into {table}", extra={"format": "postgres", "table": table, "rows": len(df)})
+    if deletes is not None and not deletes.empty:
+        logger.info(f"Deleted {len(deletes)} rows from {table}", extra={"table": table, "rows": len(deletes)})
+    return table
+
+
+class Loader:
+    """
+    Base class for output loaders used by the pipelines.
+
+    save() writes a whole frame to a new (or truncated) file, or with
+    append=True adds a streamed chunk to the same file; close() finishes
+    the file and releases what save() opened. The pipelines close their
+    loader when a run ends, and a closed loader reopens on the next save().
+    """
+    name = "base"
+    extension = ""
+
+    def default_filename(self):
+        return default_filename(self.extension)
+
+    async def save(self, df, filename=None, append=False):
+        raise NotImplementedError
+
+    async def close(self):
+        """Finish any file written with append=True and release resources."""
+
+
+class CsvLoader(Loader):
+    """
+    Comma-separated values via save_to_csv, optionally gzip or zstd
+    compressed. With workers > 1 blocks are encoded in a process pool kept
+    until close().
+    """
+    name = "csv"
+    extension = ".csv"
+
+    def __init__(self, compression=None, workers=0, chunk_size=CSV_CHUNK_SIZE):
+        if compression is not None:
+            csv_compression("", compression)
+            if compression == "zstd":
+                _require_zstandard()
+        self.compression = compression
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.extension = ".csv" + CSV_COMPRESSIONS.get(compression, "")
+        self._executor = None
+
+    async def save(self, df, filename=None, append=False):
+        if self.workers > 1 and self._executor is None:
+            from concurrent.futures import ProcessPoolExecutor
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return await save_to_csv(df, filename or self.default_filename(), append, self.compression,
+                                 self.chunk_size, self._executor)
+
+    async def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+
+class JsonLinesLoader(Loader):
+    """
+    Newline-delimited JSON via save_to_jsonl.
+    """
+    name = "json"
+    extension = ".jsonl"
+
+    async def save(self, df, filename=None, append=False):
+        return await save_to_jsonl(df, filename, append)
+
+
+class ParquetLoader(Loader):
+    """
+    Columnar Parquet via pyarrow.
+
+    Frames are written as row groups through a ParquetWriter that stays
+    open until close(): save() without append starts a new file, streamed
+    chunks with append=True add to it. The schema is fixed by
+    _stream_schema from the transform SCHEMA, so every chunk fits it.
+    """
+    name = "parquet"
+    extension = ".parquet"
+
+    def __init__(self, compression="snappy", row_group_size=PARQUET_ROW_GROUP_SIZE):
+        self.compression = compression
+        self.row_group_size = row_group_size
+        self._writer = None
+        self._filename = None
+
+    async def save(self, df, filename=None, append=False):
+        if df.empty:
+            logger.warning("No data to save")
+            return None
+
+        pa, pq = _require_pyarrow()
+        if filename is None:
+            filename = (self._filename if append else None) or self.default_filename()
+        if self._writer is not None and (not append or filename != self._filename):
+            await self.close()
+
+        table = pa.Table.from_pandas(_widen_compact(df), preserve_index=False)
+        if self._writer is None:
+            _make_parent_dir(filename)
+            self._writer = pq.ParquetWriter(filename, _stream_schema(table.schema, pa), compression=self.compression)
+            self._filename = filename
+        table = table.cast(self._writer.schema)
+        with METRICS.timer("load_seconds", format="parquet"):
+            await asyncio.to_thread(self._writer.write_table, table, row_group_size=self.row_group_size)
+        _saved("parquet", filename, len(df))
+        return filename
+
+    async def close(self):
+        if self._writer is not None:
+            await asyncio.to_thread(self._writer.close)
+            self._writer = None
+            self._filename = None
+
+
+class PostgresLoader(Loader):
+    """
+    Upserts into a database table via save_to_postgres; the "filename"
+    passed to save() is the target table.
+    """
+    name = "postgres"
+
+    def __init__(self, url=None, table=SQL_TABLE, chunk_size=SQL_CHUNK_SIZE):
+        self.url = url or os.environ.get("DATABASE_URL")
+        if not self.url:
+            raise ValueError("PostgreSQL output needs a database URL (--database-url or DATABASE_URL)")
+        self.table = table
+        self.chunk_size = chunk_size
+
+    def default_filename(self):
+        return self.table
+
+    async def save(self, df, filename=None, append=False):
+        return await save_to_postgres(df, self.url, filename or self.table, self.chunk_size)
+
+
+class HistoryLoader(Loader):
+    """
+    Appends every run to the indexed scrape history in utils.history; the
+    "filename" passed to save() is the database path. The store stays
+    open across saves (streamed pages) until close().
+    """
+    name = "history"
+
+    def __init__(self, path=HISTORY_PATH):
+        self.path = path
+        self._store = None
+
+    def default_filename(self):
+        return self.path
+
+    async def save(self, df, filename=None, append=False):
+        if df.empty:
+            logger.warning("No data to save")
+            return None
+        filename = filename or self.path
+        if self._store is not None and self._store.path != filename:
+            await self.close()
+        with METRICS.timer("load_seconds", format="history"):
+            rows = await asyncio.to_thread(self._append, filename, df)
+        _saved("history", filename, rows)
+        return filename
+
+    def _append(self, path, df):
+        if self._store is None:
+            self._store = HistoryStore(path)
+        return self._store.append(df)
+
+    async def close(self):
+        if self._store is not None:
+            # PRAGMA optimize runs once here, not per saved page
+            await asyncio.to_thread(self._store.close)
+            self._store = None
+
+
+LOADERS = {
+    "csv": CsvLoader,
+    "json": JsonLinesLoader,
+    "parquet": ParquetLoader,
+    "postgres": PostgresLoader,
+    "history": HistoryLoader,
+}
@@ -0,0 +1,201 @@
+import json
+import logging
+import sys
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Descriptions written as # HELP lines in the Prometheus export
+HELP = {
+    "fetch_latency_seconds": "Latency of HTTP requests to the catalog",
+    "fetch_bytes_total": "Bytes received for fetched pages (Content-Length, else the decoded body size)",
+    "fetch_requests_total": "HTTP requests by status (0 for network errors)",
+    "fetch_retries_total": "Requests retried after an error or 429",
+    "parse_seconds": "Time to parse one catalog page",
+    "transform_step_seconds": "Time per step of the vectorized transform",
+    "stage_seconds": "Time per pipeline stage",
+    "load_seconds": "Time per loader call",
+    "load_rows_total": "Rows written by loaders",
+    "dedup_rows_total": "Rows checked by the dedup stage",
+    "dedup_dropped_total": "Rows the dedup stage dropped as duplicates",
+    "event_loop_lag_seconds": "Event-loop lag sampled under --profile-asyncio",
+}
+
+# LogRecord attributes that are not structured fields
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram with count, sum, min and max.
+    """
+    __slots__ = ("buckets", "counts", "count", "sum", "min", "max")
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            yield bound, total
+
+    def quantile(self, q):
+        """Estimate a quantile as the upper bound of the bucket holding it."""
+        rank = q * self.count
+        for bound, total in self.cumulative():
+            if total >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "avg": round(self.sum / self.count, 6) if self.count else 0.0,
+            "min": round(self.min, 6) if self.count else 0.0,
+            "max": round(self.max, 6),
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+        }
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _label_text(key, extra=()):
+    pairs = [*key, *extra]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{value}"' for name, value in pairs) + "}"
+
+
+class Metrics:
+    """
+    In-process registry of labelled counters and histograms.
+
+    Pipeline code records into the shared METRICS instance; the results
+    can be written as a Prometheus textfile or a JSON summary.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.counters = defaultdict(lambda: defaultdict(float))
+        self.histograms = defaultdict(dict)
+
+    def inc(self, name, value=1, **labels):
+        self.counters[name][_label_key(labels)] += value
+
+    def observe(self, name, value, **labels):
+        series = self.histograms[name]
+        key = _label_key(labels)
+        if key not in series:
+            series[key] = Histogram()
+        series[key].observe(value)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Observe the duration of the with block in histogram `name`."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def summary(self):
+        """Return counters and histogram statistics as plain dicts."""
+        result = {"counters": {}, "histograms": {}}
+        for name, series in self.counters.items():
+            result["counters"][name] = [{"labels": dict(key), "value": value} for key, value in series.items()]
+        for name, series in self.histograms.items():
+            result["histograms"][name] = [{"labels": dict(key), **hist.as_dict()} for key, hist in series.items()]
+        # Load throughput per format, the number asked for most often
+        rows = {dict(key).get("format"): value for key, value in self.counters.get("load_rows_total", {}).items()}
+        seconds = {dict(key).get("format"): hist.sum for key, hist in self.histograms.get("load_seconds", {}).items()}
+        result["load_rows_per_second"] = {fmt: round(rows[fmt] / seconds[fmt], 1)
+                                          for fmt in rows if seconds.get(fmt)}
+        return result
+
+    def to_prometheus(self):
+        """Render all metrics in the Prometheus text exposition format."""
+        lines = []
+        for name, series in sorted(self.counters.items()):
+            lines.append(f"# HELP {name} {HELP.get(name, name)}")
+            lines.append(f"# TYPE {name} counter")
+            for key, value in series.items():
+                lines.append(f"{name}{_label_text(key)} {value:g}")
+        for name, series in sorted(self.histograms.items()):
+            lines.append(f"# HELP {name} {HELP.get(name, name)}")
+            lines.append(f"# TYPE {name} histogram")
+            for key, hist in series.items():
+                for bound, total in hist.cumulative():
+                    lines.append(f"{name}_bucket{_label_text(key, [('le', f'{bound:g}')])} {total}")
+                lines.append(f"{name}_bucket{_label_text(key, [('le', '+Inf')])} {hist.count}")
+                lines.append(f"{name}_sum{_label_text(key)} {hist.sum:.6f}")
+                lines.append(f"{name}_count{_label_text(key)} {hist.count}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        """Write a Prometheus textfile for *.prom paths, else a JSON summary."""
+        if path.endswith(".prom"):
+            content = self.to_prometheus()
+        else:
+            content = json.dumps(self.summary(), indent=2)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        return path
+
+
+METRICS = Metrics()
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per log line: time, level, logger, message and any
+    fields passed through `extra`.
+    """
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update({key: value for key, value in vars(record).items() if key not in _RECORD_ATTRS})
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+def configure_logging(fmt="text", level=logging.INFO):
+    """
+    Send the pipeline's log records to stdout, as plain messages (the
+    previous console output) or as JSON lines with structured fields.
+    """
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(JsonFormatter() if fmt == "json" else logging.Formatter("%(message)s"))
+    root = logging.getLogger()
+    root.handlers[:] = [handler]
+    root.setLevel(level)
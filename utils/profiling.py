@@ -0,0 +1,259 @@
+import asyncio
+import contextvars
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from utils.metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
+# Hot functions listed per stage in the report
+TOP_FUNCTIONS = 20
+
+# Event-loop lag sampling interval and the lag counted as a stall (seconds)
+LAG_INTERVAL = 0.05
+LAG_STALL = 0.1
+
+# Stage of the code running in the current task, inherited by executor calls
+_CURRENT_STAGE = contextvars.ContextVar("stage", default=None)
+
+
+class StageStats:
+    """
+    Wall time and traced memory of one pipeline stage.
+    """
+    __slots__ = ("calls", "seconds", "peak_bytes", "peak_growth", "net_bytes", "stalls", "max_lag")
+
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.peak_bytes = 0
+        self.peak_growth = 0
+        self.net_bytes = 0
+        self.stalls = 0
+        self.max_lag = 0.0
+
+
+class ProfilingExecutor(ThreadPoolExecutor):
+    """
+    Default executor for profiled runs: every call runs under cProfile and
+    is credited to the stage it was submitted from.
+    """
+
+    def __init__(self, profiler):
+        super().__init__(thread_name_prefix="profiled")
+        self.profiler = profiler
+
+    def submit(self, fn, /, *args, **kwargs):
+        return super().submit(self.profiler._call, _CURRENT_STAGE.get(), fn, args, kwargs)
+
+
+class StageProfiler:
+    """
+    Opt-in profiler for the pipeline stages (main.py --profile).
+
+    A stage is profiled with cProfile from the event loop thread, covering
+    fetching and scheduling (time waiting on sockets shows as select/epoll
+    calls), and every call it hands to the loop's default
+    executor (HTML parsing, transform, dedup, load encoding) is added to
+    its profile. Where stages overlap (the streaming pipeline) the
+    outermost one owns the event loop thread. Python 3.12+ runs a single
+    profiler for all threads, so there the owning stage also gets the
+    executor work of overlapping ones.
+    tracemalloc records each stage's peak traced memory: the process peak
+    while the stage was active. With watch_loop, event-loop lag is sampled
+    and asyncio reports callbacks that block it for more than LAG_STALL.
+    Pages parsed in worker processes are not profiled.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.stages = defaultdict(StageStats)
+        self._profiles = {}
+        self._owner = None
+        self._active = []
+        self._lock = threading.Lock()
+        self._watcher = None
+        self._top_allocations = []
+        self.lag = {"samples": 0, "max": 0.0, "stalls": 0}
+
+    def _enable(self, profile):
+        try:
+            profile.enable()
+            return True
+        except ValueError:
+            # Python 3.12+: another profile is already active and covers all threads
+            return False
+
+    def _add_profile(self, name, profile):
+        profile.disable()
+        try:
+            stats = pstats.Stats(profile)
+        except TypeError:
+            # Nothing ran under the profile
+            return
+        with self._lock:
+            if name in self._profiles:
+                self._profiles[name].add(stats)
+            else:
+                self._profiles[name] = stats
+
+    def _call(self, stage, fn, args, kwargs):
+        profile = cProfile.Profile()
+        profiled = self._enable(profile)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            if profiled:
+                self._add_profile(stage or "other", profile)
+
+    def _fold_peak(self):
+        current, peak = tracemalloc.get_traced_memory()
+        for stats, start in self._active:
+            stats.peak_bytes = max(stats.peak_bytes, peak)
+            stats.peak_growth = max(stats.peak_growth, peak - start)
+        tracemalloc.reset_peak()
+        return current
+
+    @contextmanager
+    def stage(self, name):
+        """Profile the with block as stage `name`; a no-op unless enabled."""
+        if not self.enabled:
+            yield
+            return
+        token = _CURRENT_STAGE.set(name)
+        stats = self.stages[name]
+        entry = (stats, self._fold_peak())
+        self._active.append(entry)
+        profile = None
+        if self._owner is None:
+            profile = cProfile.Profile()
+            if self._enable(profile):
+                self._owner = entry
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            stats.seconds += time.perf_counter() - started
+            stats.calls += 1
+            if self._owner is entry:
+                self._add_profile(name, profile)
+                self._owner = None
+            stats.net_bytes += self._fold_peak() - entry[1]
+            self._active.remove(entry)
+            _CURRENT_STAGE.reset(token)
+
+    async def _watch_lag(self, interval):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(interval)
+            lag = max(0.0, loop.time() - started - interval)
+            METRICS.observe("event_loop_lag_seconds", lag)
+            self.lag["samples"] += 1
+            self.lag["max"] = max(self.lag["max"], lag)
+            if lag >= LAG_STALL:
+                self.lag["stalls"] += 1
+                for stats, _ in self._active:
+                    stats.stalls += 1
+                    stats.max_lag = max(stats.max_lag, lag)
+
+    def start(self, watch_loop=False):
+        """Start profiling in the running event loop."""
+        loop = asyncio.get_running_loop()
+        loop.set_default_executor(ProfilingExecutor(self))
+        tracemalloc.start()
+        self.enabled = True
+        if watch_loop:
+            loop.set_debug(True)
+            loop.slow_callback_duration = LAG_STALL
+            self._watcher = asyncio.create_task(self._watch_lag(LAG_INTERVAL))
+
+    async def stop(self):
+        if self._watcher is not None:
+            self._watcher.cancel()
+            await asyncio.gather(self._watcher, return_exceptions=True)
+            asyncio.get_running_loop().set_debug(False)
+        self._top_allocations = tracemalloc.take_snapshot().statistics("lineno")
+        tracemalloc.stop()
+        self.enabled = False
+
+    def summary(self, top=TOP_FUNCTIONS):
+        """Return per-stage timings, memory and hot functions as plain dicts."""
+        result = {"stages": {}, "loop_lag": dict(self.lag) if self._watcher is not None else None}
+        for name, profile in self._profiles.items():
+            stats = self.stages.get(name, StageStats())
+            hot = sorted(profile.stats.items(), key=lambda item: item[1][2], reverse=True)[:top]
+            result["stages"][name] = {
+                **{field: getattr(stats, field) for field in StageStats.__slots__},
+                "hot_functions": [
+                    {"function": pstats.func_std_string(func), "calls": calls, "tottime": round(tottime, 6),
+                     "cumtime": round(cumtime, 6)}
+                    for func, (_, calls, tottime, cumtime, _) in hot
+                ],
+            }
+        return result
+
+    def write(self, directory, top=TOP_FUNCTIONS):
+        """
+        Write <stage>.pstats files, report.txt (hot functions by own time,
+        memory, loop lag) and profile.json to directory; returns summary lines.
+        """
+        os.makedirs(directory, exist_ok=True)
+        report = io.StringIO()
+        lines = []
+        for name, profile in self._profiles.items():
+            profile.dump_stats(os.path.join(directory, f"{name}.pstats"))
+            stats = self.stages.get(name)
+            line = f"Profile {name}: {profile.total_tt:.2f}s profiled"
+            if stats is not None:
+                line += (f", {stats.seconds:.2f}s wall, peak {stats.peak_bytes / 2**20:.1f} MiB "
+                         f"(+{stats.peak_growth / 2**20:.1f} MiB)")
+                if stats.stalls:
+                    line += f", {stats.stalls} loop stalls (max {stats.max_lag:.2f}s)"
+            lines.append(line)
+            report.write(f"=== {line}\n")
+            profile.stream = report
+            profile.sort_stats("tottime").print_stats(top)
+        if self._watcher is not None:
+            lag = self.lag
+            lines.append(f"Event loop lag: max {lag['max']:.3f}s, {lag['stalls']} stalls over {LAG_STALL}s "
+                         f"in {lag['samples']} samples")
+        report.write("\n".join(lines[len(self._profiles):]) + "\n=== Top allocations still traced at the end\n")
+        for statistic in self._top_allocations[:top]:
+            report.write(f"{statistic}\n")
+        with open(os.path.join(directory, "report.txt"), "w", encoding="utf-8") as f:
+            f.write(report.getvalue())
+        with open(os.path.join(directory, "profile.json"), "w", encoding="utf-8") as f:
+            json.dump(self.summary(top), f, indent=2)
+        lines.append(f"Profile written to {directory}")
+        return lines
+
+    async def run(self, coro, directory, top=TOP_FUNCTIONS, watch_loop=False):
+        """Await coro with profiling on, then write the reports to directory."""
+        self.start(watch_loop)
+        try:
+            return await coro
+        finally:
+            await self.stop()
+            for line in self.write(directory, top):
+                logger.info(line)
+
+
+PROFILER = StageProfiler()
+
+
+@contextmanager
+def stage(name):
+    """Time a pipeline stage in stage_seconds, and profile it under --profile."""
+    with METRICS.timer("stage_seconds", stage=name), PROFILER.stage(name):
+        yield
@@ -0,0 +1,216 @@
+import asyncio
+import random
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+
+def host_of(url):
+    """
+    Return the host part of a URL, used as the key for per-host state.
+    """
+    return urlparse(url).netloc or url
+
+
+def parse_retry_after(value):
+    """
+    Parse a Retry-After header (delta seconds or HTTP date) into seconds.
+    Returns None when the header is missing or malformed.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class HostStats:
+    """
+    Request counters and latency totals for one host.
+    """
+    __slots__ = ("requests", "ok", "throttled", "errors", "total_latency", "max_latency")
+
+    def __init__(self):
+        self.requests = 0
+        self.ok = 0
+        self.throttled = 0
+        self.errors = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    def add(self, status, latency):
+        self.requests += 1
+        self.total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+        if status in (200, 304):
+            self.ok += 1
+        elif status == 429:
+            self.throttled += 1
+        else:
+            self.errors += 1
+
+    def as_dict(self):
+        avg = self.total_latency / self.requests if self.requests else 0.0
+        return {
+            "requests": self.requests,
+            "ok": self.ok,
+            "throttled": self.throttled,
+            "errors": self.errors,
+            "avg_latency": round(avg, 3),
+            "max_latency": round(self.max_latency, 3),
+        }
+
+
+class RateLimitPolicy:
+    """
+    Base class for rate-limit policies used by fetch_content.
+
+    A policy hands out the concurrency limiter, decides how long to wait
+    before each request (wait_for_host before taking a slot, wait once it
+    holds one) and is told the outcome of every request.
+    """
+    name = "base"
+
+    def __init__(self, max_concurrent):
+        self.max_concurrent = max_concurrent
+        self.host_stats = defaultdict(HostStats)
+
+    def limiter(self):
+        """Return the async context manager that bounds concurrent requests."""
+        return asyncio.Semaphore(self.max_concurrent)
+
+    async def wait_for_host(self, url):
+        """Hold a request to url back before it takes a concurrency slot."""
+
+    async def wait(self, url):
+        """Pause before a request to url is sent, holding its slot."""
+
+    def record(self, url, status, latency, retry_after=None):
+        """Record the outcome of a request; status is None for network errors."""
+        self.host_stats[host_of(url)].add(status, latency)
+
+    def stats(self):
+        return {host: stats.as_dict() for host, stats in self.host_stats.items()}
+
+    def report(self):
+        """Return human readable per-host statistics lines."""
+        lines = [f"Rate limit policy: {self.name}"]
+        for host, stats in self.stats().items():
+            lines.append(
+                f"  {host}: {stats['requests']} requests, {stats['ok']} ok, "
+                f"{stats['throttled']} throttled, {stats['errors']} errors, "
+                f"avg {stats['avg_latency']:.2f}s, max {stats['max_latency']:.2f}s"
+            )
+        return lines
+
+
+class FixedDelayPolicy(RateLimitPolicy):
+    """
+    Fixed concurrency with a random delay before every request.
+    """
+    name = "fixed"
+
+    def __init__(self, max_concurrent=3, min_delay=1, max_delay=3):
+        super().__init__(max_concurrent)
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+
+    async def wait(self, url):
+        await asyncio.sleep(random.uniform(self.min_delay, self.max_delay))
+
+
+class AdaptiveRateLimiter(RateLimitPolicy):
+    """
+    AIMD concurrency limiter.
+
+    Every fast successful response grows the limit by increase/limit (about
+    +increase per round of requests); a 429, a 5xx or a network error
+    multiplies it by decrease, at most once per window: failures of
+    requests sent before the last decrease already saw the old limit and
+    are not counted again. Retry-After pauses the affected host before
+    its requests take a slot, so other hosts keep the slots meanwhile.
+    """
+    name = "adaptive"
+
+    def __init__(self, initial=3, min_concurrent=1, max_concurrent=16,
+                 increase=1.0, decrease=0.5, latency_threshold=2.0):
+        super().__init__(max_concurrent)
+        self.limit = float(initial)
+        self.min_concurrent = min_concurrent
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_threshold = latency_threshold
+        self.peak_limit = self.limit
+        self._in_flight = 0
+        self._waiters = []
+        self._blocked_until = {}
+        self._decreased_at = float("-inf")
+
+    def limiter(self):
+        return self
+
+    async def __aenter__(self):
+        while self._in_flight >= int(self.limit):
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            finally:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+        self._in_flight += 1
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self._in_flight -= 1
+        self._wake()
+
+    def _wake(self):
+        free = int(self.limit) - self._in_flight
+        for waiter in list(self._waiters):
+            if free <= 0:
+                break
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
+
+    async def wait_for_host(self, url):
+        delay = self._blocked_until.get(host_of(url), 0) - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def record(self, url, status, latency, retry_after=None):
+        super().record(url, status, latency, retry_after)
+        if status is None or status == 429 or status >= 500:
+            now = time.monotonic()
+            if now - latency >= self._decreased_at:
+                self.limit = max(float(self.min_concurrent), self.limit * self.decrease)
+                self._decreased_at = now
+            if retry_after is not None:
+                host = host_of(url)
+                until = time.monotonic() + retry_after
+                self._blocked_until[host] = max(self._blocked_until.get(host, 0), until)
+        elif status in (200, 304) and latency <= self.latency_threshold:
+            self.limit = min(float(self.max_concurrent), self.limit + self.increase / self.limit)
+            self.peak_limit = max(self.peak_limit, self.limit)
+            self._wake()
+
+    def report(self):
+        lines = super().report()
+        lines.append(f"  concurrency limit: {self.limit:.1f} (peak {self.peak_limit:.1f})")
+        return lines
+
+
+POLICIES = {
+    "fixed": FixedDelayPolicy,
+    "adaptive": AdaptiveRateLimiter,
+}
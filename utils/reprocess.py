@@ -0,0 +1,188 @@
+import glob
+import io
+import logging
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+import pandas as pd
+from utils.load import CSV_COMPRESSIONS, _encode_csv_block, _make_parent_dir, csv_compression
+from utils.metrics import METRICS
+from utils.transform import EXCHANGE_RATE, SCHEMA, _transform_data_sync, apply_schema
+
+logger = logging.getLogger(__name__)
+
+# Exports picked up in the directory, compressed ones included
+EXPORT_PATTERN = "fashion_products_*.csv*"
+
+# Uncompressed exports are split into byte ranges of about this size, one task each
+RANGE_BYTES = 64 * 2**20
+
+# Rows parsed and transformed at a time within a task
+CHUNK_ROWS = 100_000
+
+# Rows read at a time while looking for an export's first price
+SNIFF_ROWS = 100
+
+
+class ExportRange:
+    """
+    A task: the rows of an export between two byte offsets (both aligned to
+    line starts), or the whole file when end is None.
+    """
+    __slots__ = ("path", "start", "end")
+
+    def __init__(self, path, start=0, end=None):
+        self.path = path
+        self.start = start
+        self.end = end
+
+
+def find_exports(directory, pattern=EXPORT_PATTERN):
+    """Return the export files in directory, oldest name first."""
+    return sorted(path for path in glob.glob(os.path.join(directory, pattern)) if os.path.isfile(path))
+
+
+def plan_ranges(paths, range_bytes=RANGE_BYTES):
+    """
+    Split exports into tasks. Compressed files cannot be entered midway and
+    are one task each; uncompressed ones are cut at the first line break
+    after every range_bytes, as exports hold one record per line.
+    """
+    tasks = []
+    for path in paths:
+        if csv_compression(path) is not None:
+            tasks.append(ExportRange(path))
+            continue
+        size = os.path.getsize(path)
+        with open(path, "rb") as f:
+            start = len(f.readline())
+            while start < size:
+                f.seek(min(start + range_bytes, size))
+                f.readline()
+                end = min(f.tell(), size)
+                tasks.append(ExportRange(path, start, end))
+                start = end
+    return tasks
+
+
+def is_raw_export(source, sniff_rows=SNIFF_ROWS):
+    """
+    Tell a raw export from a transformed one by its first non-empty Price:
+    raw ones hold scraped text like "$10.99", transformed ones IDR numbers.
+    Reads sniff_rows rows at a time and stops at the first price, so it
+    costs a few rows per file, not a pass over it.
+    """
+    for chunk in read_export(source, sniff_rows):
+        prices = chunk["Price"].dropna()
+        if len(prices):
+            return not pd.api.types.is_numeric_dtype(prices)
+    return True
+
+
+def transform_export(df, exchange_rate=EXCHANGE_RATE, source_rate=None, raw=None):
+    """
+    Transform one chunk of an export into SCHEMA columns. Raw exports
+    (extract_product_data columns, prices like "$10.99") go through
+    _transform_data_sync; exports save_to_csv already transformed have their
+    IDR prices converted from source_rate to exchange_rate. raw should come
+    from is_raw_export() on the whole file, as a chunk of empty prices
+    looks numeric; without it the chunk's own Price column decides.
+    """
+    if raw is None:
+        raw = not pd.api.types.is_numeric_dtype(df["Price"])
+    if raw:
+        df = _transform_data_sync(df, exchange_rate)
+    elif source_rate is None:
+        raise ValueError("Export is already transformed; give the exchange rate it was written with (source_rate)")
+    else:
+        df = apply_schema(df.assign(Price=df["Price"] * (exchange_rate / source_rate)))
+    return df.reindex(columns=list(SCHEMA))
+
+
+def read_export(source, chunk_rows=CHUNK_ROWS):
+    """Read an export (a path or file object) in chunks of chunk_rows rows."""
+    # Raw exports hold "N/A" as text, as the scraper produced it
+    return pd.read_csv(source, chunksize=chunk_rows, keep_default_na=False, na_values=[""])
+
+
+def reprocess_range(task, part_dir, exchange_rate=EXCHANGE_RATE, source_rate=None, compression=None,
+                    chunk_rows=CHUNK_ROWS, raw=None):
+    """
+    Worker entry point: transform one task chunk by chunk into an encoded
+    part file in part_dir; returns (part path, rows read, rows written).
+    raw is is_raw_export() of the task's file. Memory stays bounded by one
+    byte range and one chunk.
+    """
+    if task.end is None:
+        source = task.path
+    else:
+        with open(task.path, "rb") as f:
+            header = f.readline()
+            f.seek(task.start)
+            source = io.BytesIO(header + f.read(task.end - task.start))
+    rows_in = rows_out = 0
+    fd, part = tempfile.mkstemp(dir=part_dir, suffix=".part")
+    with os.fdopen(fd, "wb") as out:
+        for chunk in read_export(source, chunk_rows):
+            rows_in += len(chunk)
+            df = transform_export(chunk, exchange_rate, source_rate, raw)
+            if not df.empty:
+                out.write(_encode_csv_block(df, False, compression))
+                rows_out += len(df)
+    return part, rows_in, rows_out
+
+
+def reprocess(directory, output=None, workers=2, exchange_rate=EXCHANGE_RATE, source_rate=None,
+              compression=None, pattern=EXPORT_PATTERN, range_bytes=RANGE_BYTES, chunk_rows=CHUNK_ROWS):
+    """
+    Re-run the transform over every export in directory with `workers`
+    processes and write one consolidated CSV (gzip or zstd compressed when
+    compression is set or implied by output's suffix). Parts are joined in
+    file and row order and the output appears atomically. Returns its path.
+    """
+    if output is None:
+        output = f"reprocessed_{time.strftime('%Y%m%d_%H%M%S')}.csv" + CSV_COMPRESSIONS.get(compression, "")
+    compression = csv_compression(output, compression)
+    paths = [path for path in find_exports(directory, pattern) if os.path.abspath(path) != os.path.abspath(output)]
+    if not paths:
+        raise ValueError(f"No exports matching {pattern} in {directory}")
+    tasks = plan_ranges(paths, range_bytes)
+    logger.info(f"Reprocessing {len(paths)} exports as {len(tasks)} tasks in {workers} processes",
+                extra={"files": len(paths), "tasks": len(tasks), "workers": workers})
+
+    _make_parent_dir(output)
+    part_dir = tempfile.mkdtemp(prefix=".reprocess-", dir=os.path.dirname(os.path.abspath(output)))
+    started = time.perf_counter()
+    try:
+        # Each file is raw or transformed as a whole; its ranges must not guess per chunk
+        raw = {path: is_raw_export(path) for path in paths}
+        args = (tasks, repeat(part_dir), repeat(exchange_rate), repeat(source_rate), repeat(compression),
+                repeat(chunk_rows), [raw[task.path] for task in tasks])
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(reprocess_range, *args))
+        else:
+            results = list(map(reprocess_range, *args))
+
+        fd, tmp = tempfile.mkstemp(dir=part_dir, suffix=".csv")
+        with os.fdopen(fd, "wb") as out:
+            out.write(_encode_csv_block(pd.DataFrame(columns=list(SCHEMA)), True, compression))
+            for part, _, _ in results:
+                with open(part, "rb") as f:
+                    shutil.copyfileobj(f, out)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, output)
+    finally:
+        shutil.rmtree(part_dir, ignore_errors=True)
+
+    rows_in = sum(rows for _, rows, _ in results)
+    rows_out = sum(rows for _, _, rows in results)
+    seconds = time.perf_counter() - started
+    METRICS.inc("load_rows_total", rows_out, format="csv")
+    logger.info(f"Reprocessed {rows_in} rows into {rows_out} in {seconds:.1f}s "
+                f"({rows_in / seconds:,.0f} rows/s): {output}",
+                extra={"rows_in": rows_in, "rows_out": rows_out, "seconds": seconds, "file": output})
+    return output
@@ -0,0 +1,135 @@
+import asyncio
+import logging
+import random
+import time
+from collections import defaultdict
+from utils.ratelimit import host_of
+
+logger = logging.getLogger(__name__)
+
+# Retries allowed per URL
+MAX_RETRIES = 3
+
+# Retries allowed across a whole run, shared by all URLs
+RETRY_BUDGET = 100
+
+# Backoff base and cap (seconds); 429s back off exponentially, other errors linearly
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 30.0
+
+# Statuses that a retry cannot fix: the page does not exist
+NOT_FOUND = (404, 410)
+
+# Consecutive failures that open a host's circuit, and how long it stays open (seconds)
+FAILURE_THRESHOLD = 5
+COOLDOWN = 30.0
+
+
+class HostCircuit:
+    """
+    Consecutive-failure counter and open-until deadline for one host.
+    """
+    __slots__ = ("failures", "open_until", "trips")
+
+    def __init__(self):
+        self.failures = 0
+        self.open_until = 0.0
+        self.trips = 0
+
+
+class RetryScheduler:
+    """
+    Decides whether and when fetch_content retries a failed request.
+
+    A failed request gets a jittered deadline and waits for it *without*
+    holding a concurrency slot, so healthy pages keep flowing while it
+    backs off. Retries come out of a per-run budget shared by all URLs,
+    and a host whose requests keep failing is paused for `cooldown`
+    seconds (its circuit opens) before anything is sent to it again.
+    """
+
+    def __init__(self, max_retries=MAX_RETRIES, budget=RETRY_BUDGET, base=BACKOFF_BASE,
+                 cap=BACKOFF_CAP, failure_threshold=FAILURE_THRESHOLD, cooldown=COOLDOWN):
+        self.max_retries = max_retries
+        self.budget = budget
+        self.base = base
+        self.cap = cap
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.circuits = defaultdict(HostCircuit)
+        self.retries = 0
+        self.exhausted = 0
+
+    def backoff(self, attempt, status=None, retry_after=None):
+        """
+        Return the delay before retry number attempt + 1: exponential for
+        429s, linear otherwise, plus up to one base of jitter. A Retry-After
+        from the server is honoured when it asks for longer.
+        """
+        if status == 429:
+            delay = self.base * 2 ** attempt
+        else:
+            delay = self.base * (1 + attempt)
+        delay = min(self.cap, delay) + random.uniform(0, self.base)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+    def schedule(self, url, attempt, status=None, retry_after=None):
+        """
+        Record a failed attempt and return the monotonic deadline of the
+        retry, or None when the URL's retries or the run budget are spent or
+        the page does not exist.
+        """
+        if status in NOT_FOUND:
+            logger.warning(f"Not found, not retrying: {url}", extra={"url": url, "status": status})
+            return None
+        self._failure(url)
+        if attempt >= self.max_retries:
+            logger.error(f"Failed after {self.max_retries} retries: {url}", extra={"url": url})
+            return None
+        if self.retries >= self.budget:
+            self.exhausted += 1
+            logger.error(f"Retry budget of {self.budget} spent, giving up on {url}", extra={"url": url})
+            return None
+        self.retries += 1
+        delay = self.backoff(attempt, status, retry_after)
+        deadline = max(time.monotonic() + delay, self.circuits[host_of(url)].open_until)
+        logger.warning(f"Retry #{attempt + 1} for {url} in {deadline - time.monotonic():.2f}s",
+                       extra={"url": url, "status": status, "retry": attempt + 1})
+        return deadline
+
+    def success(self, url):
+        """Close the host's circuit after a successful response."""
+        self.circuits[host_of(url)].failures = 0
+
+    def _failure(self, url):
+        host = host_of(url)
+        circuit = self.circuits[host]
+        circuit.failures += 1
+        if circuit.failures >= self.failure_threshold and circuit.open_until <= time.monotonic():
+            # Half-open after the cooldown: one more failure opens it again
+            circuit.open_until = time.monotonic() + self.cooldown
+            circuit.trips += 1
+            logger.warning(f"Circuit open for {host}: pausing it for {self.cooldown:.0f}s "
+                           f"after {circuit.failures} consecutive failures",
+                           extra={"host": host, "failures": circuit.failures})
+
+    async def wait_until(self, deadline):
+        """Sleep until a retry deadline; callers must not hold a slot."""
+        delay = deadline - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def wait_for_host(self, url):
+        """Hold a request back while its host's circuit is open."""
+        await self.wait_until(self.circuits[host_of(url)].open_until)
+
+    def report(self):
+        """Return human readable retry statistics lines."""
+        lines = [f"Retries: {self.retries} of {self.budget} budget used"
+                 + (f", {self.exhausted} URLs dropped when it ran out" if self.exhausted else "")]
+        for host, circuit in self.circuits.items():
+            if circuit.trips:
+                lines.append(f"  {host}: circuit opened {circuit.trips} times")
+        return lines
@@ -0,0 +1,230 @@
+import asyncio
+import functools
+import json
+import logging
+import time
+from datetime import datetime, timedelta
+from utils.metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
+# Allowed values of the five cron fields: minute, hour, day of month, month, day of week
+CRON_FIELDS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+
+class IntervalSchedule:
+    """
+    Run every `seconds` seconds.
+    """
+
+    def __init__(self, seconds):
+        if seconds <= 0:
+            raise ValueError(f"Interval must be positive, got {seconds}")
+        self.seconds = seconds
+
+    def next_after(self, moment):
+        return moment + timedelta(seconds=self.seconds)
+
+    def __str__(self):
+        return f"every {self.seconds:g}s"
+
+
+def _cron_field(text, low, high):
+    """Expand one cron field (*, a, a-b, with /step, comma lists) to a set."""
+    values = set()
+    for part in text.split(","):
+        spec, _, step = part.partition("/")
+        if spec == "*":
+            start, end = low, high
+        elif "-" in spec:
+            start, end = (int(v) for v in spec.split("-", 1))
+        else:
+            start = end = int(spec)
+            if step:
+                end = high
+        step = int(step) if step else 1
+        if not low <= start <= end <= high or step < 1:
+            raise ValueError(f"Cron field {part!r} is outside {low}-{high}")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class CronSchedule:
+    """
+    Standard five-field cron expression ("minute hour day month weekday").
+    Day of month and day of week match either one when both are set.
+    """
+
+    def __init__(self, expression):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression needs 5 fields, got {expression!r}")
+        try:
+            minutes, hours, days, months, weekdays = (
+                _cron_field(text, low, high) for text, (low, high) in zip(fields, CRON_FIELDS)
+            )
+        except ValueError as e:
+            raise ValueError(f"Invalid cron expression {expression!r}: {e}") from None
+        self.expression = expression
+        self.minutes, self.hours, self.days, self.months = minutes, hours, days, months
+        # Cron counts weekdays from Sunday (0 or 7)
+        self.weekdays = {day % 7 for day in weekdays}
+        self.any_day = fields[2] == "*"
+        self.any_weekday = fields[4] == "*"
+
+    def _day_matches(self, moment):
+        day_ok = moment.day in self.days
+        weekday_ok = (moment.weekday() + 1) % 7 in self.weekdays
+        if self.any_day or self.any_weekday:
+            return day_ok and weekday_ok
+        return day_ok or weekday_ok
+
+    def next_after(self, moment):
+        """Return the first matching minute strictly after moment."""
+        moment = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = moment + timedelta(days=366 * 5)
+        while moment < limit:
+            if moment.month not in self.months:
+                moment = (moment.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(moment):
+                moment = moment.replace(hour=0, minute=0) + timedelta(days=1)
+            elif moment.hour not in self.hours:
+                moment = moment.replace(minute=0) + timedelta(hours=1)
+            elif moment.minute not in self.minutes:
+                moment += timedelta(minutes=1)
+            else:
+                return moment
+        raise ValueError(f"Cron expression {self.expression!r} never matches")
+
+    def __str__(self):
+        return f"cron '{self.expression}'"
+
+
+class PipelineScheduler:
+    """
+    Runs a pipeline job on a schedule inside one long-lived event loop.
+
+    Only one run is in flight at a time: triggers that arrive while a run
+    is going (a slow crawl overlapping the next tick, or a manual trigger)
+    are skipped and counted. Metrics are reset before each run and their
+    summary is kept with the last run's stats.
+    """
+
+    def __init__(self, job, schedule):
+        self.job = job
+        self.schedule = schedule
+        self.runs = 0
+        self.skipped = 0
+        self.last_run = None
+        self.next_run = None
+        self._task = None
+        self._stop = None
+
+    @property
+    def running(self):
+        return self._task is not None and not self._task.done()
+
+    def trigger(self, reason="manual"):
+        """Start a run now unless one is in flight; return whether it started."""
+        if self.running:
+            self.skipped += 1
+            logger.warning(f"Skipping {reason} run: the previous run is still going",
+                           extra={"reason": reason})
+            return False
+        self._task = asyncio.create_task(self._run(reason))
+        return True
+
+    async def _run(self, reason):
+        self.runs += 1
+        METRICS.reset()
+        started = datetime.now()
+        clock = time.perf_counter()
+        logger.info(f"Run {self.runs} started ({reason})", extra={"run": self.runs, "reason": reason})
+        try:
+            result = await self.job()
+            status = "ok" if result else "failed"
+        except Exception as e:
+            logger.exception(f"Run {self.runs} crashed: {e}")
+            result, status = None, "error"
+        self.last_run = {
+            "run": self.runs,
+            "reason": reason,
+            "started": started.isoformat(timespec="seconds"),
+            "seconds": round(time.perf_counter() - clock, 3),
+            "status": status,
+            "result": result,
+            "metrics": METRICS.summary(),
+        }
+        logger.info(f"Run {self.runs} finished: {status} in {self.last_run['seconds']:.1f}s",
+                    extra={"run": self.runs, "status": status})
+
+    async def run_forever(self, run_on_start=False):
+        """Trigger runs on the schedule until stop() is called."""
+        self._stop = asyncio.Event()
+        logger.info(f"Scheduler started, running {self.schedule}")
+        if run_on_start:
+            self.trigger("startup")
+        try:
+            while not self._stop.is_set():
+                self.next_run = self.schedule.next_after(datetime.now())
+                delay = (self.next_run - datetime.now()).total_seconds()
+                try:
+                    await asyncio.wait_for(self._stop.wait(), timeout=max(0.0, delay))
+                except asyncio.TimeoutError:
+                    self.trigger("schedule")
+        finally:
+            # Let the current run finish so its checkpoint and output stay consistent
+            if self.running:
+                logger.info("Waiting for the current run to finish")
+                await asyncio.gather(self._task, return_exceptions=True)
+
+    def stop(self):
+        if self._stop is not None:
+            logger.info("Scheduler stopping")
+            self._stop.set()
+
+    def stats(self):
+        return {
+            "schedule": str(self.schedule),
+            "running": self.running,
+            "runs": self.runs,
+            "skipped": self.skipped,
+            "next_run": self.next_run.isoformat(timespec="seconds") if self.next_run else None,
+            "last_run": self.last_run,
+        }
+
+
+def control_app(scheduler):
+    """
+    Local control endpoint: GET /status for scheduler and last-run stats,
+    POST /run to trigger a run (409 while one is in flight) and GET
+    /metrics for the Prometheus export of the current or last run.
+    """
+    from aiohttp import web
+    
+    async def status(request):
+        return web.json_response(scheduler.stats(), dumps=functools.partial(json.dumps, default=str))
+
+    async def run(request):
+        if scheduler.trigger("http"):
+            return web.json_response({"started": True}, status=202)
+        return web.json_response({"started": False, "reason": "a run is in progress"}, status=409)
+
+    async def metrics(request):
+        return web.Response(text=METRICS.to_prometheus(), content_type="text/plain")
+
+    app = web.Application()
+    app.router.add_get("/status", status)
+    app.router.add_post("/run", run)
+    app.router.add_get("/metrics", metrics)
+    return app
+
+
+async def start_control_server(scheduler, host="127.0.0.1", port=8765):
+    """Serve control_app on host:port; returns the runner to clean up."""
+    from aiohttp import web
+    runner = web.AppRunner(control_app(scheduler))
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logger.info(f"Control endpoint on http://{host}:{port} (GET /status, POST /run, GET /metrics)")
+    return runner
@@ -0,0 +1,226 @@
+import asyncio
+import functools
+import ssl
+from contextlib import asynccontextmanager
+from utils.metrics import METRICS
+
+# Seconds an idle keep-alive connection stays in the pool
+KEEPALIVE_TIMEOUT = 60
+
+# Seconds resolved host addresses are cached
+DNS_CACHE_TTL = 300
+
+# Request timeouts (seconds): whole crawl, connect, and per socket read
+TIMEOUT_TOTAL = 30 * 60
+TIMEOUT_CONNECT = 30
+TIMEOUT_READ = 30
+
+
+@functools.lru_cache(maxsize=None)
+def ssl_context():
+    """
+    Return the certifi-backed SSL context, built once per process.
+    """
+    import certifi
+    context = ssl.create_default_context()
+    context.load_verify_locations(certifi.where())
+    return context
+
+
+def accept_encoding(compression=True):
+    """
+    Return the Accept-Encoding to offer: brotli when its decoder is
+    installed, gzip/deflate otherwise, or identity without compression.
+    """
+    if not compression:
+        return "identity"
+    try:
+        import brotli  # noqa: F401
+    except ImportError:
+        return "gzip, deflate"
+    return "gzip, deflate, br"
+
+
+class ConnectionStats:
+    """
+    Requests sent and connections opened or reused by a session factory.
+    """
+    __slots__ = ("requests", "opened", "reused")
+
+    def __init__(self):
+        self.requests = 0
+        self.opened = 0
+        self.reused = 0
+
+    def as_dict(self):
+        return {"requests": self.requests, "opened": self.opened, "reused": self.reused}
+
+
+class SessionFactory:
+    """
+    Hands out one shared aiohttp ClientSession per event loop.
+
+    The session keeps connections alive for keepalive_timeout seconds,
+    caches DNS lookups and verifies TLS with the cached certifi context, so
+    pages fetched by later crawls in the same loop (a long-lived daemon)
+    skip the DNS, TCP and TLS handshakes. Connection reuse is traced and
+    reported. The factory owns the session: callers close the factory, not
+    the session.
+    """
+    name = "aiohttp"
+
+    def __init__(self, limit=3, keepalive_timeout=KEEPALIVE_TIMEOUT, compression=True):
+        self.limit = limit
+        self.keepalive_timeout = keepalive_timeout
+        self.compression = compression
+        self.stats = ConnectionStats()
+        self._session = None
+        self._loop = None
+
+    def session(self):
+        """Return the shared session, creating it for the running loop."""
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._loop is not loop:
+            # A session cannot outlive the loop it was created in
+            self._session = self._create()
+            self._loop = loop
+        return self._session
+
+    def _create(self):
+        # Imported with the first session so the CLI starts without aiohttp
+        import aiohttp
+        connector = aiohttp.TCPConnector(
+            limit=self.limit, ssl=ssl_context(), ttl_dns_cache=DNS_CACHE_TTL,
+            keepalive_timeout=self.keepalive_timeout,
+        )
+        trace = aiohttp.TraceConfig()
+        trace.on_request_start.append(self._on_request)
+        trace.on_connection_create_end.append(self._on_connection_opened)
+        trace.on_connection_reuseconn.append(self._on_connection_reused)
+        return aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=TIMEOUT_TOTAL, connect=TIMEOUT_CONNECT,
+                                          sock_read=TIMEOUT_READ),
+            headers={"Accept-Encoding": accept_encoding(self.compression)},
+            trace_configs=[trace],
+        )
+
+    async def _on_request(self, session, context, params):
+        self.stats.requests += 1
+
+    async def _on_connection_opened(self, session, context, params):
+        self.stats.opened += 1
+        METRICS.inc("http_connections_total", reused="false")
+
+    async def _on_connection_reused(self, session, context, params):
+        self.stats.reused += 1
+        METRICS.inc("http_connections_total", reused="true")
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def report(self):
+        """Return human readable connection reuse lines."""
+        stats = self.stats
+        share = stats.reused / (stats.opened + stats.reused) if stats.opened + stats.reused else 0.0
+        return [f"HTTP client: {self.name}, {stats.requests} requests, {stats.opened} connections opened, "
+                f"{stats.reused} reused ({share:.0%})"]
+
+
+class HttpxResponse:
+    """
+    The parts of an aiohttp response fetch_content reads, over httpx.
+    """
+
+    def __init__(self, response):
+        self._response = response
+        self.status = response.status_code
+        self.headers = response.headers
+        self.http_version = response.http_version
+
+    @property
+    def content_length(self):
+        length = self.headers.get("Content-Length")
+        return int(length) if length else None
+
+    async def text(self):
+        await self._response.aread()
+        return self._response.text
+
+
+class HttpxSession:
+    """
+    aiohttp-style get() over an httpx.AsyncClient.
+    """
+
+    def __init__(self, client, stats):
+        self.client = client
+        self.stats = stats
+
+    @property
+    def closed(self):
+        return self.client.is_closed
+
+    @asynccontextmanager
+    async def get(self, url, headers=None):
+        opened = False
+
+        async def trace(event, info):
+            nonlocal opened
+            if event == "connection.connect_tcp.complete":
+                opened = True
+
+        self.stats.requests += 1
+        request = self.client.build_request("GET", url, headers=headers, extensions={"trace": trace})
+        response = await self.client.send(request, stream=True)
+        if opened:
+            self.stats.opened += 1
+        else:
+            self.stats.reused += 1
+        METRICS.inc("http_connections_total", reused="false" if opened else "true")
+        try:
+            yield HttpxResponse(response)
+        finally:
+            await response.aclose()
+
+    async def close(self):
+        await self.client.aclose()
+
+
+class HttpxSessionFactory(SessionFactory):
+    """
+    Shared httpx client negotiating HTTP/2, so concurrent page requests to
+    a host are multiplexed over one connection. Needs `pip install
+    httpx[http2]`.
+    """
+    name = "httpx"
+
+    def __init__(self, limit=3, keepalive_timeout=KEEPALIVE_TIMEOUT, compression=True, http2=True):
+        super().__init__(limit, keepalive_timeout, compression)
+        try:
+            import httpx  # noqa: F401
+            if http2:
+                import h2  # noqa: F401
+        except ImportError:
+            raise ValueError("The httpx client requires httpx: pip install 'httpx[http2]'")
+        self.http2 = http2
+
+    def _create(self):
+        import httpx
+        client = httpx.AsyncClient(
+            http2=self.http2,
+            verify=ssl_context(),
+            limits=httpx.Limits(max_connections=self.limit, max_keepalive_connections=self.limit,
+                                keepalive_expiry=self.keepalive_timeout),
+            timeout=httpx.Timeout(TIMEOUT_READ, connect=TIMEOUT_CONNECT),
+            headers={"Accept-Encoding": accept_encoding(self.compression)},
+        )
+        return HttpxSession(client, self.stats)
+
+
+SESSIONS = {
+    "aiohttp": SessionFactory,
+    "httpx": HttpxSessionFactory,
+}